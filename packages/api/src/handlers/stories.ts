@@ -1,4 +1,5 @@
 import { APIGatewayProxyEvent, APIGatewayProxyResult } from 'aws-lambda';
+import { brotliDecompressSync, gunzipSync } from 'zlib';
 import { QueryCommand, GetCommand } from '@aws-sdk/lib-dynamodb';
 import { GetObjectCommand, S3Client } from '@aws-sdk/client-s3';
 import { getSignedUrl } from '@aws-sdk/s3-request-presigner';
@@ -7,32 +8,260 @@ import { success, error } from '../utils/response';
 
 const s3Client = new S3Client({ region: process.env.AWS_REGION || 'us-east-1' });
 const BUCKET_NAME = process.env.S3_BUCKET_NAME || 'twinklepod-stories-beta';
+// Overrides the asset_base stored in compact stories (CDN moves)
+const ASSET_BASE_URL = process.env.ASSET_BASE_URL;
+
+// Story JSON is uploaded pre-compressed (upload-to-s3.py); older objects are plain
+const decodeBody = (body: Uint8Array, contentEncoding?: string): string => {
+  const buffer = Buffer.from(body);
+  if (contentEncoding === 'gzip') return gunzipSync(buffer).toString('utf-8');
+  if (contentEncoding === 'br') return brotliDecompressSync(buffer).toString('utf-8');
+  return buffer.toString('utf-8');
+};
+
+const readJson = async (key: string): Promise<any> => {
+  const s3Response = await s3Client.send(new GetObjectCommand({
+    Bucket: BUCKET_NAME,
+    Key: key,
+  }));
+  const bytes = await s3Response.Body?.transformByteArray();
+  return JSON.parse(bytes ? decodeBody(bytes, s3Response.ContentEncoding) : '{}');
+};
+
+// Written by upload-to-s3.py --chunked (story_chunks.py)
+interface ChunkLayout {
+  header_key: string;
+  chunk_key_template: string;
+  page_count: number;
+  header_pages: number;
+  chunk_pages: number;
+  chunk_count: number;
+}
+
+// Compact story schema (scripts/content-generation/story_schema.py): one
+// asset_base + page_path template, pages only carry non-default fields
+const expandStory = (story: any): any => {
+  if (!story.page_path) return story;
+
+  const { asset_base, page_path, pages = [], ...rest } = story;
+  const base = ASSET_BASE_URL || asset_base;
+  return {
+    ...rest,
+    pages: pages.map(({ hash, ...page }: any, position: number) => {
+      // A page without a hash under a hashed page_path keeps the plain name
+      const template = hash ? page_path.replace('{hash}', hash) : page_path.replace('.{hash}', '');
+      const path = page.image || template
+        .replace('{story_id}', story.story_id)
+        .replace('{n}', String(position + 1));
+      return {
+        ...page,
+        index: page.index ?? position,
+        text: page.text ?? '',
+        image: /^https?:\/\//.test(path) ? path : `${base}/${path}`,
+      };
+    }),
+  };
+};
+
+const chunkKey = (layout: ChunkLayout, chunk: number) =>
+  layout.chunk_key_template.replace('{chunk}', String(chunk));
+
+/**
+ * Chunked stories:
+ * - ?chunk=N            one page chunk
+ * - ?progressive=true   header only (first pages + layout), client fetches chunks
+ * - otherwise           header + all chunks fetched in parallel, pages merged
+ */
+const getChunkedStory = async (
+  item: Record<string, any>,
+  layout: ChunkLayout,
+  query: Record<string, string | undefined>,
+): Promise<APIGatewayProxyResult> => {
+  if (query.chunk !== undefined) {
+    const chunk = parseInt(query.chunk);
+    if (isNaN(chunk) || chunk < 0 || chunk >= layout.chunk_count) {
+      return error(`chunk must be between 0 and ${layout.chunk_count - 1}`, 400);
+    }
+    return success(await readJson(chunkKey(layout, chunk)));
+  }
+
+  if (query.progressive === 'true') {
+    return success({ ...item, ...(await readJson(layout.header_key)) });
+  }
+
+  const [header, ...chunks] = await Promise.all([
+    readJson(layout.header_key),
+    ...Array.from({ length: layout.chunk_count }, (_, chunk) => readJson(chunkKey(layout, chunk))),
+  ]);
+  return success({
+    ...item,
+    ...header,
+    pages: [...header.pages, ...chunks.flatMap((chunk) => chunk.pages)],
+  });
+};
+
+// Live catalog generation (scripts/content-generation/catalog_generations.py),
+// cached briefly so a pointer flip reaches every container within seconds.
+// No pointer item means an unversioned catalog.
+const GENERATION_CACHE_MS = 10_000;
+let generationCache: { generation: string | null; expires: number } | null = null;
+
+const currentGeneration = async (): Promise<string | null> => {
+  if (generationCache && generationCache.expires > Date.now()) return generationCache.generation;
+  const result = await docClient.send(new GetCommand({
+    TableName: TableNames.STORIES,
+    Key: { pk: 'CATALOG#current', sk: 'CATALOG#current' },
+  }));
+  const generation = result.Item?.generation ?? null;
+  generationCache = { generation, expires: Date.now() + GENERATION_CACHE_MS };
+  return generation;
+};
+
+const versionedKey = (generation: string | null, pk: string): string =>
+  generation ? `G#${generation}#${pk}` : pk;
+
+// Seeded facet partitions (scripts/content-generation/story_facets.py):
+// segments in CATEGORY, AGE order, so both filters are one Query
+const listPartitionKey = (category?: string, ageRange?: string): string | null => {
+  const segments: string[] = [];
+  if (category) segments.push(`CATEGORY#${category}`);
+  if (ageRange) segments.push(`AGE#${ageRange}`);
+  return segments.length ? segments.join('#') : null;
+};
+
+// Published rows are spread over PUBLISHED#true#0..N-1; keep in sync with
+// PUBLISHED_SHARDS in story_facets.py
+const PUBLISHED_SHARDS = parseInt(process.env.PUBLISHED_SHARDS || '4');
+const EXHAUSTED = '';
+
+// Set (to 'published-index') when the catalog was seeded with --published-index:
+// the shards are then feed_pk partitions of that sparse GSI, sorted by
+// published_at, instead of PUBLISHED# rows
+const PUBLISHED_FEED_INDEX = process.env.PUBLISHED_FEED_INDEX;
+const feedKey = PUBLISHED_FEED_INDEX ? 'feed_pk' : 'pk';
+const feedSortKey = PUBLISHED_FEED_INDEX ? 'published_at' : 'sk';
+
+// Index start keys need a table key too; it only orders rows with the same
+// published_at, and there are none (it ends in the story_id)
+const feedStartKey = (generation: string | null, pk: string, after: string) => {
+  if (!PUBLISHED_FEED_INDEX) return { pk: versionedKey(generation, pk), sk: after };
+  const storyId = after.slice(after.lastIndexOf('#') + 1);
+  return {
+    feed_pk: versionedKey(generation, pk),
+    published_at: after,
+    pk: versionedKey(generation, storyId),
+    sk: storyId,
+  };
+};
+
+// Mirrors sharded_partitions: unsharded (N <= 1) is the bare PUBLISHED#true
+const publishedShards = (): string[] =>
+  PUBLISHED_SHARDS > 1
+    ? Array.from({ length: PUBLISHED_SHARDS }, (_, shard) => `PUBLISHED#true#${shard}`)
+    : ['PUBLISHED#true'];
+
+// Cursor: {shard pk: last sk handed out, or '' once the shard is used up};
+// null when it isn't one
+const decodeCursor = (cursor?: string): Record<string, string> | null => {
+  if (!cursor) return {};
+  try {
+    const positions = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf-8'));
+    const valid = positions && typeof positions === 'object' && !Array.isArray(positions)
+      && Object.values(positions).every((position) => typeof position === 'string');
+    return valid ? positions : null;
+  } catch {
+    return null;
+  }
+};
+
+const encodeCursor = (positions: Record<string, string>): string =>
+  Buffer.from(JSON.stringify(positions)).toString('base64url');
+
+// Scatter-gather over the shards, newest first (mirrors story_feed.py).
+// Cursors name unversioned shards, so they survive a generation flip.
+const readFeedPage = async (
+  pks: string[], limit: number, positions: Record<string, string>, generation: string | null,
+) => {
+  const live = pks.filter((pk) => positions[pk] !== EXHAUSTED);
+
+  const results = await Promise.all(live.map(async (pk) => {
+    const result = await docClient.send(new QueryCommand({
+      TableName: TableNames.STORIES,
+      ...(PUBLISHED_FEED_INDEX && { IndexName: PUBLISHED_FEED_INDEX }),
+      KeyConditionExpression: `${feedKey} = :pk`,
+      ExpressionAttributeValues: { ':pk': versionedKey(generation, pk) },
+      Limit: limit,
+      ScanIndexForward: false,
+      ...(positions[pk] && { ExclusiveStartKey: feedStartKey(generation, pk, positions[pk]) }),
+    }));
+    return { pk, items: result.Items || [], more: !!result.LastEvaluatedKey };
+  }));
+
+  const page = results
+    .flatMap(({ pk, items }) => items.map((item) => ({ pk, item })))
+    .sort((a, b) => {
+      const [x, y] = [a.item[feedSortKey], b.item[feedSortKey]];
+      return x < y ? 1 : x > y ? -1 : 0;
+    })
+    .slice(0, limit);
+
+  for (const { pk, items, more } of results) {
+    const taken = page.filter((entry) => entry.pk === pk);
+    if (taken.length) positions[pk] = taken[taken.length - 1].item[feedSortKey];
+    if (taken.length === items.length && !more) positions[pk] = EXHAUSTED;
+  }
+
+  const done = pks.every((pk) => positions[pk] === EXHAUSTED);
+  return {
+    items: page.map((entry) => entry.item),
+    cursor: done ? null : encodeCursor(positions),
+  };
+};
+
+const DEFAULT_LIST_LIMIT = 20;
+const MAX_LIST_LIMIT = 100;
+
+// Missing or non-numeric -> default; otherwise clamped to 1..MAX_LIST_LIMIT
+const parseLimit = (value?: string): number => {
+  const limit = parseInt(value ?? '');
+  return Number.isNaN(limit) ? DEFAULT_LIST_LIMIT : Math.min(Math.max(limit, 1), MAX_LIST_LIMIT);
+};
 
 export const list = async (event: APIGatewayProxyEvent): Promise<APIGatewayProxyResult> => {
   try {
-    const { category, age_range, page = '1', limit = '20' } = event.queryStringParameters || {};
+    const { category, age_range, page = '1', cursor } = event.queryStringParameters || {};
+    const limit = parseLimit(event.queryStringParameters?.limit);
+    
+    const pk = listPartitionKey(category, age_range);
+    const positions = decodeCursor(cursor);
+    if (!positions) return error('Invalid cursor', 400);
+    const generation = await currentGeneration();
     
-    let pk = 'PUBLISHED#true';
-    if (category) {
-      pk = `CATEGORY#${category}`;
-    } else if (age_range) {
-      pk = `AGE#${age_range}`;
+    if (!pk) {
+      const feed = await readFeedPage(publishedShards(), limit, positions, generation);
+      return success({
+        stories: feed.items,
+        page: parseInt(page),
+        limit,
+        total: feed.items.length,
+        next_cursor: feed.cursor,
+      });
     }
     
     const result = await docClient.send(new QueryCommand({
       TableName: TableNames.STORIES,
       KeyConditionExpression: 'pk = :pk',
       ExpressionAttributeValues: {
-        ':pk': pk,
+        ':pk': versionedKey(generation, pk),
       },
-      Limit: parseInt(limit),
+      Limit: limit,
       ScanIndexForward: false, // newest first
     }));
 
     return success({
       stories: result.Items || [],
       page: parseInt(page),
-      limit: parseInt(limit),
+      limit,
       total: result.Count || 0,
     });
   } catch (err: any) {
@@ -48,7 +277,7 @@ export const get = async (event: APIGatewayProxyEvent): Promise<APIGatewayProxyR
     const result = await docClient.send(new GetCommand({
       TableName: TableNames.STORIES,
       Key: { 
-        pk: storyId,
+        pk: versionedKey(await currentGeneration(), storyId),
         sk: storyId
       },
     }));
@@ -57,15 +286,12 @@ export const get = async (event: APIGatewayProxyEvent): Promise<APIGatewayProxyR
       return error('Story not found', 404);
     }
 
-    // Fetch story content from S3
-    const s3Key = result.Item.s3_key;
-    const s3Response = await s3Client.send(new GetObjectCommand({
-      Bucket: BUCKET_NAME,
-      Key: s3Key,
-    }));
+    if (result.Item.chunks) {
+      return await getChunkedStory(result.Item, result.Item.chunks, event.queryStringParameters || {});
+    }
 
-    const storyContent = await s3Response.Body?.transformToString();
-    const storyData = JSON.parse(storyContent || '{}');
+    // Fetch story content from S3
+    const storyData = expandStory(await readJson(result.Item.s3_key));
 
     return success({
       ...result.Item,
@@ -44,6 +44,8 @@ const apiStack = new ApiStack(app, `TwinklePod-Api-${stage}`, {
     progress: databaseStack.progressTable.tableName,
     events: databaseStack.eventsTable.tableName,
   },
+  // cdk deploy -c publishedFeedIndex=true, after seeding with --published-index
+  publishedFeedIndex: String(app.node.tryGetContext('publishedFeedIndex')) === 'true',
 });
 
 // Amplify stack (depends on API, Auth, and Route 53)
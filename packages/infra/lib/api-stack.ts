@@ -4,6 +4,7 @@ import * as apigateway from 'aws-cdk-lib/aws-apigateway';
 import * as cognito from 'aws-cdk-lib/aws-cognito';
 import * as iam from 'aws-cdk-lib/aws-iam';
 import { Construct } from 'constructs';
+import { PUBLISHED_SHARDS, STORIES_FEED_INDEX } from './database-stack';
 
 interface ApiStackProps extends cdk.StackProps {
   stage: string;
@@ -23,6 +24,9 @@ interface ApiStackProps extends cdk.StackProps {
     progress: string;
     events: string;
   };
+  // Serve the default feed from the stories published-index GSI. Only turn
+  // on once the catalog was seeded with --published-index
+  publishedFeedIndex?: boolean;
 }
 
 export class ApiStack extends cdk.Stack {
@@ -32,7 +36,7 @@ export class ApiStack extends cdk.Stack {
   constructor(scope: Construct, id: string, props: ApiStackProps) {
     super(scope, id, props);
 
-    const { stage, userPoolId, userPoolClientId, tablesArns, tableNames } = props;
+    const { stage, userPoolId, userPoolClientId, tablesArns, tableNames, publishedFeedIndex } = props;
 
     // Lambda execution role
     const lambdaRole = new iam.Role(this, 'LambdaRole', {
@@ -143,6 +147,8 @@ export class ApiStack extends cdk.Stack {
       role: lambdaRole,
       environment: {
         DYNAMODB_STORIES_TABLE: tableNames.stories,
+        PUBLISHED_SHARDS: String(PUBLISHED_SHARDS),
+        ...(publishedFeedIndex && { PUBLISHED_FEED_INDEX: STORIES_FEED_INDEX }),
       },
     });
 
@@ -2,6 +2,11 @@ import * as cdk from 'aws-cdk-lib';
 import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';
 import { Construct } from 'constructs';
 
+// Published feed (scripts/content-generation/story_facets.py FEED_INDEX and
+// PUBLISHED_SHARDS); the stories API gets both through its environment
+export const STORIES_FEED_INDEX = 'published-index';
+export const PUBLISHED_SHARDS = 4;
+
 interface DatabaseStackProps extends cdk.StackProps {
   stage: string;
 }
@@ -39,6 +44,18 @@ export class DatabaseStack extends cdk.Stack {
       billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
       removalPolicy: cdk.RemovalPolicy.RETAIN,
     });
+    // Sparse: only published main records seeded with --published-index carry
+    // feed_pk/published_at (scripts/content-generation/story_facets.py), so
+    // this holds just the default feed; the grid fields are all list needs.
+    // Rollout: deploy this index, seed with --published-index, then deploy the
+    // API with -c publishedFeedIndex=true (see api-stack.ts)
+    this.storiesTable.addGlobalSecondaryIndex({
+      indexName: STORIES_FEED_INDEX,
+      partitionKey: { name: 'feed_pk', type: dynamodb.AttributeType.STRING },
+      sortKey: { name: 'published_at', type: dynamodb.AttributeType.STRING },
+      projectionType: dynamodb.ProjectionType.INCLUDE,
+      nonKeyAttributes: ['story_id', 'title', 'thumbnail_url', 'age_range', 'categories', 'duration_minutes'],
+    });
 
     this.progressTable = new dynamodb.Table(this, 'Progress', {
       partitionKey: { name: 'pk', type: dynamodb.AttributeType.STRING },
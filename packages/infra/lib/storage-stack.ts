@@ -44,6 +44,7 @@ export class StorageStack extends cdk.Stack {
 
     new cdk.CfnOutput(this, 'BucketName', { value: this.storiesBucket.bucketName });
     new cdk.CfnOutput(this, 'DistributionDomain', { value: this.distribution.distributionDomainName });
+    new cdk.CfnOutput(this, 'DistributionId', { value: this.distribution.distributionId });
     new cdk.CfnOutput(this, 'CloudFrontUrl', { value: this.cloudfrontUrl });
   }
 }
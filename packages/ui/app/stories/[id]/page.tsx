@@ -22,8 +22,15 @@ interface Story {
   moral?: string;
   duration_minutes: number;
   page_count: number;
+  chunks?: {
+    page_count: number;
+    chunk_count: number;
+  };
 }
 
+// Chunked stories list all pages in chunks.page_count, even before they load
+const totalPages = (story: Story) => story.chunks?.page_count ?? story.pages.length;
+
 export default function StoryReaderPage() {
   const params = useParams();
   const router = useRouter();
@@ -57,8 +64,9 @@ export default function StoryReaderPage() {
 
   const fetchStory = async () => {
     try {
-      const { data } = await api.get(`/stories/${params.id}`);
+      const { data } = await api.get(`/stories/${params.id}`, { params: { progressive: true } });
       setStory(data);
+      if (data.chunks) loadRemainingPages(data.chunks.chunk_count);
       
       if (user && selectedChild) {
         await api.post('/api/interaction', {
@@ -74,16 +82,28 @@ export default function StoryReaderPage() {
     }
   };
 
+  // The header only carries the first pages - append the rest chunk by chunk
+  const loadRemainingPages = async (chunkCount: number) => {
+    try {
+      for (let chunk = 0; chunk < chunkCount; chunk++) {
+        const { data } = await api.get(`/stories/${params.id}`, { params: { chunk } });
+        setStory(prev => prev && { ...prev, pages: [...prev.pages, ...data.pages] });
+      }
+    } catch (error) {
+      console.error('Failed to fetch story pages:', error);
+    }
+  };
+
   const saveProgress = async () => {
     if (!user || !selectedChild || !story) return;
-    const percentage = ((currentPage + 1) / story.pages.length) * 100;
+    const percentage = ((currentPage + 1) / totalPages(story)) * 100;
     try {
       await api.post('/api/progress', {
         child_id: selectedChild.child_id,
         story_id: story.story_id,
         paragraph_index: currentPage,
         percentage: Math.round(percentage),
-        completed: currentPage === story.pages.length - 1,
+        completed: currentPage === totalPages(story) - 1,
       });
     } catch (error) {
       console.error('Failed to save progress:', error);
@@ -124,7 +144,7 @@ export default function StoryReaderPage() {
     return <div className="min-h-screen flex items-center justify-center">Story not found</div>;
   }
 
-  const progress = ((currentPage + 1) / story.pages.length) * 100;
+  const progress = ((currentPage + 1) / totalPages(story)) * 100;
 
   return (
     <div className="min-h-screen bg-gray-50">
@@ -174,7 +194,7 @@ export default function StoryReaderPage() {
           </div>
 
           <div className="mt-4 text-center text-gray-600">
-            Page {currentPage + 1} / {story.pages.length}
+            Page {currentPage + 1} / {totalPages(story)}
           </div>
 
           <div className="mt-2">
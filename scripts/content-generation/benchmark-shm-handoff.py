@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark: pickled bytes vs shared-memory ring handoff to encoder processes
+
+For each worker count, pushes the same pages through a ProcessPoolExecutor
+twice:
+- pickle: source bytes pickled in, output bytes pickled back
+- shm: source written to a SharedMemoryRing slot, only descriptors pickled
+
+Reports pages/sec and bytes pickled across process boundaries.
+
+Usage:
+    python3 benchmark-shm-handoff.py                 # synthetic 512 KB pages
+    python3 benchmark-shm-handoff.py --real          # pages from content/bookdash
+    python3 benchmark-shm-handoff.py --real --encode # full encode_page per page
+"""
+
+import argparse
+import os
+import pickle
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+from image_pipeline import encode_page, submit_encode
+from shm_ring import SharedMemoryRing, slot_view, write_slot
+
+BOOKDASH_DIR = Path(__file__).parent / "content" / "bookdash"
+
+def echo_bytes(data):
+    """Stand-in encoder: returns a same-sized copy"""
+    return bytes(data)
+
+def echo_slot(spec, slot, length):
+    """Stand-in encoder reading from and writing back to a ring slot"""
+    view = slot_view(spec, slot, length)
+    output = bytes(view)
+    view.release()
+    write_slot(spec, slot, output)
+    return length
+
+def submit_echo(pool, ring, data):
+    """Same slot lifecycle as image_pipeline.submit_encode, for echo_slot"""
+    slot = ring.acquire()
+    ring.write(slot, data)
+    proxy = Future()
+
+    def collect(done):
+        output = ring.read(slot, done.result())
+        ring.release(slot)
+        proxy.set_result(output)
+
+    pool.submit(echo_slot, ring.spec, slot, len(data)).add_done_callback(collect)
+    return proxy
+
+def load_pages(args):
+    if args.real:
+        files = sorted(BOOKDASH_DIR.glob("*/images/*.jpg"))[:args.pages]
+        return [f.read_bytes() for f in files]
+    return [os.urandom(args.size_kb * 1024) for _ in range(args.pages)]
+
+def ipc_bytes(call, result):
+    """Bytes pickled across the process boundary for one call + its result"""
+    return len(pickle.dumps(call)) + len(pickle.dumps(result))
+
+def run_pickle(pages, workers, encode):
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if encode:
+            futures = [pool.submit(encode_page, data) for data in pages]
+        else:
+            futures = [pool.submit(echo_bytes, data) for data in pages]
+        results = [f.result() for f in futures]
+    elapsed = time.perf_counter() - start
+
+    pickled = sum(ipc_bytes((data,), result) for data, result in zip(pages, results))
+    return elapsed, pickled
+
+def run_shm(pages, workers, encode):
+    slot_size = max(len(data) for data in pages)
+    with SharedMemoryRing(slots=2 * workers, slot_size=slot_size) as ring:
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            if encode:
+                futures = [submit_encode(pool, data, ring=ring) for data in pages]
+            else:
+                futures = [submit_echo(pool, ring, data) for data in pages]
+            results = [f.result() for f in futures]
+        elapsed = time.perf_counter() - start
+
+        descriptor = (ring.spec, 0, slot_size)
+        if encode:
+            # Results carry sizes/flags only - the page bytes stay in shared memory
+            pickled = sum(ipc_bytes(descriptor, {**r, "data": None}) for r in results)
+        else:
+            pickled = len(pages) * ipc_bytes(descriptor, slot_size)
+    return elapsed, pickled
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared-memory handoff benchmark")
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--size-kb", type=int, default=512, help="synthetic page size")
+    parser.add_argument("--real", action="store_true", help="use downloaded Book Dash pages")
+    parser.add_argument("--encode", action="store_true", help="run encode_page instead of an echo")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8, 16])
+    args = parser.parse_args()
+
+    pages = load_pages(args)
+    total_mb = sum(len(p) for p in pages) / (1024 * 1024)
+    print(f"🏁 {len(pages)} pages, {total_mb:.1f} MB, {'encode' if args.encode else 'echo'} workers\n")
+
+    print(f"{'workers':>7} {'mode':>6} {'pages/s':>9} {'pickled MB':>11}")
+    for workers in args.workers:
+        for mode, run in (("pickle", run_pickle), ("shm", run_shm)):
+            elapsed, pickled = run(pages, workers, args.encode)
+            print(f"{workers:>7} {mode:>6} {len(pages) / elapsed:>9.1f} {pickled / (1024 * 1024):>11.2f}")
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -5,38 +5,83 @@ Book Dash Scraper - Images Only (Storyberries Style)
 What it does:
 1. Scrapes book list from bookdash.org
 2. For each book, downloads all page images from CloudFront
-3. Creates TwinklePod JSON with empty text (text is in images)
-4. Saves images locally (ready for S3 upload)
+   (or rasterizes the ebook PDF when there is no images folder)
+3. Drops blank pages, credits, endpapers and back covers
+4. Creates TwinklePod JSON with empty text (text is in images)
+5. Saves images locally (ready for S3 upload)
 
 No PDF extraction needed - images already have text overlaid.
+
+Encoding runs in a process pool fed through shared memory (see image_pipeline.py):
+    python3 bookdash-images-only.py                      # JPEG quality 85
+    python3 bookdash-images-only.py --encoder adaptive   # per-page SSIM-targeted quality
+    python3 bookdash-images-only.py --encoder adaptive --format webp
 """
 
+import argparse
 import asyncio
 import json
+import os
+import re
+import tempfile
 import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
 from playwright.async_api import async_playwright
 import requests
-from PIL import Image
-from io import BytesIO
+
+from image_pipeline import find_endpapers, matches_front_cover, submit_encode, TARGET_SSIM
+from pdf_raster import PDFIUM_AVAILABLE, PDFIUM_INSTALL_HINT, page_count, rasterize_page
+from shm_ring import SharedMemoryRing
 
 BOOKDASH_URL = "https://bookdash.org/book-source-files/"
 CLOUDFRONT_BASE = "https://d3qawc7yl9x4zs.cloudfront.net"
 OUTPUT_DIR = Path(__file__).parent / "content" / "bookdash"
 
-def save_image_locally(img, story_id, page_num):
-    """Optimize and save image locally"""
+# Where to look for the ebook PDF when no images folder exists
+PDF_FOLDER_PATHS = [
+    '/ebook/en_english',
+    '/ebook/en-english',
+    '/e-book/en_english',
+    '/e-book/en-english',
+    '/e_book/en_english',
+    '/e_book/en-english'
+]
+
+# Encoder defaults (overridable from the command line)
+PASSTHROUGH = True          # Copy already-optimized JPEGs instead of re-encoding
+DROP_PAGES = True           # Skip blank/credits/endpaper/back-cover pages
+ENCODER_MODE = "fixed"      # "fixed" (quality 85) or "adaptive" (SSIM-targeted)
+OUTPUT_FORMAT = "jpeg"      # "jpeg" or "webp"
+ENCODE_WORKERS = os.cpu_count()
+
+# Corpus-wide encode totals, reported at the end of the run
+ENCODE_STATS = {
+    "pages": 0,
+    "passthrough": 0,
+    "source_bytes": 0,
+    "baseline_bytes": 0,
+    "output_bytes": 0,
+    "dropped": {},
+}
+
+def save_image_locally(result, story_id, page_num):
+    """Save an encoded page (see image_pipeline.encode_page) locally"""
     try:
-        # Resize to max 1200x800 while maintaining aspect ratio
-        img.thumbnail((1200, 800), Image.Resampling.LANCZOS)
-        
         output_dir = OUTPUT_DIR / story_id / "images"
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        output_path = output_dir / f"page-{page_num}.jpg"
-        img.convert('RGB').save(output_path, 'JPEG', quality=85, optimize=True)
+        filename = f"page-{page_num}.{result['ext']}"
+        (output_dir / filename).write_bytes(result["data"])
         
-        return f"images/{story_id}/page-{page_num}.jpg"
+        ENCODE_STATS["pages"] += 1
+        ENCODE_STATS["passthrough"] += int(result["passthrough"])
+        ENCODE_STATS["source_bytes"] += result["source_size"]
+        ENCODE_STATS["baseline_bytes"] += result["baseline_size"]
+        ENCODE_STATS["output_bytes"] += len(result["data"])
+        
+        return f"images/{story_id}/{filename}"
     except Exception as e:
         print(f"      ⚠️  Save failed: {e}")
         return None
@@ -99,7 +144,6 @@ def find_all_images(slug):
                 continue
             
             # Extract image filenames from HTML
-            import re
             pattern = r'href="\?view-file=' + re.escape(slug) + r'([^"]+\.jpg)"'
             matches = re.findall(pattern, response.text)
             
@@ -124,6 +168,74 @@ def find_all_images(slug):
     print()  # New line
     return images
 
+def find_pdf(slug):
+    """Find the ebook PDF URL by scraping Book Dash page"""
+    for folder_path in PDF_FOLDER_PATHS:
+        try:
+            url = f"https://bookdash.org/book-source-files/?book={slug}&folder={folder_path}"
+            response = requests.get(url, timeout=10)
+            
+            if response.status_code != 200:
+                continue
+            
+            pattern = r'href="\?view-file=' + re.escape(slug) + r'([^"]+\.pdf)"'
+            match = re.search(pattern, response.text)
+            if match:
+                return f"{CLOUDFRONT_BASE}/{slug}{match.group(1)}"
+        except Exception:
+            continue
+    
+    return None
+
+def download_pdf(slug):
+    """Download the ebook PDF to a temp file (caller deletes it)"""
+    pdf_url = find_pdf(slug)
+    if not pdf_url:
+        return None
+    
+    try:
+        response = requests.get(pdf_url, timeout=120)
+        response.raise_for_status()
+    except Exception as e:
+        print(f"  ⚠️  PDF download failed: {e}")
+        return None
+    
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        f.write(response.content)
+    return Path(f.name)
+
+def download_images(image_list, pool, encode_options, ring):
+    """Download each image and hand it to the encoder pool right away"""
+    print(f"  📥 Downloading {len(image_list)} images...", end="", flush=True)
+    jobs = []
+    for page_num, (img_name, image_url) in enumerate(image_list, 1):
+        
+        try:
+            response = requests.get(image_url, timeout=30)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"\n      ⚠️  {img_name} failed: {e}")
+            continue
+        
+        page = {"position": page_num - 1, "total": len(image_list), "name": img_name}
+        future = submit_encode(pool, response.content, page, ring, **encode_options)
+        jobs.append((page_num, img_name, future))
+        print(".", end="", flush=True)
+    
+    print()  # New line after dots
+    return jobs
+
+def rasterize_pdf(pdf_path, pool, encode_options):
+    """Render every PDF page in the encoder pool (same encode path as images)"""
+    total = page_count(pdf_path)
+    print(f"  🖨️  Rasterizing {total} PDF pages")
+    jobs = []
+    for index in range(total):
+        page = {"position": index, "total": total, "name": f"pdf-page-{index + 1}"}
+        future = pool.submit(rasterize_page, str(pdf_path), index, page, **encode_options)
+        jobs.append((index + 1, page["name"], future))
+    return jobs
+
 def is_already_downloaded(title):
     """Check if story already exists by title"""
     for json_file in OUTPUT_DIR.glob("*.json"):
@@ -136,8 +248,13 @@ def is_already_downloaded(title):
             pass
     return False
 
-def convert_book(book):
-    """Convert a Book Dash book to TwinklePod format"""
+def convert_book(book, pool, encode_options, ring=None):
+    """Convert a Book Dash book to TwinklePod format
+
+    pool: ProcessPoolExecutor used for encoding
+    encode_options: image_pipeline.encode_page keyword arguments for this run
+    ring: optional SharedMemoryRing used to hand pages to the pool
+    """
     slug = book['slug']
     title = book['title']
     
@@ -153,42 +270,86 @@ def convert_book(book):
     # Find all images on CloudFront
     image_list = find_all_images(slug)
     
+    # No images folder: fall back to rendering the ebook PDF
+    pdf_path = None
     if not image_list:
+        if PDFIUM_AVAILABLE:
+            pdf_path = download_pdf(slug)
+        else:
+            print(f"  ⚠️  No page images and {PDFIUM_INSTALL_HINT}")
+    
+    if not image_list and not pdf_path:
         print(f"  ❌ No images found")
         return None
     
-    print(f"  📸 Found {len(image_list)} images")
-    
     story_id = str(uuid.uuid4())
     pages = []
     
-    # Download each image
-    print(f"  📥 Downloading {len(image_list)} images...", end="", flush=True)
-    for page_num, (img_name, image_url) in enumerate(image_list, 1):
+    try:
+        if pdf_path:
+            jobs = rasterize_pdf(pdf_path, pool, encode_options)
+        else:
+            print(f"  📸 Found {len(image_list)} images")
+            jobs = download_images(image_list, pool, encode_options, ring)
+        total = len(jobs) if pdf_path else len(image_list)
         
-        try:
-            response = requests.get(image_url, timeout=30)
-            img = Image.open(BytesIO(response.content))
-        except Exception as e:
-            print(f"\n      ⚠️  {img_name} failed: {e}")
+        # Collect encoded pages in reading order
+        print(f"  🎨 Encoding {len(jobs)} images...", end="", flush=True)
+        results = []
+        for page_num, img_name, future in jobs:
+            try:
+                results.append((page_num, future.result()))
+            except Exception as e:
+                print(f"\n      ⚠️  {img_name} encode failed: {e}")
+    finally:
+        if pdf_path:
+            pdf_path.unlink(missing_ok=True)
+    
+    # Endpapers and repeated covers only show up by comparing pages
+    drop_pages = encode_options.get("drop_pages", DROP_PAGES)
+    if drop_pages:
+        fingerprints = {page_num - 1: result["fingerprint"] for page_num, result in results}
+        endpapers = find_endpapers(fingerprints, total)
+        for page_num, result in results:
+            if page_num - 1 in endpapers:
+                result["kind"], result["reason"] = "endpaper", "repeated front and back"
+            elif page_num == total and result["kind"] == "page" and matches_front_cover(fingerprints, total):
+                result["kind"], result["reason"] = "back-cover", "matches front cover"
+    
+    passthrough_count = 0
+    dropped = {}
+    for page_num, result in results:
+        if drop_pages and result["kind"] != "page":
+            dropped[result["kind"]] = dropped.get(result["kind"], 0) + 1
+            print(f"\n      🗑️  page {page_num}: {result['kind']} ({result['reason']})", end="")
             continue
         
-        # Save locally
-        local_path = save_image_locally(img, story_id, page_num)
+        # Save locally (kept pages are numbered consecutively)
+        local_path = save_image_locally(result, story_id, len(pages) + 1)
         if not local_path:
             continue
+        if result["passthrough"]:
+            passthrough_count += 1
         
         print(".", end="", flush=True)
         
         # Empty text - text is in the image
         pages.append({
-            "index": page_num - 1,  # 0-indexed
+            "index": len(pages),  # 0-indexed
             "text": "",
             "image": local_path
         })
     
     print()  # New line after dots
     
+    if passthrough_count:
+        print(f"  ⏩ {passthrough_count} images kept as-is (already optimized)")
+    if dropped:
+        summary = ", ".join(f"{count} {kind}" for kind, count in sorted(dropped.items()))
+        print(f"  🗑️  Dropped {summary}")
+        for kind, count in dropped.items():
+            ENCODE_STATS["dropped"][kind] = ENCODE_STATS["dropped"].get(kind, 0) + count
+    
     if not pages:
         print(f"  ❌ No pages saved")
         return None
@@ -217,11 +378,48 @@ def convert_book(book):
     print(f"  ✅ Saved: {json_path.name}\n")
     return story
 
+def print_encode_report():
+    """Print corpus-wide encode totals and bytes saved vs fixed quality 85"""
+    stats = ENCODE_STATS
+    if not stats["pages"]:
+        return
+    
+    mb = 1024 * 1024
+    saved = stats["baseline_bytes"] - stats["output_bytes"]
+    saved_pct = saved * 100 / stats["baseline_bytes"] if stats["baseline_bytes"] else 0
+    
+    print(f"🎨 Encoded {stats['pages']} pages ({stats['passthrough']} kept as-is)")
+    print(f"   Source:   {stats['source_bytes'] / mb:.1f} MB")
+    print(f"   Baseline: {stats['baseline_bytes'] / mb:.1f} MB (JPEG quality 85)")
+    print(f"   Output:   {stats['output_bytes'] / mb:.1f} MB")
+    print(f"   Saved:    {saved / mb:.1f} MB ({saved_pct:.1f}%)")
+    if stats["dropped"]:
+        summary = ", ".join(f"{count} {kind}" for kind, count in sorted(stats["dropped"].items()))
+        print(f"   Dropped:  {summary} pages")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Book Dash image scraper")
+    parser.add_argument("--encoder", choices=["fixed", "adaptive"], default=ENCODER_MODE,
+                        help="fixed quality 85, or per-page quality search targeting --target-ssim")
+    parser.add_argument("--format", choices=["jpeg", "webp"], default=OUTPUT_FORMAT)
+    parser.add_argument("--target-ssim", type=float, default=TARGET_SSIM)
+    parser.add_argument("--no-passthrough", action="store_true",
+                        help="always re-encode, even already-optimized JPEGs")
+    parser.add_argument("--keep-all-pages", action="store_true",
+                        help="keep blank, credits, endpaper and back-cover pages")
+    parser.add_argument("--no-shm", action="store_true",
+                        help="pickle page bytes to the encoders instead of using shared memory")
+    parser.add_argument("--workers", type=int, default=ENCODE_WORKERS,
+                        help="encoder processes")
+    return parser.parse_args()
+
 async def main():
+    args = parse_args()
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     
     print("🚀 Book Dash Image Scraper (Storyberries Style)")
-    print(f"📁 Output: {OUTPUT_DIR}\n")
+    print(f"📁 Output: {OUTPUT_DIR}")
+    print(f"🎨 Encoder: {args.encoder} {args.format} ({args.workers} workers)\n")
     
     # Get book list
     print("=" * 60)
@@ -247,15 +445,28 @@ async def main():
     print(f"STEP 2: Downloading {LIMIT} Stories")
     print("=" * 60 + "\n")
     
-    for i, book in enumerate(books[:LIMIT], 1):
-        print(f"[{i}/{LIMIT}] ", end="")
-        story = convert_book(book)
-        if story:
-            converted += 1
-        print()  # Extra line between stories
+    encode_options = {
+        "passthrough": not args.no_passthrough,
+        "mode": args.encoder,
+        "fmt": args.format,
+        "target_ssim": args.target_ssim,
+        "drop_pages": not args.keep_all_pages,
+    }
+    
+    # Two slots per worker: one being encoded, one downloaded and waiting
+    shm = nullcontext() if args.no_shm else SharedMemoryRing(slots=2 * args.workers)
+    
+    with shm as ring, ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for i, book in enumerate(books[:LIMIT], 1):
+            print(f"[{i}/{LIMIT}] ", end="")
+            story = convert_book(book, pool, encode_options, ring)
+            if story:
+                converted += 1
+            print()  # Extra line between stories
     
     print("=" * 60)
     print(f"✅ COMPLETE: {converted}/{LIMIT} stories converted")
+    print_encode_report()
     print("=" * 60)
     print(f"📁 Output: {OUTPUT_DIR}")
 
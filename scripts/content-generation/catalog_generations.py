@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Versioned catalog generations in the stories table
+
+A generation is a complete copy of the catalog under prefixed partition
+keys (sort keys are unchanged):
+    G#{generation}#{story_id}
+    G#{generation}#CATEGORY#animals
+    G#{generation}#PUBLISHED#true#3
+Published-index feed keys (feed_pk, see story_facets.py) get the same
+prefix, so each generation has its own shards in the GSI too.
+
+Readers look up the live generation in one pointer item
+    pk = sk = CATALOG#current   {"generation", "previous", "counts", ...}
+so a seeding run writes a new generation at full speed while traffic keeps
+reading the old one, checks every partition's count, then flips the pointer
+in a single transaction. Rolling back is flipping it to a previous
+generation; generations past the keep window are deleted later by gc.
+
+Each generation also has a bookkeeping item under CATALOG#generations with
+its status: writing -> live -> previous -> (deleted).
+"""
+
+import secrets
+from datetime import datetime, timezone
+
+from ddb_loader import deserialize, serialize
+from story_facets import FEED_INDEX_PK
+
+POINTER_PK = "CATALOG#current"
+GENERATIONS_PK = "CATALOG#generations"
+KEEP_GENERATIONS = 2  # live + one to roll back to
+
+def new_generation_id():
+    """
+    Time-sortable generation id, e.g. 20250101T120000.123Z-9f3a1c
+
+    Milliseconds plus a random suffix keep two runs started together from
+    colliding on start_generation's conditional put.
+    """
+    now = datetime.now(timezone.utc)
+    return f"{now:%Y%m%dT%H%M%S}.{now.microsecond // 1000:03d}Z-{secrets.token_hex(3)}"
+
+def generation_prefix(generation):
+    return f"G#{generation}#"
+
+def versioned(record, generation):
+    """A copy of record under the generation's partition key (and feed index key)"""
+    copy = {**record, "pk": generation_prefix(generation) + record["pk"]}
+    if FEED_INDEX_PK in record:
+        copy[FEED_INDEX_PK] = generation_prefix(generation) + record[FEED_INDEX_PK]
+    return copy
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+def read_pointer(client, table_name):
+    """The CATALOG#current item, or None before the first generation"""
+    response = client.get_item(
+        TableName=table_name,
+        Key=serialize({"pk": POINTER_PK, "sk": POINTER_PK}),
+        ConsistentRead=True,
+    )
+    return deserialize(response["Item"]) if "Item" in response else None
+
+def list_generations(client, table_name):
+    """Bookkeeping items of every generation, newest first"""
+    kwargs = {
+        "TableName": table_name,
+        "KeyConditionExpression": "pk = :pk",
+        "ExpressionAttributeValues": {":pk": {"S": GENERATIONS_PK}},
+        "ScanIndexForward": False,
+        "ConsistentRead": True,
+    }
+    generations = []
+    while True:
+        response = client.query(**kwargs)
+        generations.extend(deserialize(item) for item in response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return generations
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+def start_generation(client, table_name, generation):
+    """Record a generation as being written (gc cleans it up if the run dies)"""
+    client.put_item(
+        TableName=table_name,
+        Item=serialize({
+            "pk": GENERATIONS_PK,
+            "sk": generation,
+            "status": "writing",
+            "started_at": _now(),
+        }),
+        ConditionExpression="attribute_not_exists(pk)",
+    )
+
+def verify_counts(loader, generation, expected_counts):
+    """
+    Compare what's in the table under the generation against what was written
+
+    Each written partition is counted with a strongly consistent Query, so
+    items from the BatchWrites just before are always seen and only this
+    generation's partitions are read.
+    Returns [(partition, expected, found), ...] for every partition that
+    doesn't match (empty when the generation is complete).
+    """
+    prefix = generation_prefix(generation)
+    counts = loader.count_partitions(prefix + pk for pk in expected_counts)
+    found = {pk[len(prefix):]: count for pk, count in counts.items()}
+    return [
+        (pk, expected, found[pk])
+        for pk, expected in sorted(expected_counts.items())
+        if expected != found[pk]
+    ]
+
+def flip_pointer(client, table_name, generation, counts=None):
+    """
+    Make generation live in one transaction
+
+    The pointer put is conditional on it still naming the generation we
+    read, so two seeding runs can't both flip from the same starting point.
+    Returns the generation that was live before (or None).
+    """
+    pointer = read_pointer(client, table_name)
+    live = pointer["generation"] if pointer else None
+    if live == generation:
+        return live
+    previous = ([live] if live else []) + [g for g in (pointer or {}).get("previous", []) if g != generation]
+
+    new_pointer = {
+        "pk": POINTER_PK,
+        "sk": POINTER_PK,
+        "generation": generation,
+        "previous": previous[:KEEP_GENERATIONS * 2],
+        "activated_at": _now(),
+    }
+    if counts:
+        new_pointer["counts"] = counts
+    put = {
+        "TableName": table_name,
+        "Item": serialize(new_pointer),
+    }
+    if live:
+        put["ConditionExpression"] = "generation = :live"
+        put["ExpressionAttributeValues"] = serialize({":live": live})
+    else:
+        put["ConditionExpression"] = "attribute_not_exists(pk)"
+
+    def set_status(gen, status):
+        return {"Update": {
+            "TableName": table_name,
+            "Key": serialize({"pk": GENERATIONS_PK, "sk": gen}),
+            "UpdateExpression": "SET #status = :status, updated_at = :now",
+            "ConditionExpression": "attribute_exists(pk)",
+            "ExpressionAttributeNames": {"#status": "status"},
+            "ExpressionAttributeValues": serialize({":status": status, ":now": _now()}),
+        }}
+
+    items = [{"Put": put}, set_status(generation, "live")]
+    if live:
+        items.append(set_status(live, "previous"))
+    client.transact_write_items(TransactItems=items)
+    return live
+
+def stale_generations(pointer, generations, keep=KEEP_GENERATIONS):
+    """Generations gc can delete: not live, and not among the newest `keep` ever made live"""
+    live = pointer["generation"] if pointer else None
+    kept = [live] + list((pointer or {}).get("previous", []))[:max(0, keep - 1)] if live else []
+    # Unfinished "writing" generations are left alone while they're the newest
+    newest = generations[0]["sk"] if generations else None
+    return [
+        g["sk"] for g in generations
+        if g["sk"] not in kept and not (g["status"] == "writing" and g["sk"] == newest)
+    ]
+
+def collect_garbage(loader, generation):
+    """Delete every item of a generation, then its bookkeeping item"""
+    keys = loader.scan_keys(generation_prefix(generation))
+    errors = loader.delete_keys(keys)
+    if not errors:
+        loader.client().delete_item(
+            TableName=loader.table_name,
+            Key=serialize({"pk": GENERATIONS_PK, "sk": generation}),
+        )
+    return len(keys), errors
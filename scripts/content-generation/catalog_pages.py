@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Pre-paginated catalog snapshots for CDN-only browsing
+
+Every list the browse page shows (the default feed, each category, each
+age range) is written as small newest-first JSON pages holding only the
+grid fields:
+    catalog/index.json
+    catalog/feed/page-1.{hash}.json
+    catalog/category/animals/page-1.{hash}.json
+    catalog/age/3-5/page-2.{hash}.json
+
+Page keys are content-hashed and uploaded immutable; each page links the
+next one. index.json is the only fixed key (short max-age) and lists every
+feed's page keys, so a regenerated catalog goes live as soon as the index
+expires and anonymous/first-page browse traffic never reaches the API.
+Pages the previous index links to have to outlive it by that max-age, so
+upload-to-s3.py --sync --delete keeps them for one more run.
+"""
+
+import hashlib
+import re
+
+from json_payloads import minify
+
+CATALOG_PREFIX = "catalog"
+INDEX_KEY = f"{CATALOG_PREFIX}/index.json"
+INDEX_CACHE_CONTROL = "public, max-age=60"
+CATALOG_PAGE_SIZE = 20  # stories.list default limit
+
+# What the story grid renders (same as the seeders' list projection)
+GRID_FIELDS = ["story_id", "title", "thumbnail_url", "age_range", "categories", "duration_minutes"]
+
+def _slug(value):
+    return re.sub(r"[^a-z0-9]+", "-", str(value).lower().replace("+", "-plus")).strip("-")
+
+def _feeds(stories):
+    """{(facet, value): stories} for the feed, every category and every age range"""
+    feeds = {("feed", None): list(stories)}
+    for story in stories:
+        for category in story.get("categories", []):
+            feeds.setdefault(("category", category), []).append(story)
+        feeds.setdefault(("age", story["age_range"]), []).append(story)
+    return feeds
+
+def _paginate(facet, value, stories, page_size):
+    """{key: page} for one feed, plus its page keys in order"""
+    path = facet if value is None else f"{facet}/{_slug(value)}"
+    ordered = sorted(stories, key=lambda s: (s["created_at"], s["story_id"]), reverse=True)
+    chunks = [ordered[i:i + page_size] for i in range(0, len(ordered), page_size)] or [[]]
+
+    # Built back to front: a page's key hashes in the key of the page after it
+    pages = {}
+    keys = []
+    next_key = None
+    for number in range(len(chunks), 0, -1):
+        page = {
+            "facet": facet,
+            "value": value,
+            "page": number,
+            "pages": len(chunks),
+            "total": len(ordered),
+            "stories": [{field: s[field] for field in GRID_FIELDS if field in s} for s in chunks[number - 1]],
+            "next": next_key,
+        }
+        digest = hashlib.sha256(minify(page)).hexdigest()[:12]
+        next_key = f"{CATALOG_PREFIX}/{path}/page-{number}.{digest}.json"
+        pages[next_key] = page
+        keys.insert(0, next_key)
+    return pages, keys
+
+def build_catalog(stories, page_size=CATALOG_PAGE_SIZE):
+    """
+    (index, {key: page}) for the published stories
+
+    Deterministic: the same stories always give the same keys and bytes.
+    """
+    published = [story for story in stories if story.get("published")]
+    index = {"page_size": page_size, "feeds": {"feed": None, "category": {}, "age": {}}}
+    pages = {}
+
+    for (facet, value), feed_stories in sorted(_feeds(published).items(), key=lambda f: (f[0][0], str(f[0][1]))):
+        feed_pages, keys = _paginate(facet, value, feed_stories, page_size)
+        pages.update(feed_pages)
+        entry = {"total": len(feed_stories), "pages": keys}
+        if value is None:
+            index["feeds"][facet] = entry
+        else:
+            index["feeds"][facet][value] = entry
+    return index, pages
+
+def index_page_keys(index):
+    """Every page key an index links to"""
+    feeds = index.get("feeds", {})
+    entries = [feeds.get("feed")] + list(feeds.get("category", {}).values()) + list(feeds.get("age", {}).values())
+    return {key for entry in entries if entry for key in entry["pages"]}
@@ -7,7 +7,8 @@ What it does:
 2. Downloads PDF from BookDash and extracts text for categorization
 3. Auto-categorizes based on title + PDF content
 4. Sets age_range to "3-6" for all
-5. Generates DynamoDB seed JSON for stories table
+5. Generates the DynamoDB seed for the stories table (NDJSON, written as
+   stories are processed - see seed_stream.py)
 6. Updates story JSONs with CloudFront URLs
 """
 
@@ -15,6 +16,8 @@ import json
 from pathlib import Path
 import requests
 import re
+
+from seed_stream import SEED_FILE, SeedWriter
 try:
     import PyPDF2
     from io import BytesIO
@@ -24,7 +27,7 @@ except ImportError:
     print("⚠️  PyPDF2 not installed. Install with: pip install PyPDF2")
 
 BOOKDASH_DIR = Path(__file__).parent / "content" / "bookdash"
-OUTPUT_FILE = Path(__file__).parent / "dynamodb-seed-stories.json"
+OUTPUT_FILE = Path(__file__).parent / SEED_FILE
 CLOUDFRONT_BASE = "https://cdn.twinklepod.com"
 
 # Category keywords for auto-categorization
@@ -144,10 +147,11 @@ def categorize_story(title, pages, pdf_text=""):
 
 def process_stories():
     """Process all stories and generate seed data"""
-    stories = []
+    category_counts = {}
     
     print("🔍 Processing BookDash stories...")
     
+    seed = SeedWriter(OUTPUT_FILE)
     for json_file in sorted(BOOKDASH_DIR.glob("*.json")):
         try:
             with open(json_file) as f:
@@ -207,7 +211,9 @@ def process_stories():
                 "created_at": story.get("created_at", "2025-01-01T00:00:00Z")
             }
             
-            stories.append(dynamodb_item)
+            seed.write(dynamodb_item)
+            for cat in categories:
+                category_counts[cat] = category_counts.get(cat, 0) + 1
             
             print(f"  ✅ {title}")
             print(f"     Age: {age_range} | Categories: {', '.join(categories)}")
@@ -215,20 +221,13 @@ def process_stories():
         except Exception as e:
             print(f"  ❌ {json_file.name}: {e}")
     
-    # Save DynamoDB seed data
-    with open(OUTPUT_FILE, 'w') as f:
-        json.dump(stories, f, indent=2)
+    seed.close()
     
-    print(f"\n✅ Processed {len(stories)} stories")
+    print(f"\n✅ Processed {seed.count} stories")
     print(f"📄 DynamoDB seed: {OUTPUT_FILE}")
     
     # Print category distribution
     print("\n📊 Category Distribution:")
-    category_counts = {}
-    for story in stories:
-        for cat in story["categories"]:
-            category_counts[cat] = category_counts.get(cat, 0) + 1
-    
     for cat, count in sorted(category_counts.items(), key=lambda x: -x[1]):
         print(f"   {cat}: {count}")
 
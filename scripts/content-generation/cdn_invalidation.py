@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Minimal CloudFront invalidations for re-uploaded S3 keys
+
+CloudFront bills per invalidation path (a wildcard counts as one) and caps
+what can be in progress at once: 3000 individual paths and 15 wildcard
+paths. plan_invalidation() turns a set of changed keys into few paths:
+
+1. Directories where most known objects changed become one /dir/* wildcard
+2. Too many wildcards: merge them under their tightest common parent
+3. Too many paths: wildcard the directory with the largest changed share
+
+Brand-new keys were never cached, so callers pass only overwritten or
+deleted keys. Content-hashed images never need invalidating at all.
+
+Set CLOUDFRONT_ENDPOINT_URL to point at a local stand-in (e.g. moto_server),
+or use dry_run to only print the plan.
+"""
+
+import os
+import time
+import uuid
+
+import boto3
+
+CLOUDFRONT_ENDPOINT_URL = os.environ.get("CLOUDFRONT_ENDPOINT_URL")
+
+# CloudFront limits on invalidations in progress per distribution
+MAX_FILE_PATHS = 3000
+MAX_WILDCARD_PATHS = 15
+
+# Waiting for an invalidation to finish
+POLL_SECONDS = 10
+WAIT_TIMEOUT_SECONDS = 15 * 60
+
+# Wildcard a directory once this share of its known objects changed
+COLLAPSE_RATIO = 0.5
+
+def _parents(key):
+    """'images/a/page-1.jpg' -> ['', 'images/', 'images/a/']"""
+    parts = key.split("/")[:-1]
+    return ["/".join(parts[:i]) + "/" if i else "" for i in range(len(parts) + 1)]
+
+def _dir_counts(keys):
+    """{directory: number of keys beneath it}"""
+    counts = {}
+    for key in keys:
+        for parent in _parents(key):
+            counts[parent] = counts.get(parent, 0) + 1
+    return counts
+
+def _covered(key, wildcards):
+    return any(key.startswith(d) for d in wildcards)
+
+def _add_wildcard(wildcards, directory):
+    """Add a wildcard, dropping the ones it now covers"""
+    return {d for d in wildcards if not d.startswith(directory)} | {directory}
+
+def plan_invalidation(changed_keys, known_keys=(), max_paths=MAX_FILE_PATHS,
+                      max_wildcards=MAX_WILDCARD_PATHS, min_ratio=COLLAPSE_RATIO):
+    """
+    Few CloudFront paths covering every changed key
+
+    known_keys: every key in the bucket (or as many as are known) - used to
+    avoid wildcarding directories where only a few objects changed
+    """
+    changed = set(changed_keys)
+    if not changed:
+        return []
+
+    counts = _dir_counts(changed)
+    totals = _dir_counts(changed | set(known_keys))
+
+    # Outermost directories made mostly of changed keys
+    wildcards = set()
+    for directory in sorted(counts, key=lambda d: d.count("/")):
+        if _covered(directory, wildcards):
+            continue
+        if counts[directory] >= 2 and counts[directory] / totals[directory] >= min_ratio:
+            wildcards.add(directory)
+
+    while True:
+        exact = [k for k in changed if not _covered(k, wildcards)]
+        if len(wildcards) <= max_wildcards and len(exact) + len(wildcards) <= max_paths:
+            break
+
+        uncovered = _dir_counts(exact)
+        candidates = [d for d, n in uncovered.items() if n >= 2]
+        if len(wildcards) > max_wildcards or not candidates:
+            # Tightest parent that covers at least two wildcards
+            shared = _dir_counts(d + "*" for d in wildcards)
+            parents = [d for d, n in shared.items() if n >= 2]
+            directory = min(parents, key=lambda d: (totals[d], -d.count("/")))
+        else:
+            # Directory where the most of what it holds is still exact paths
+            directory = max(candidates, key=lambda d: (uncovered[d] / totals[d], uncovered[d]))
+
+        wildcards = _add_wildcard(wildcards, directory)
+
+    return sorted(f"/{key}" for key in exact) + sorted(f"/{d}*" for d in wildcards)
+
+def batch_paths(paths, max_paths=MAX_FILE_PATHS, max_wildcards=MAX_WILDCARD_PATHS):
+    """Split paths into invalidation requests that each fit CloudFront's limits"""
+    batches = []
+    files, wildcards = [], []
+    for path in paths:
+        if path.endswith("*"):
+            wildcards.append(path)
+        else:
+            files.append(path)
+        if len(wildcards) == max_wildcards or len(files) + len(wildcards) == max_paths:
+            batches.append(files + wildcards)
+            files, wildcards = [], []
+    if files or wildcards:
+        batches.append(files + wildcards)
+    return batches
+
+def make_cloudfront_client(endpoint_url=CLOUDFRONT_ENDPOINT_URL):
+    return boto3.client("cloudfront", endpoint_url=endpoint_url)
+
+def find_distribution_id(client, domain):
+    """Distribution serving a *.cloudfront.net domain or alias"""
+    for page in client.get_paginator("list_distributions").paginate():
+        for dist in page.get("DistributionList", {}).get("Items", []):
+            if domain == dist["DomainName"] or domain in dist.get("Aliases", {}).get("Items", []):
+                return dist["Id"]
+    raise ValueError(f"No CloudFront distribution for {domain}")
+
+def wait_for_invalidation(client, distribution_id, invalidation_id):
+    """Poll until completed (status compared case-insensitively - stubs differ)"""
+    deadline = time.time() + WAIT_TIMEOUT_SECONDS
+    while True:
+        response = client.get_invalidation(DistributionId=distribution_id, Id=invalidation_id)
+        if response["Invalidation"]["Status"].lower() == "completed":
+            return
+        if time.time() > deadline:
+            raise TimeoutError(f"Invalidation {invalidation_id} still in progress")
+        time.sleep(POLL_SECONDS)
+
+def invalidate(client, distribution_id, paths, wait=True, dry_run=False):
+    """
+    Submit paths in batches, one at a time so in-progress limits hold
+
+    Returns the invalidation ids (empty on dry runs).
+    """
+    batches = batch_paths(paths)
+    ids = []
+    for i, batch in enumerate(batches, 1):
+        wildcards = sum(1 for p in batch if p.endswith("*"))
+        print(f"   Batch {i}/{len(batches)}: {len(batch) - wildcards} paths, {wildcards} wildcards")
+        if dry_run:
+            for path in batch:
+                print(f"      {path}")
+            continue
+
+        response = client.create_invalidation(
+            DistributionId=distribution_id,
+            InvalidationBatch={
+                "Paths": {"Quantity": len(batch), "Items": batch},
+                "CallerReference": str(uuid.uuid4()),
+            },
+        )
+        invalidation_id = response["Invalidation"]["Id"]
+        ids.append(invalidation_id)
+
+        if wait:
+            start = time.time()
+            wait_for_invalidation(client, distribution_id, invalidation_id)
+            print(f"   ✓ {invalidation_id} completed in {time.time() - start:.0f}s")
+    return ids
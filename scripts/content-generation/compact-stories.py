@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Convert story JSONs to the compact schema (see story_schema.py)
+
+Rewrites content/bookdash/*.json in place and reports the size change:
+    python3 compact-stories.py
+    python3 compact-stories.py --dry-run   # sizes only, nothing written
+    python3 compact-stories.py --expand    # back to full page URLs
+
+upload-to-s3.py uploads each story in whichever form it's stored in.
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from json_payloads import minify
+from story_schema import compact_story, expand_story
+
+BOOKDASH_DIR = Path(__file__).parent / "content" / "bookdash"
+CLOUDFRONT_BASE = "https://d3lncscy0tzgzt.cloudfront.net"
+
+def pretty(story):
+    return json.dumps(story, indent=2).encode("utf-8")
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert story JSONs to/from the compact schema")
+    parser.add_argument("--expand", action="store_true", help="convert compact stories back to full form")
+    parser.add_argument("--dry-run", action="store_true", help="report sizes without writing")
+    parser.add_argument("--asset-base", default=CLOUDFRONT_BASE)
+    args = parser.parse_args()
+
+    json_files = sorted(BOOKDASH_DIR.glob("*.json"))
+    print(f"🗜️  {'Expanding' if args.expand else 'Compacting'} {len(json_files)} stories\n")
+
+    before = {"pretty": 0, "minified": 0}
+    after = {"pretty": 0, "minified": 0}
+    for json_file in json_files:
+        try:
+            with open(json_file) as f:
+                story = json.load(f)
+            converted = expand_story(story) if args.expand else compact_story(story, args.asset_base)
+        except Exception as e:
+            print(f"  ❌ {json_file.name}: {e}")
+            continue
+
+        for sizes, obj in ((before, story), (after, converted)):
+            sizes["pretty"] += len(pretty(obj))
+            sizes["minified"] += len(minify(obj))
+
+        if not args.dry_run and converted is not story:
+            with open(json_file, 'w') as f:
+                json.dump(converted, f, indent=2)
+
+    print("           before      after")
+    for form in ("pretty", "minified"):
+        change = 100 * (after[form] / before[form] - 1) if before[form] else 0
+        print(f"  {form:<8} {before[form] / 1024:>7.1f} KB {after[form] / 1024:>7.1f} KB ({change:+.0f}%)")
+
+    if args.dry_run:
+        print("\n(dry run - nothing written)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+DynamoDB import-from-S3 exports
+
+Records are written in DynamoDB JSON - one {"Item": {...}} per line - into
+gzip-compressed parts of at most MAX_PART_BYTES (uncompressed), so a new
+table can be bulk-loaded by ImportTable without spending any write capacity:
+    {export_dir}/data/part-00000.json.gz
+    {export_dir}/data/part-00001.json.gz
+    {export_dir}/manifest.json        counts, sizes, key schema, indexes
+    {export_dir}/import-table.json    ImportTable request (S3 bucket/prefix to fill in)
+
+Upload data/ and create the table from it:
+    aws s3 sync {export_dir}/data s3://bucket/seed/2025-01-01/
+    aws dynamodb import-table --cli-input-json file://{export_dir}/import-table.json
+
+validate_export() checks every part against a key schema before uploading
+(see validate-ddb-export.py).
+"""
+
+import gzip
+import json
+from pathlib import Path
+
+from catalog_pages import GRID_FIELDS
+from ddb_loader import deserialize, item_size, serialize
+from story_facets import FEED_INDEX, FEED_INDEX_PK, FEED_INDEX_SK
+
+MAX_PART_BYTES = 100 * 1024 * 1024
+MAX_ITEM_BYTES = 400 * 1024  # DynamoDB item size limit
+DATA_DIR = "data"
+
+# Stories table keys and indexes (packages/infra/lib/database-stack.ts)
+STORIES_KEY_SCHEMA = [
+    {"AttributeName": "pk", "KeyType": "HASH"},
+    {"AttributeName": "sk", "KeyType": "RANGE"},
+]
+STORIES_ATTRIBUTE_DEFINITIONS = [
+    {"AttributeName": "pk", "AttributeType": "S"},
+    {"AttributeName": "sk", "AttributeType": "S"},
+    {"AttributeName": FEED_INDEX_PK, "AttributeType": "S"},
+    {"AttributeName": FEED_INDEX_SK, "AttributeType": "S"},
+]
+STORIES_GLOBAL_SECONDARY_INDEXES = [
+    {
+        "IndexName": FEED_INDEX,
+        "KeySchema": [
+            {"AttributeName": FEED_INDEX_PK, "KeyType": "HASH"},
+            {"AttributeName": FEED_INDEX_SK, "KeyType": "RANGE"},
+        ],
+        "Projection": {
+            "ProjectionType": "INCLUDE",
+            "NonKeyAttributes": GRID_FIELDS,
+        },
+    },
+]
+
+class ExportWriter:
+    """Write records as gzip DynamoDB JSON parts, rolling over at max_part_bytes"""
+
+    def __init__(self, export_dir, table_name="stories", max_part_bytes=MAX_PART_BYTES,
+                 key_schema=STORIES_KEY_SCHEMA, attribute_definitions=STORIES_ATTRIBUTE_DEFINITIONS,
+                 global_secondary_indexes=STORIES_GLOBAL_SECONDARY_INDEXES):
+        self.export_dir = Path(export_dir)
+        self.table_name = table_name
+        self.max_part_bytes = max_part_bytes
+        self.key_schema = key_schema
+        self.attribute_definitions = attribute_definitions
+        self.global_secondary_indexes = global_secondary_indexes
+        self.parts = []  # [{"file", "items", "bytes"}]
+        self._file = None
+
+        data_dir = self.export_dir / DATA_DIR
+        data_dir.mkdir(parents=True, exist_ok=True)
+        for old_part in data_dir.glob("part-*.json.gz"):
+            old_part.unlink()
+
+    def _next_part(self):
+        if self._file:
+            self._file.close()
+        name = f"{DATA_DIR}/part-{len(self.parts):05d}.json.gz"
+        # mtime=0: an unchanged seed exports to identical files
+        self._file = gzip.GzipFile(self.export_dir / name, "wb", compresslevel=6, mtime=0)
+        self.parts.append({"file": name, "items": 0, "bytes": 0})
+
+    def write(self, record):
+        line = (json.dumps({"Item": serialize(record)}, ensure_ascii=False) + "\n").encode("utf-8")
+        if not self.parts or (self.parts[-1]["items"] and self.parts[-1]["bytes"] + len(line) > self.max_part_bytes):
+            self._next_part()
+        self._file.write(line)
+        self.parts[-1]["items"] += 1
+        self.parts[-1]["bytes"] += len(line)
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
+
+    @property
+    def count(self):
+        return sum(part["items"] for part in self.parts)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+        manifest = {
+            "format": "DYNAMODB_JSON",
+            "compression": "GZIP",
+            "items": self.count,
+            "parts": self.parts,
+            "key_schema": self.key_schema,
+            "attribute_definitions": self.attribute_definitions,
+            "global_secondary_indexes": self.global_secondary_indexes,
+        }
+        with open(self.export_dir / "manifest.json", "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        table = {
+            "TableName": self.table_name,
+            "KeySchema": self.key_schema,
+            "AttributeDefinitions": self.attribute_definitions,
+            "BillingMode": "PAY_PER_REQUEST",
+        }
+        if self.global_secondary_indexes:
+            table["GlobalSecondaryIndexes"] = self.global_secondary_indexes
+        import_request = {
+            "S3BucketSource": {"S3Bucket": "REPLACE_ME", "S3KeyPrefix": "REPLACE_ME/"},
+            "InputFormat": "DYNAMODB_JSON",
+            "InputCompressionType": "GZIP",
+            "TableCreationParameters": table,
+        }
+        with open(self.export_dir / "import-table.json", "w") as f:
+            json.dump(import_request, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _check_item(item, key_types, seen, where):
+    """Problems with one exported line's Item"""
+    problems = []
+    for name, attribute_type in key_types.items():
+        value = item.get(name)
+        if value is None:
+            problems.append(f"{where}: missing key attribute {name}")
+        elif list(value) != [attribute_type]:
+            problems.append(f"{where}: {name} is {'/'.join(value)}, key schema says {attribute_type}")
+        elif value[attribute_type] == "":
+            problems.append(f"{where}: {name} is empty")
+
+    key = tuple(json.dumps(item.get(name), sort_keys=True) for name in key_types)
+    if key in seen:
+        problems.append(f"{where}: duplicate key {key} (first at {seen[key]})")
+    seen.setdefault(key, where)
+
+    size = item_size(deserialize(item))
+    if size > MAX_ITEM_BYTES:
+        problems.append(f"{where}: item is {size} bytes (limit {MAX_ITEM_BYTES})")
+    return problems
+
+def validate_export(export_dir, key_schema=None, attribute_definitions=None):
+    """
+    Check an export against a key schema (default: the one in its manifest)
+
+    Keys (table and any GSI) must be present with the declared type, table
+    keys unique, items under 400 KB and counts matching the manifest.
+    Returns (items checked, [problems]).
+    """
+    export_dir = Path(export_dir)
+    with open(export_dir / "manifest.json") as f:
+        manifest = json.load(f)
+    key_schema = key_schema or manifest["key_schema"]
+    attribute_definitions = attribute_definitions or manifest["attribute_definitions"]
+
+    types = {d["AttributeName"]: d["AttributeType"] for d in attribute_definitions}
+    key_types = {k["AttributeName"]: types[k["AttributeName"]] for k in key_schema}
+    # GSI key attributes are optional (sparse), but must have the declared type
+    index_types = {name: t for name, t in types.items() if name not in key_types}
+
+    problems = []
+    seen = {}
+    checked = 0
+    for part in manifest["parts"]:
+        items = 0
+        with gzip.open(export_dir / part["file"], "rt", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                where = f"{part['file']}:{line_number}"
+                try:
+                    entry = json.loads(line)
+                    item = entry["Item"]
+                    deserialize(item)
+                except (ValueError, KeyError, TypeError) as e:
+                    problems.append(f"{where}: not a DynamoDB JSON item ({e})")
+                    continue
+                problems += _check_item(item, key_types, seen, where)
+                for name, attribute_type in index_types.items():
+                    if name in item and list(item[name]) != [attribute_type]:
+                        problems.append(f"{where}: index key {name} is not {attribute_type}")
+                items += 1
+        if items != part["items"]:
+            problems.append(f"{part['file']}: {items} items, manifest says {part['items']}")
+        checked += items
+
+    if checked != manifest["items"]:
+        problems.append(f"{checked} items in parts, manifest says {manifest['items']}")
+    return checked, problems
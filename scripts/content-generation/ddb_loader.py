@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Multi-threaded DynamoDB bulk loader
+
+Records are split into 25-item BatchWriteItem requests and spread across
+worker threads, each with its own low-level client. UnprocessedItems are
+retried with full-jitter exponential backoff, and an optional token bucket
+keeps writes under a target WCU so a big seed doesn't set off a throttling
+storm on a provisioned table.
+
+query_partitions() reads whole partitions with parallel Queries (used by
+the seeder's reconcile mode to diff against what's already there),
+count_partitions() counts them with strongly consistent Queries (catalog
+generation checks, straight after writing), and scan_keys() lists keys
+under a pk prefix with a parallel segmented Scan (garbage collection).
+
+Every request asks for ReturnConsumedCapacity, so the report shows what the
+load actually cost. Set DYNAMODB_ENDPOINT_URL (or pass endpoint_url) to run
+against DynamoDB Local:
+    DYNAMODB_ENDPOINT_URL=http://localhost:8000 python3 seed-stories-table.py --table stories
+"""
+
+import json
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from decimal import Decimal
+
+import boto3
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.config import Config
+
+REGION = "us-east-1"
+DYNAMODB_ENDPOINT_URL = os.environ.get("DYNAMODB_ENDPOINT_URL")
+
+LOAD_WORKERS = 8
+BATCH_SIZE = 25  # BatchWriteItem limit
+MAX_ATTEMPTS = 8
+BACKOFF_BASE_SECONDS = 0.05
+BACKOFF_MAX_SECONDS = 5
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+def _to_dynamodb(value):
+    """JSON floats aren't valid DynamoDB numbers - go through Decimal"""
+    return json.loads(json.dumps(value), parse_float=Decimal)
+
+def serialize(item):
+    return {k: _serializer.serialize(v) for k, v in _to_dynamodb(item).items()}
+
+def deserialize(item):
+    return {k: _deserializer.deserialize(v) for k, v in item.items()}
+
+def normalize(item):
+    """Item as DynamoDB would return it, for comparing against reads"""
+    return _to_dynamodb(item)
+
+def _value_size(value):
+    """DynamoDB's size of a deserialized value (Decimal numbers, str, bool, list, dict)"""
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, (int, float, Decimal)):
+        digits = Decimal(str(value)).normalize().as_tuple().digits
+        return (len(digits) + 1) // 2 + 1
+    if isinstance(value, dict):
+        return 3 + sum(len(k.encode("utf-8")) + _value_size(v) + 1 for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return 3 + sum(_value_size(v) + 1 for v in value)
+    raise TypeError(f"unsupported DynamoDB value: {type(value).__name__}")
+
+def item_size(item):
+    """Stored size in bytes: attribute names plus values"""
+    return sum(len(k.encode("utf-8")) + _value_size(v) for k, v in item.items())
+
+def write_units(item):
+    """WCU to put one item (1 per KB, rounded up)"""
+    return max(1, math.ceil(item_size(item) / 1024))
+
+def read_units(items, consistent=False):
+    """RCU to Query these items in one page (4 KB units, halved for eventual consistency)"""
+    units = max(1, math.ceil(sum(item_size(item) for item in items) / 4096))
+    return units if consistent else units / 2
+
+def request_units(request):
+    """Estimated WCU of a serialized write request, for the throttle"""
+    if "PutRequest" in request:
+        item = deserialize(request["PutRequest"]["Item"])
+        return write_units(item)
+    return 1
+
+def _batches(iterable, size):
+    batch = []
+    for element in iterable:
+        batch.append(element)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def backoff_seconds(attempt):
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+class TokenBucket:
+    """Shared rate limit: acquire(n) blocks until n units are available"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, units):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                # A request bigger than the bucket goes through once it's full
+                if self.tokens >= min(units, self.capacity):
+                    self.tokens -= units
+                    return
+                wait = (min(units, self.capacity) - self.tokens) / self.rate
+            time.sleep(wait)
+
+class BulkLoader:
+    """Thread-pool BatchWriteItem loader for one table"""
+
+    def __init__(self, table_name, workers=LOAD_WORKERS, target_wcu=None,
+                 endpoint_url=DYNAMODB_ENDPOINT_URL, region=REGION):
+        self.table_name = table_name
+        self.workers = workers
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self.throttle = TokenBucket(target_wcu) if target_wcu else None
+        self._local = threading.local()
+        self._metrics_lock = threading.Lock()
+        self.metrics = {
+            "items": 0, "requests": 0, "retries": 0, "consumed_wcu": 0.0, "seconds": 0.0,
+            "items_read": 0, "queries": 0, "scans": 0, "consumed_rcu": 0.0,
+        }
+
+    def _client(self):
+        """One client per worker thread"""
+        if not hasattr(self._local, "client"):
+            config = Config(retries={"max_attempts": 10, "mode": "adaptive"})
+            self._local.client = boto3.session.Session().client(
+                "dynamodb", region_name=self.region, endpoint_url=self.endpoint_url, config=config
+            )
+        return self._local.client
+
+    def client(self):
+        """This thread's low-level client, for one-off calls"""
+        return self._client()
+
+    def _record(self, **deltas):
+        with self._metrics_lock:
+            for name, delta in deltas.items():
+                self.metrics[name] += delta
+
+    def _write_batch(self, batch):
+        """Write up to 25 requests, retrying UnprocessedItems"""
+        client = self._client()
+        pending = batch
+
+        for attempt in range(MAX_ATTEMPTS):
+            if self.throttle:
+                self.throttle.acquire(sum(request_units(r) for r in pending))
+
+            response = client.batch_write_item(
+                RequestItems={self.table_name: pending},
+                ReturnConsumedCapacity="TOTAL",
+            )
+            consumed = sum(c.get("CapacityUnits", 0) for c in response.get("ConsumedCapacity", []))
+            unprocessed = response.get("UnprocessedItems", {}).get(self.table_name, [])
+            self._record(items=len(pending) - len(unprocessed), requests=1, consumed_wcu=consumed)
+
+            if not unprocessed:
+                return len(batch)
+
+            pending = unprocessed
+            self._record(retries=1)
+            time.sleep(backoff_seconds(attempt))
+
+        raise RuntimeError(f"{len(pending)} items still unprocessed after {MAX_ATTEMPTS} attempts")
+
+    def _write(self, requests):
+        """
+        Write an iterable of requests in parallel batches
+
+        Only a couple of batches per worker are in flight at a time, so a
+        streamed seed is never read far ahead of what's been written.
+        """
+        start = time.perf_counter()
+        errors = []
+        in_flight = set()
+
+        def collect(done):
+            for future in done:
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.append(e)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ddb-load") as pool:
+            for batch in _batches(requests, BATCH_SIZE):
+                if len(in_flight) >= 2 * self.workers:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+                in_flight.add(pool.submit(self._write_batch, batch))
+            collect(as_completed(in_flight))
+        self._record(seconds=time.perf_counter() - start)
+        return errors
+
+    def put_items(self, items):
+        """Write all items (any iterable); returns the batch errors (empty on success)"""
+        return self._write({"PutRequest": {"Item": serialize(item)}} for item in items)
+
+    def delete_keys(self, keys):
+        """Delete items by key dict; returns the batch errors (empty on success)"""
+        return self._write({"DeleteRequest": {"Key": serialize(key)}} for key in keys)
+
+    def _query_partition(self, pk):
+        client = self._client()
+        items = []
+        kwargs = {
+            "TableName": self.table_name,
+            "KeyConditionExpression": "pk = :pk",
+            "ExpressionAttributeValues": {":pk": {"S": pk}},
+            "ReturnConsumedCapacity": "TOTAL",
+        }
+        while True:
+            response = client.query(**kwargs)
+            items.extend(deserialize(item) for item in response.get("Items", []))
+            self._record(queries=1, items_read=len(response.get("Items", [])),
+                         consumed_rcu=response.get("ConsumedCapacity", {}).get("CapacityUnits", 0))
+            if "LastEvaluatedKey" not in response:
+                return items
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def query_partitions(self, pks):
+        """{pk: [items]} for every partition, read with parallel Queries"""
+        pks = list(pks)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ddb-query") as pool:
+            return dict(zip(pks, pool.map(self._query_partition, pks)))
+
+    def _count_partition(self, pk):
+        client = self._client()
+        count = 0
+        kwargs = {
+            "TableName": self.table_name,
+            "KeyConditionExpression": "pk = :pk",
+            "ExpressionAttributeValues": {":pk": {"S": pk}},
+            "Select": "COUNT",
+            "ConsistentRead": True,
+            "ReturnConsumedCapacity": "TOTAL",
+        }
+        while True:
+            response = client.query(**kwargs)
+            count += response["Count"]
+            self._record(queries=1, items_read=response["Count"],
+                         consumed_rcu=response.get("ConsumedCapacity", {}).get("CapacityUnits", 0))
+            if "LastEvaluatedKey" not in response:
+                return count
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def count_partitions(self, pks):
+        """{pk: item count} for every partition, via strongly consistent parallel Queries"""
+        pks = list(pks)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ddb-count") as pool:
+            return dict(zip(pks, pool.map(self._count_partition, pks)))
+
+    def _scan_segment(self, segment, total_segments, prefix):
+        client = self._client()
+        keys = []
+        kwargs = {
+            "TableName": self.table_name,
+            "Segment": segment,
+            "TotalSegments": total_segments,
+            "ProjectionExpression": "pk, sk",
+            "FilterExpression": "begins_with(pk, :prefix)",
+            "ExpressionAttributeValues": {":prefix": {"S": prefix}},
+            "ReturnConsumedCapacity": "TOTAL",
+        }
+        while True:
+            response = client.scan(**kwargs)
+            keys.extend(deserialize(item) for item in response.get("Items", []))
+            self._record(scans=1, items_read=len(response.get("Items", [])),
+                         consumed_rcu=response.get("ConsumedCapacity", {}).get("CapacityUnits", 0))
+            if "LastEvaluatedKey" not in response:
+                return keys
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def scan_keys(self, prefix):
+        """Keys ({"pk", "sk"}) of every item whose pk starts with prefix, via a parallel Scan"""
+        segments = self.workers
+        with ThreadPoolExecutor(max_workers=segments, thread_name_prefix="ddb-scan") as pool:
+            results = pool.map(lambda segment: self._scan_segment(segment, segments, prefix), range(segments))
+            return [key for keys in results for key in keys]
+
+    def report(self):
+        m = self.metrics
+        rate = m["items"] / m["seconds"] if m["seconds"] else 0
+        if m["queries"] or m["scans"]:
+            print(f"   Items read:        {m['items_read']} in {m['queries']} queries, {m['scans']} scan pages "
+                  f"({m['consumed_rcu']:.1f} RCU)")
+        print(f"   Items written:     {m['items']}")
+        print(f"   Requests:          {m['requests']} ({m['retries']} UnprocessedItems retries)")
+        print(f"   Consumed capacity: {m['consumed_wcu']:.0f} WCU")
+        print(f"   Throughput:        {rate:.0f} items/s over {m['seconds']:.1f}s")
@@ -11,7 +11,7 @@ CLOUDFRONT_BASE = "https://d3lncscy0tzgzt.cloudfront.net"
 def fix_url(url):
     """Remove duplicate CloudFront prefixes"""
     # Extract the path after all the duplicate prefixes
-    match = re.search(r'(images/[^/]+/page-\d+\.jpg)$', url)
+    match = re.search(r'(images/[^/]+/page-\d+(?:\.[0-9a-f]{12})?\.(?:jpg|webp))$', url)
     if match:
         return f"{CLOUDFRONT_BASE}/{match.group(1)}"
     return url
@@ -21,6 +21,10 @@ def fix_story_json(json_file):
     with open(json_file) as f:
         story = json.load(f)
     
+    # Compact stories (see story_schema.py) keep one base URL
+    if 'asset_base' in story:
+        story['asset_base'] = CLOUDFRONT_BASE
+    
     # Fix page image URLs
     for page in story.get('pages', []):
         if 'image' in page:
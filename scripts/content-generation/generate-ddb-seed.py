@@ -3,19 +3,46 @@
 Generate DynamoDB seed with denormalized records for efficient querying
 
 Creates multiple records per story:
-1. Main record: PK = story_id
-2. Category records: PK = "CATEGORY#{category}"
-3. Age record: PK = "AGE#{age_range}"
-4. Published record: PK = "PUBLISHED#true"
+1. Main record: PK = SK = story_id (the key stories.ts and
+   seed-stories-table.py use)
+2. List records, one per facet combination (see story_facets.py):
+   PK = "CATEGORY#{category}", "AGE#{age_range}", "PUBLISHED#true#{shard}",
+   "CATEGORY#{category}#AGE#{age_range}", ...
+
+    python3 generate-ddb-seed.py --facets category,age,published,category+age --published-shards 4
+
+--published-index skips the PUBLISHED#true rows and puts feed_pk/published_at
+on published main records for the published-index GSI (see story_facets.py).
+
+The records go to dynamodb-seed-records.ndjson, written a story at a time
+(see seed_stream.py) - not the story seed seed-stories-table.py loads;
+--seed-file picks another path, e.g. dynamodb-seed-records.ndjson.gz.
+
+--export-dir also writes the records as a DynamoDB import-from-S3 export
+(see ddb_export.py, check it with validate-ddb-export.py).
+
+Also writes the static catalog pages (see catalog_pages.py) to
+content/catalog/ for upload-to-s3.py --catalog; --no-catalog skips them.
 """
 
+import argparse
 import json
 from pathlib import Path
 
+from catalog_pages import CATALOG_PAGE_SIZE, CATALOG_PREFIX, GRID_FIELDS, INDEX_KEY, build_catalog
+from ddb_export import ExportWriter
+from seed_stream import RECORDS_SEED_FILE, SeedWriter, is_ndjson
+from story_facets import (
+    FACET_COMBOS, FEED_INDEX, FEED_INDEX_PK, PUBLISHED_SHARDS, facet_partitions, feed_index_attributes,
+    parse_combos, without_published_rows,
+)
+
 BOOKDASH_DIR = Path(__file__).parent / "content" / "bookdash"
-OUTPUT_FILE = Path(__file__).parent / "dynamodb-seed-stories.json"
+OUTPUT_FILE = Path(__file__).parent / RECORDS_SEED_FILE
+CATALOG_FIELDS = GRID_FIELDS + ["created_at", "published"]
+CATALOG_DIR = Path(__file__).parent / "content" / CATALOG_PREFIX
 
-def create_story_records(story):
+def create_story_records(story, combos=FACET_COMBOS, published_shards=PUBLISHED_SHARDS, published_index=False):
     """Create denormalized records for a story"""
     records = []
     
@@ -33,55 +60,96 @@ def create_story_records(story):
         "created_at": story["created_at"]
     }
     
-    # 1. Main record (PK = story_id)
+    # 1. Main record (PK = SK = story_id, like seed-stories-table.py)
     main_record = {
         "pk": story["story_id"],
-        "sk": "METADATA",
+        "sk": story["story_id"],
         **base_item
     }
+    if published_index:
+        main_record.update(feed_index_attributes(story, published_shards))
     records.append(main_record)
     
-    # 2. Category records (one per category)
-    for category in story["categories"]:
-        category_record = {
-            "pk": f"CATEGORY#{category}",
-            "sk": f"{story['created_at']}#{story['story_id']}",
-            **base_item
-        }
-        records.append(category_record)
-    
-    # 3. Age range record
-    age_record = {
-        "pk": f"AGE#{story['age_range']}",
-        "sk": f"{story['created_at']}#{story['story_id']}",
-        **base_item
-    }
-    records.append(age_record)
-    
-    # 4. Published record
-    if story["published"]:
-        published_record = {
-            "pk": "PUBLISHED#true",
+    # 2. List records (one per facet combination value); only published
+    # stories get PUBLISHED# rows
+    for _, pk in facet_partitions(story, combos, published_shards):
+        if "PUBLISHED#false" in pk:
+            continue
+        records.append({
+            "pk": pk,
             "sk": f"{story['created_at']}#{story['story_id']}",
             **base_item
-        }
-        records.append(published_record)
+        })
     
     return records
 
+def write_catalog(stories, page_size):
+    """Write the catalog pages and index under CATALOG_DIR, replacing the last run's"""
+    index, pages = build_catalog(stories, page_size)
+
+    if CATALOG_DIR.exists():
+        for old_page in CATALOG_DIR.rglob("*.json"):
+            old_page.unlink()
+
+    for key, obj in [(INDEX_KEY, index), *pages.items()]:
+        path = CATALOG_DIR / key.split("/", 1)[1]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(obj, f, indent=2)
+
+    feeds = 1 + len(index["feeds"]["category"]) + len(index["feeds"]["age"])
+    print(f"\n📚 Catalog: {len(pages)} pages across {feeds} feeds → {CATALOG_DIR}")
+
 def main():
+    parser = argparse.ArgumentParser(description="Generate the DynamoDB seed file")
+    parser.add_argument("--facets", default=",".join("+".join(combo) for combo in FACET_COMBOS),
+                        help="facet combinations to write list partitions for (e.g. category,age,category+age)")
+    parser.add_argument("--published-shards", type=int, default=PUBLISHED_SHARDS,
+                        help="spread PUBLISHED#true rows over this many partitions (1 = unsharded)")
+    parser.add_argument("--published-index", action="store_true",
+                        help="index published main records for the published-index GSI instead of writing PUBLISHED# rows")
+    parser.add_argument("--page-size", type=int, default=CATALOG_PAGE_SIZE,
+                        help="stories per catalog page")
+    parser.add_argument("--no-catalog", dest="catalog", action="store_false",
+                        help="skip writing the static catalog pages")
+    parser.add_argument("--seed-file", type=Path, default=OUTPUT_FILE,
+                        help="where to write the seed (.ndjson, .ndjson.gz, or legacy .json)")
+    parser.add_argument("--export-dir", type=Path,
+                        help="also write an import-from-S3 export (gzip DynamoDB JSON) here")
+    args = parser.parse_args()
+    try:
+        is_ndjson(args.seed_file)
+    except ValueError as e:
+        parser.error(str(e))
+    combos = parse_combos(args.facets)
+    if args.published_index:
+        combos = without_published_rows(combos)
+
     print("🔍 Generating DynamoDB seed with denormalized records...")
     
-    all_records = []
+    partition_counts = {}  # pk -> records
+    index_counts = {}      # feed_pk -> published main records
+    catalog_stories = []   # just the fields the catalog pages need
     story_count = 0
     
+    # Records are written as each story is processed
+    seed = SeedWriter(args.seed_file)
+    export = ExportWriter(args.export_dir) if args.export_dir else None
     for json_file in sorted(BOOKDASH_DIR.glob("*.json")):
         try:
             with open(json_file) as f:
                 story = json.load(f)
             
-            records = create_story_records(story)
-            all_records.extend(records)
+            records = create_story_records(story, combos, args.published_shards, args.published_index)
+            seed.write_all(records)
+            if export:
+                export.write_all(records)
+            for record in records:
+                partition_counts[record["pk"]] = partition_counts.get(record["pk"], 0) + 1
+                if FEED_INDEX_PK in record:
+                    index_counts[record[FEED_INDEX_PK]] = index_counts.get(record[FEED_INDEX_PK], 0) + 1
+            if args.catalog:
+                catalog_stories.append({field: story[field] for field in CATALOG_FIELDS if field in story})
             story_count += 1
             
             print(f"  ✅ {story['title']} → {len(records)} records")
@@ -89,27 +157,36 @@ def main():
         except Exception as e:
             print(f"  ❌ {json_file.name}: {e}")
     
-    # Save seed file
-    with open(OUTPUT_FILE, 'w') as f:
-        json.dump(all_records, f, indent=2)
+    seed.close()
+    if export:
+        export.close()
     
     print(f"\n{'='*60}")
     print(f"✅ Processed {story_count} stories")
-    print(f"📊 Generated {len(all_records)} DynamoDB records")
-    print(f"📄 Seed file: {OUTPUT_FILE}")
+    print(f"📊 Generated {seed.count} DynamoDB records")
+    print(f"📄 Seed file: {args.seed_file}")
+    if export:
+        print(f"📦 Import export: {export.count} items in {len(export.parts)} parts → {args.export_dir}")
     print(f"{'='*60}")
     
+    if args.catalog:
+        write_catalog(catalog_stories, args.page_size)
+    
     # Print statistics
     category_counts = {}
     age_counts = {}
+    combo_counts = {}
+    shard_counts = dict(index_counts)
     
-    for record in all_records:
-        if record["pk"].startswith("CATEGORY#"):
-            category = record["pk"].replace("CATEGORY#", "")
-            category_counts[category] = category_counts.get(category, 0) + 1
-        elif record["pk"].startswith("AGE#"):
-            age = record["pk"].replace("AGE#", "")
-            age_counts[age] = age_counts.get(age, 0) + 1
+    for pk, count in partition_counts.items():
+        if pk.startswith("PUBLISHED#"):
+            shard_counts[pk] = count
+        elif pk.count("#") > 1:
+            combo_counts[pk] = count
+        elif pk.startswith("CATEGORY#"):
+            category_counts[pk.replace("CATEGORY#", "")] = count
+        elif pk.startswith("AGE#"):
+            age_counts[pk.replace("AGE#", "")] = count
     
     print("\n📊 Category Distribution:")
     for cat, count in sorted(category_counts.items(), key=lambda x: -x[1]):
@@ -118,6 +195,16 @@ def main():
     print("\n📊 Age Range Distribution:")
     for age, count in sorted(age_counts.items()):
         print(f"   {age}: {count} stories")
+    
+    if combo_counts:
+        print(f"\n📊 Combined facet partitions: {len(combo_counts)}")
+        for pk, count in sorted(combo_counts.items(), key=lambda x: -x[1])[:10]:
+            print(f"   {pk}: {count} stories")
+    
+    if shard_counts:
+        print(f"\n📊 Published Partitions{' (' + FEED_INDEX + ')' if index_counts else ''}:")
+        for pk, count in sorted(shard_counts.items()):
+            print(f"   {pk}: {count} stories")
 
 if __name__ == "__main__":
     main()
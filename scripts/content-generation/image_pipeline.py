@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Shared image helpers for the Book Dash scrapers
+
+Every page goes through encode_page():
+1. Passthrough: sources that are already small JPEGs at or below our target
+   quality are copied as-is (metadata stripped) - re-encoding them would only
+   burn CPU and add generation loss without saving bytes
+2. Otherwise: resize to max 1200x800 and re-encode
+   - "fixed" mode: JPEG quality 85
+   - "adaptive" mode: binary-search the lowest JPEG/WebP quality whose SSIM
+     against the resized reference still reaches TARGET_SSIM
+     (never larger than the quality 85 JPEG - that's used instead)
+
+Pages can also be classified from cheap pixel statistics (page_stats) so
+blank pages, credits and back covers are dropped before they are encoded
+and uploaded.
+
+encode_page() only takes and returns picklable values so it can run in a
+ProcessPoolExecutor. submit_encode() hands sources to the pool through a
+SharedMemoryRing (see shm_ring.py) so only small descriptors are pickled.
+"""
+
+from concurrent.futures import Future
+from io import BytesIO
+import numpy as np
+from PIL import Image
+
+from shm_ring import slot_view, write_slot
+
+MAX_SIZE = (1200, 800)
+JPEG_QUALITY = 85
+
+# Adaptive quality search
+TARGET_SSIM = 0.985
+QUALITY_RANGE = (40, 95)
+SSIM_WINDOW = 8
+
+FORMAT_EXTENSIONS = {"jpeg": "jpg", "webp": "webp"}
+
+# Page classification
+STATS_SIZE = (256, 256)      # Classify on a thumbnail, not the full page
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+EDGE_THRESHOLD = 48          # |dx| + |dy| luma gradient counted as an edge
+NEAR_WHITE = 230             # Luma at or above this counts as paper
+BLANK_MAX_STD = 8            # Flat pages (solid color, empty endpapers)
+BLANK_MAX_EDGES = 0.005
+CREDITS_MIN_WHITE = 0.85     # Black text on white paper, no illustration color
+CREDITS_MAX_COLOR = 12
+BACK_COVER_MAX_EDGES = 0.03  # Last page with just a logo or silhouette...
+BACK_COVER_MAX_STD = 24      # ...on a near-uniform background...
+BACK_COVER_MAX_WHITE = 0.5   # ...that's a color, not paper
+BACK_CREDITS_MIN_WHITE = 0.8   # Back-matter credits: white paper...
+BACK_CREDITS_MIN_EDGES = 0.05  # ...covered in text (not "The End" + line art)
+COVER_MATCH_MAX_BITS = 6     # dHash distance for "same picture as the front cover"
+FRONT_MATTER_PAGES = 4       # Credits only ever appear in the first/last pages
+BACK_MATTER_PAGES = 2
+
+# libjpeg standard luminance quantization table (quality 50)
+STD_LUMINANCE_QTABLE = [
+    16, 11, 10, 16, 24, 40, 51, 61,
+    12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56,
+    14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77,
+    24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101,
+    72, 92, 95, 98, 112, 100, 103, 99,
+]
+
+# JPEG markers that carry only metadata (EXIF, XMP, IPTC, comments, ...)
+# APP0 (JFIF) and APP14 (Adobe color transform) affect decoding and are kept,
+# and so are APP2 segments holding the ICC profile (ICC_MARKER)
+METADATA_MARKERS = set(range(0xE1, 0xEE)) | {0xEF, 0xFE}
+ICC_MARKER = (0xE2, b"ICC_PROFILE\0")
+
+def estimate_jpeg_quality(img):
+    """Estimate the libjpeg quality setting from the luminance quantization table"""
+    qtables = getattr(img, 'quantization', None)
+    if not qtables or 0 not in qtables:
+        return None
+
+    # Sum ratio is independent of zigzag/natural table ordering
+    scale = sum(qtables[0]) * 100 / sum(STD_LUMINANCE_QTABLE)
+    if scale <= 100:
+        quality = (200 - scale) / 2
+    else:
+        quality = 5000 / scale
+
+    return max(1, min(100, round(quality)))
+
+def strip_jpeg_metadata(data):
+    """Return JPEG bytes without metadata segments (entropy-coded data untouched)"""
+    if data[:2] != b'\xff\xd8':
+        return bytes(data)
+
+    out = bytearray(data[:2])
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return bytes(data)  # Corrupt marker stream, keep original
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1  # Fill byte
+            continue
+        if marker == 0xDA:
+            # Start of scan - everything after is image data
+            out += data[pos:]
+            return bytes(out)
+
+        length = int.from_bytes(data[pos + 2:pos + 4], 'big')
+        segment_end = pos + 2 + length
+        is_icc = (marker, bytes(data[pos + 4:pos + 4 + len(ICC_MARKER[1])])) == ICC_MARKER
+        if marker not in METADATA_MARKERS or is_icc:
+            out += data[pos:segment_end]
+        pos = segment_end
+
+    return bytes(data)
+
+def can_passthrough(img):
+    """Check if a decoded source can be kept without re-encoding"""
+    if img.format != 'JPEG' or img.mode not in ('RGB', 'L'):
+        return False
+
+    width, height = img.size
+    if width > MAX_SIZE[0] or height > MAX_SIZE[1]:
+        return False
+
+    # Re-encoding at JPEG_QUALITY only shrinks sources stored at a higher quality
+    quality = estimate_jpeg_quality(img)
+    return quality is not None and quality <= JPEG_QUALITY
+
+def _luma(img):
+    """Grayscale pixels as a float array"""
+    return np.asarray(img.convert('L'), dtype=np.float64)
+
+def _window_mean(a, size=SSIM_WINDOW):
+    """Mean over every size x size window (integral image, no Python loops)"""
+    size = min(size, *a.shape)
+    s = np.pad(a, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    return (s[size:, size:] - s[:-size, size:] - s[size:, :-size] + s[:-size, :-size]) / (size * size)
+
+def ssim(reference, candidate):
+    """Mean structural similarity of two same-sized images (luma only)"""
+    x = _luma(reference)
+    y = _luma(candidate)
+
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+
+    mu_x = _window_mean(x)
+    mu_y = _window_mean(y)
+    var_x = _window_mean(x * x) - mu_x ** 2
+    var_y = _window_mean(y * y) - mu_y ** 2
+    cov_xy = _window_mean(x * y) - mu_x * mu_y
+
+    ssim_map = ((2 * mu_x * mu_y + c1) * (2 * cov_xy + c2)) / (
+        (mu_x ** 2 + mu_y ** 2 + c1) * (var_x + var_y + c2)
+    )
+    return float(ssim_map.mean())
+
+def _encode(img, fmt, quality, icc_profile=None):
+    """Encode an RGB image at a given quality (embedding icc_profile, if any)"""
+    buffer = BytesIO()
+    extra = {"icc_profile": icc_profile} if icc_profile else {}
+    if fmt == "webp":
+        img.save(buffer, 'WEBP', quality=quality, method=4, **extra)
+    else:
+        img.save(buffer, 'JPEG', quality=quality, optimize=True, **extra)
+    return buffer.getvalue()
+
+def search_quality(img, fmt="jpeg", target_ssim=TARGET_SSIM, icc_profile=None):
+    """
+    Binary-search the lowest quality that reaches target_ssim
+
+    Returns (encoded_bytes, quality). Falls back to the top of QUALITY_RANGE
+    when no quality reaches the target.
+    """
+    lo, hi = QUALITY_RANGE
+    best_quality = hi
+    best = None
+
+    while lo <= hi:
+        quality = (lo + hi) // 2
+        data = _encode(img, fmt, quality, icc_profile)
+        score = ssim(img, Image.open(BytesIO(data)))
+        if score >= target_ssim:
+            best, best_quality = data, quality
+            hi = quality - 1
+        else:
+            lo = quality + 1
+
+    if best is None:
+        best = _encode(img, fmt, best_quality, icc_profile)
+    return best, best_quality
+
+def page_stats(img):
+    """
+    Vectorized pixel statistics used to classify a page
+
+    std: luma standard deviation
+    edge_density: fraction of pixels on a luma edge
+    near_white: fraction of paper-white pixels
+    colorfulness: mean (max - min) channel spread
+    halves: (near_white, colorfulness) for the left/right half of a spread
+    fingerprint: 64-bit difference hash, equal for repeated pages
+    """
+    small = img.convert('RGB')
+    small.thumbnail(STATS_SIZE)
+    rgb = np.asarray(small, dtype=np.float32)
+
+    luma = rgb @ LUMA_WEIGHTS
+    gradient = np.abs(np.diff(luma, axis=1))[:-1, :] + np.abs(np.diff(luma, axis=0))[:, :-1]
+    white = luma >= NEAR_WHITE
+    color = rgb.max(axis=2) - rgb.min(axis=2)
+
+    middle = luma.shape[1] // 2
+    halves = [
+        (float(white[:, side].mean()), float(color[:, side].mean()))
+        for side in (slice(None, middle), slice(middle, None))
+    ]
+
+    tiny = np.asarray(small.convert('L').resize((9, 8)), dtype=np.int16)
+    bits = (tiny[:, 1:] > tiny[:, :-1]).flatten()
+    fingerprint = int(np.packbits(bits).view('>u8')[0])
+
+    return {
+        "std": float(luma.std()),
+        "edge_density": float((gradient > EDGE_THRESHOLD).mean()),
+        "near_white": float(white.mean()),
+        "colorfulness": float(color.mean()),
+        "halves": halves,
+        "fingerprint": fingerprint,
+    }
+
+def classify_page(stats, position, total, name=""):
+    """
+    Classify a page as "page", "blank", "credits" or "back-cover"
+
+    position is 0-indexed within the book; name is the scraped image name
+    ("cover" for cover images). Returns (kind, reason) - reason says which
+    statistics made it a drop ("" for pages).
+
+    Low detail alone doesn't drop the last page ("The End" over a simple
+    drawing is story content): a back cover also needs a near-uniform colored
+    (not paper) background, and back-matter credits need a page full of text.
+    """
+    if position == 0:
+        return "page", ""  # Front cover doubles as the thumbnail
+
+    if stats["std"] < BLANK_MAX_STD and stats["edge_density"] < BLANK_MAX_EDGES:
+        return "blank", f"luma std {stats['std']:.1f}, edges {stats['edge_density']:.3f}"
+
+    if position == total - 1:
+        if name == "cover":
+            return "back-cover", "named cover"
+        if (stats["edge_density"] < BACK_COVER_MAX_EDGES and stats["std"] < BACK_COVER_MAX_STD
+                and stats["near_white"] < BACK_COVER_MAX_WHITE):
+            return "back-cover", f"edges {stats['edge_density']:.3f}, luma std {stats['std']:.1f}"
+
+    # Plain text on white: the whole page, or one half of the credits spread
+    # in the front matter (story spreads at the back often have a white half)
+    regions = []
+    min_white = CREDITS_MIN_WHITE
+    if position < FRONT_MATTER_PAGES:
+        regions = [(stats["near_white"], stats["colorfulness"])] + stats["halves"]
+    elif position >= total - BACK_MATTER_PAGES and stats["edge_density"] >= BACK_CREDITS_MIN_EDGES:
+        regions = [(stats["near_white"], stats["colorfulness"])]
+        min_white = BACK_CREDITS_MIN_WHITE
+    for white, color in regions:
+        if white >= min_white and color <= CREDITS_MAX_COLOR:
+            return "credits", f"{white:.0%} white, colorfulness {color:.1f}"
+
+    return "page", ""
+
+def matches_front_cover(fingerprints, total):
+    """True when the last page repeats the front cover (dHash within COVER_MATCH_MAX_BITS)"""
+    first, last = fingerprints.get(0), fingerprints.get(total - 1)
+    if first is None or last is None or total < 2:
+        return False
+    return bin(first ^ last).count("1") <= COVER_MATCH_MAX_BITS
+
+def find_endpapers(fingerprints, total):
+    """
+    Positions of endpapers: identical pages repeated in the front and back matter
+
+    fingerprints: {position: fingerprint} for the pages of one book
+
+    The cover (position 0) is never an endpaper, even when it's repeated as
+    the back cover. A repeat only counts when it has a copy at each end of
+    the book; each end's matter is at most a quarter of the book, so short
+    books never lose content pages to a fingerprint collision.
+    """
+    matter = min(FRONT_MATTER_PAGES, total // 4)
+    positions_by_print = {}
+    for position, fingerprint in fingerprints.items():
+        if position > 0:
+            positions_by_print.setdefault(fingerprint, []).append(position)
+
+    endpapers = set()
+    for positions in positions_by_print.values():
+        front = [p for p in positions if p < matter]
+        back = [p for p in positions if p >= total - matter]
+        if front and back and len(front) + len(back) == len(positions):
+            endpapers.update(positions)
+    return endpapers
+
+def encode_page(data, page=None, **options):
+    """
+    Turn downloaded source bytes into the page rendition we store
+
+    page: optional {"position", "total", "name"} - classifies the page and,
+    with drop_pages, skips encoding blank/credits/back-cover pages
+
+    Returns a dict with the encoded bytes plus sizes for reporting:
+    data, ext, quality, passthrough, source_size, baseline_size, kind, reason, fingerprint
+    (baseline_size = what the fixed JPEG quality 85 encode costs, measured for
+    every kept page, passthrough included; data is None for dropped pages)
+    """
+    return encode_image(Image.open(BytesIO(data)), data, page, **options)
+
+def encode_image(img, source=None, page=None, passthrough=True, mode="fixed", fmt="jpeg",
+                 target_ssim=TARGET_SSIM, drop_pages=True):
+    """
+    encode_page() for an already decoded image (e.g. a rasterized PDF page)
+
+    source: the original encoded bytes, if any - needed for passthrough
+    """
+    source_size = len(source) if source is not None else 0
+
+    kind, reason, fingerprint = "page", "", None
+    if page is not None:
+        stats = page_stats(img)
+        kind, reason = classify_page(stats, page["position"], page["total"], page.get("name", ""))
+        fingerprint = stats["fingerprint"]
+
+    if drop_pages and kind != "page":
+        return {
+            "data": None,
+            "ext": None,
+            "quality": None,
+            "passthrough": False,
+            "source_size": source_size,
+            "baseline_size": 0,
+            "kind": kind,
+            "reason": reason,
+            "fingerprint": fingerprint,
+        }
+
+    # Keep an RGB source's color profile, like passthrough does (a CMYK or
+    # grayscale profile no longer fits once converted to RGB)
+    icc_profile = img.info.get("icc_profile") if img.mode == "RGB" else None
+
+    # Adaptive mode may still beat the source quality, so it always re-encodes
+    if source is not None and passthrough and mode == "fixed" and fmt == "jpeg" and can_passthrough(img):
+        output = strip_jpeg_metadata(source)
+        # Passthrough sources already fit MAX_SIZE, so this is the fixed encode
+        baseline = _encode(img.convert('RGB'), "jpeg", JPEG_QUALITY, icc_profile)
+        return {
+            "data": output,
+            "ext": "jpg",
+            "quality": estimate_jpeg_quality(img),
+            "passthrough": True,
+            "source_size": source_size,
+            "baseline_size": len(baseline),
+            "kind": kind,
+            "reason": reason,
+            "fingerprint": fingerprint,
+        }
+
+    # Resize to max 1200x800 while maintaining aspect ratio
+    img.thumbnail(MAX_SIZE, Image.Resampling.LANCZOS)
+    img = img.convert('RGB')
+
+    baseline = _encode(img, "jpeg", JPEG_QUALITY, icc_profile)
+    if mode == "adaptive":
+        output, quality = search_quality(img, fmt, target_ssim, icc_profile)
+        if len(output) > len(baseline):
+            # Never ship more bytes than the fixed encode
+            output, quality, fmt = baseline, JPEG_QUALITY, "jpeg"
+    elif fmt == "jpeg":
+        output, quality = baseline, JPEG_QUALITY
+    else:
+        output, quality = _encode(img, fmt, JPEG_QUALITY, icc_profile), JPEG_QUALITY
+
+    return {
+        "data": output,
+        "ext": FORMAT_EXTENSIONS[fmt],
+        "quality": quality,
+        "passthrough": False,
+        "source_size": source_size,
+        "baseline_size": len(baseline),
+        "kind": kind,
+        "reason": reason,
+        "fingerprint": fingerprint,
+    }
+
+def encode_page_from_slot(spec, slot, length, page=None, **options):
+    """
+    encode_page() for a source sitting in a SharedMemoryRing slot
+
+    The encoded page is written back into the same slot and reported as
+    result["shm_length"] (with result["data"] None) unless it doesn't fit.
+    """
+    view = slot_view(spec, slot, length)
+    try:
+        result = encode_page(view, page, **options)
+    finally:
+        view.release()
+
+    if result["data"] is not None and write_slot(spec, slot, result["data"]):
+        result["shm_length"] = len(result["data"])
+        result["data"] = None
+    return result
+
+def submit_encode(pool, data, page=None, ring=None, **options):
+    """
+    Queue a page on the encoder pool
+
+    With a ring, the source goes through a shared-memory slot (blocking until
+    one is free) and the returned future resolves once the output has been
+    copied back out and the slot released. Without a ring, or for sources
+    larger than a slot, the bytes are pickled as usual.
+    """
+    if ring is None or not ring.fits(data):
+        return pool.submit(encode_page, data, page, **options)
+
+    slot = ring.acquire()
+    ring.write(slot, data)
+    future = pool.submit(encode_page_from_slot, ring.spec, slot, len(data), page, **options)
+
+    # Callers get a proxy so they never see a result before its bytes are copied out
+    proxy = Future()
+
+    def collect(done):
+        try:
+            result = done.result()
+            if "shm_length" in result:
+                result["data"] = ring.read(slot, result.pop("shm_length"))
+        except Exception as e:
+            ring.release(slot)
+            proxy.set_exception(e)
+            return
+        ring.release(slot)
+        proxy.set_result(result)
+
+    future.add_done_callback(collect)
+    return proxy
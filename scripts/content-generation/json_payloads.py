@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Minified, pre-compressed JSON payloads for S3
+
+Story JSONs stay pretty-printed on disk; what goes to S3 is minified and
+compressed once at upload time instead of on every fetch: {key} is gzip
+with Content-Encoding: gzip and Content-Type application/json, so the
+stories Lambda, CloudFront and browsers all decode it transparently.
+
+No brotli variant: nothing reads a separate {key}.br object (S3 and
+CloudFront don't pick a key by Accept-Encoding), so it would only cost
+storage and PUTs.
+"""
+
+import gzip
+import json
+
+JSON_CONTENT_TYPE = "application/json"
+
+def minify(obj):
+    """Compact UTF-8 JSON bytes"""
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def gzip_bytes(data):
+    # mtime=0 keeps the output (and so the S3 ETag) stable across runs
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def json_variants(obj, key):
+    """
+    [(key, data, extra_args), ...] for every compressed variant of obj (gzip)
+
+    Also returns the minified size, for reporting.
+    """
+    data = minify(obj)
+    return [(key, gzip_bytes(data), {"ContentEncoding": "gzip"})], len(data)
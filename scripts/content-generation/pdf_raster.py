@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+PDF page rasterization for books without a page images folder
+
+Pages are rendered with pdfium straight at the size encode_page() would
+resize to (max 1200x800), then go through the same encode_image() path as
+downloaded images - classification, adaptive quality, WebP and all.
+
+rasterize_page() runs in the encoder ProcessPoolExecutor; workers open the
+PDF from a local path so only the page index is pickled in.
+"""
+
+from image_pipeline import MAX_SIZE, encode_image
+
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
+PDFIUM_INSTALL_HINT = "pypdfium2 not installed. Install with: pip install pypdfium2"
+
+def _require_pdfium():
+    """Fail at the first PDF call, not at import (most books never need one)"""
+    if not PDFIUM_AVAILABLE:
+        raise ImportError(PDFIUM_INSTALL_HINT)
+
+def page_count(pdf_path):
+    """Number of pages in a local PDF"""
+    _require_pdfium()
+    pdf = pdfium.PdfDocument(str(pdf_path))
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+def render_page(pdf_path, index, size=MAX_SIZE):
+    """Render one page so it exactly fits size (aspect ratio kept)"""
+    _require_pdfium()
+    pdf = pdfium.PdfDocument(str(pdf_path))
+    try:
+        page = pdf[index]
+        width, height = page.get_size()  # PDF points, 72 per inch = scale 1
+        scale = min(size[0] / width, size[1] / height)
+        return page.render(scale=scale).to_pil()
+    finally:
+        pdf.close()
+
+def rasterize_page(pdf_path, index, page=None, **options):
+    """Render one PDF page and encode it like a downloaded page image"""
+    return encode_image(render_page(pdf_path, index), page=page, **options)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Parallel S3 uploads with one shared, tuned client
+
+boto3 clients are thread-safe, so every upload thread shares one client
+whose connection pool is sized to the thread count. Large files switch to
+multipart uploads via TransferConfig.
+
+Sync helpers compare local files against a bucket listing by size and
+ETag (MD5, or the multipart ETag for files above the multipart threshold)
+so unchanged files can be skipped. Buckets using SSE-KMS don't expose MD5
+ETags - every file looks changed there.
+
+Set S3_ENDPOINT_URL (or pass endpoint_url) to run against a local S3
+stand-in such as MinIO or `moto_server`:
+    S3_ENDPOINT_URL=http://localhost:9000 python3 upload-to-s3.py
+"""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+
+UPLOAD_WORKERS = 32
+S3_ENDPOINT_URL = os.environ.get("S3_ENDPOINT_URL")
+
+MB = 1024 * 1024
+
+# For content-addressed keys: the bytes behind a key never change
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Pages and story JSONs are single PUTs; PDFs/archives go multipart
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=16 * MB,
+    multipart_chunksize=16 * MB,
+    max_concurrency=4,
+)
+
+def make_s3_client(max_connections=UPLOAD_WORKERS, endpoint_url=S3_ENDPOINT_URL):
+    """S3 client with a connection pool large enough for all upload threads"""
+    config = Config(
+        # Each thread may run a multipart upload with its own part threads
+        max_pool_connections=max_connections * TRANSFER_CONFIG.max_request_concurrency,
+        retries={"max_attempts": 10, "mode": "adaptive"},
+        tcp_keepalive=True,
+    )
+    return boto3.client("s3", endpoint_url=endpoint_url, config=config)
+
+class ParallelUploader:
+    """
+    Thread-pool uploader sharing one S3 client
+
+    submit()/submit_bytes() return a Future resolving to the uploaded key, or
+    raising the upload error. With max_pending, submitting blocks while that
+    many uploads are queued or running, so producers (e.g. an encoder) can't
+    pile up unbounded bytes in memory.
+    """
+
+    def __init__(self, bucket, client=None, workers=UPLOAD_WORKERS, endpoint_url=S3_ENDPOINT_URL,
+                 max_pending=None):
+        self.bucket = bucket
+        self.client = client or make_s3_client(workers, endpoint_url)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="s3-upload")
+        self._pending = threading.BoundedSemaphore(max_pending) if max_pending else None
+
+    def _upload(self, local_path, key, extra_args):
+        self.client.upload_file(
+            str(local_path),
+            self.bucket,
+            key,
+            ExtraArgs=extra_args,
+            Config=TRANSFER_CONFIG,
+        )
+        return key
+
+    def _upload_bytes(self, data, key, extra_args):
+        self.client.upload_fileobj(
+            BytesIO(data),
+            self.bucket,
+            key,
+            ExtraArgs=extra_args,
+            Config=TRANSFER_CONFIG,
+        )
+        return key
+
+    def _submit(self, fn, *args):
+        if self._pending is None:
+            return self._pool.submit(fn, *args)
+
+        self._pending.acquire()
+        future = self._pool.submit(fn, *args)
+        future.add_done_callback(lambda _: self._pending.release())
+        return future
+
+    def submit(self, local_path, key, content_type, extra_args=None):
+        """Queue one file upload"""
+        args = {"ContentType": content_type, **(extra_args or {})}
+        return self._submit(self._upload, local_path, key, args)
+
+    def submit_bytes(self, data, key, content_type, extra_args=None):
+        """Queue an in-memory upload (multipart above the threshold, like files)"""
+        args = {"ContentType": content_type, **(extra_args or {})}
+        return self._submit(self._upload_bytes, data, key, args)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+def list_remote_objects(client, bucket, prefixes):
+    """{key: (etag, size)} for every object under the given prefixes"""
+    objects = {}
+    paginator = client.get_paginator("list_objects_v2")
+    for prefix in prefixes:
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                objects[obj["Key"]] = (obj["ETag"].strip('"'), obj["Size"])
+    return objects
+
+def source_size(source):
+    """Size of a local path or in-memory bytes"""
+    return len(source) if isinstance(source, bytes) else os.path.getsize(source)
+
+def _etag(f, size):
+    if size < TRANSFER_CONFIG.multipart_threshold:
+        return hashlib.md5(f.read()).hexdigest()
+
+    part_digests = []
+    while chunk := f.read(TRANSFER_CONFIG.multipart_chunksize):
+        part_digests.append(hashlib.md5(chunk).digest())
+
+    return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+
+def local_etag(source):
+    """The ETag S3 will report for a path or bytes uploaded with TRANSFER_CONFIG"""
+    if isinstance(source, bytes):
+        return _etag(BytesIO(source), len(source))
+    with open(source, "rb") as f:
+        return _etag(f, os.path.getsize(source))
+
+def local_etags(sources, workers=UPLOAD_WORKERS):
+    """{source: etag} computed in parallel (hashlib releases the GIL)"""
+    sources = list(sources)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(sources, pool.map(local_etag, sources)))
+
+def is_unchanged(source, etag, remote):
+    """True if remote ((etag, size) or None) already holds this path or bytes"""
+    return remote is not None and remote == (etag, source_size(source))
+
+def delete_keys(client, bucket, keys):
+    """Delete keys in DeleteObjects batches (max 1000 per request)"""
+    keys = sorted(keys)
+    deleted = 0
+    for i in range(0, len(keys), 1000):
+        batch = [{"Key": key} for key in keys[i:i + 1000]]
+        response = client.delete_objects(Bucket=bucket, Delete={"Objects": batch, "Quiet": True})
+        errors = response.get("Errors", [])
+        for error in errors:
+            print(f"    ❌ Delete failed: {error['Key']}: {error.get('Message')}")
+        deleted += len(batch) - len(errors)
+    return deleted
+
+def content_hash(path, length=12):
+    """Short SHA-256 of a file's bytes, for content-addressed keys"""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:length]
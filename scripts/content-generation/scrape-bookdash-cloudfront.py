@@ -2,20 +2,39 @@
 """
 Scrape Book Dash stories directly from CloudFront
 Extract text from PDF, download images, upload to S3
+
+Three stages overlap during a scrape:
+1. Download: main thread fetches pages one after another
+2. Encode: image_pipeline workers (process pool, shared-memory handoff)
+3. Upload: s3_uploader threads PUT each page as soon as it is encoded;
+   the source PDF is uploaded too (multipart when large)
+
+Encoded pages are handed back to the main thread through a queue and
+submitted from there: the uploader blocks callers when it is full, which
+must never stall the pool's result-handling thread.
+
+A book's JSON is written once all of its uploads settle, while the next
+books are already downloading.
 """
 
 import asyncio
 import json
+import os
+import queue
 import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
 from playwright.async_api import async_playwright
 import requests
-from PIL import Image
 from io import BytesIO
-import boto3
 import PyPDF2
 import re
 
+from image_pipeline import submit_encode
+from s3_uploader import ParallelUploader, UPLOAD_WORKERS
+from shm_ring import SharedMemoryRing
+
 BOOKDASH_URL = "https://bookdash.org/book-source-files/"
 CLOUDFRONT_BASE = "https://d3qawc7yl9x4zs.cloudfront.net"
 OUTPUT_DIR = Path(__file__).parent / "content" / "bookdash"
@@ -24,14 +43,29 @@ OUTPUT_DIR = Path(__file__).parent / "content" / "bookdash"
 S3_BUCKET = "twinklepod-stories-beta"
 S3_PREFIX = "images"
 CLOUDFRONT_URL = "https://d1234567890.cloudfront.net"  # Replace with your CloudFront URL
+SOURCE_PREFIX = "sources"
+
+# image_pipeline result["ext"] -> S3 Content-Type
+PAGE_CONTENT_TYPES = {"jpg": "image/jpeg", "webp": "image/webp"}
 
-s3_client = boto3.client('s3')
+ENCODE_WORKERS = os.cpu_count()
+# Books whose uploads may still be in flight while the next one downloads
+MAX_PENDING_BOOKS = 2
 
-def extract_text_from_pdf(pdf_url):
-    """Download and extract text from PDF"""
+def download_pdf(pdf_url):
+    """Download the book PDF (bytes, or None)"""
     try:
-        response = requests.get(pdf_url, timeout=10)
-        pdf_file = BytesIO(response.content)
+        response = requests.get(pdf_url, timeout=60)
+        response.raise_for_status()
+        return response.content
+    except Exception as e:
+        print(f"      ⚠️  PDF download failed: {e}")
+        return None
+
+def extract_text_from_pdf(pdf_bytes):
+    """Extract story text from PDF"""
+    try:
+        pdf_file = BytesIO(pdf_bytes)
         reader = PyPDF2.PdfReader(pdf_file)
         
         story_pages = []
@@ -59,30 +93,53 @@ def extract_text_from_pdf(pdf_url):
         print(f"      ⚠️  PDF extraction failed: {e}")
         return []
 
-def upload_to_s3(img, story_id, page_num):
-    """Optimize and upload image to S3"""
-    try:
-        # Optimize image
-        img.thumbnail((1200, 800), Image.Resampling.LANCZOS)
-        
-        # Convert to bytes
-        buffer = BytesIO()
-        img.convert('RGB').save(buffer, 'JPEG', quality=85, optimize=True)
-        buffer.seek(0)
+def upload_when_encoded(encoded, key_stem, ready):
+    """
+    Put the page on the ready queue as soon as the encoder finishes
+
+    The callback runs on the pool's management thread, so it only enqueues;
+    submit_ready() does the (possibly blocking) upload submit. Returns a
+    Future resolving to the CloudFront URL (or the encode/upload error).
+    """
+    uploaded = Future()
+    encoded.add_done_callback(lambda encode: ready.put((encode, key_stem, uploaded)))
+    return uploaded
+
+def submit_ready(ready, uploader, until=None):
+    """
+    Submit uploads for encoded pages on the ready queue (main thread only)
+
+    Drains what is queued and returns; with until, keeps draining until that
+    page's upload Future is done.
+    """
+    while True:
+        if until is not None and until.done():
+            until = None
+        try:
+            if until is None:
+                encode, key_stem, uploaded = ready.get_nowait()
+            else:
+                encode, key_stem, uploaded = ready.get(timeout=0.1)
+        except queue.Empty:
+            if until is None:
+                return
+            continue
+        try:
+            result = encode.result()
+            s3_key = f"{key_stem}.{result['ext']}"
+            upload = uploader.submit_bytes(result["data"], s3_key, PAGE_CONTENT_TYPES[result["ext"]])
+        except Exception as e:
+            uploaded.set_exception(e)
+            continue
         
-        # Upload to S3
-        s3_key = f"{S3_PREFIX}/{story_id}/page-{page_num}.jpg"
-        s3_client.put_object(
-            Bucket=S3_BUCKET,
-            Key=s3_key,
-            Body=buffer,
-            ContentType='image/jpeg'
-        )
+        def on_uploaded(upload, uploaded=uploaded, s3_key=s3_key):
+            try:
+                upload.result()
+                uploaded.set_result(f"{CLOUDFRONT_URL}/{s3_key}")
+            except Exception as e:
+                uploaded.set_exception(e)
         
-        return f"{CLOUDFRONT_URL}/{s3_key}"
-    except Exception as e:
-        print(f"      ⚠️  S3 upload failed: {e}")
-        return None
+        upload.add_done_callback(on_uploaded)
 
 async def get_books(page):
     """Get all book slugs from Book Dash"""
@@ -126,8 +183,13 @@ def find_page_count(slug):
             return page_num - 1
     return 50
 
-def convert_book(book):
-    """Convert a Book Dash book to TwinklePod format"""
+def convert_book(book, pool, ring, uploader, ready):
+    """
+    Start converting a Book Dash book to TwinklePod format
+
+    Downloads pages and hands them to the encode/upload stages without
+    waiting. Returns a pending book for finish_book(), or None.
+    """
     slug = book['slug']
     title = book['title']
     
@@ -137,7 +199,8 @@ def convert_book(book):
     # Extract text from PDF
     pdf_url = f"{CLOUDFRONT_BASE}/{slug}/ebook/en_english/{slug}_en.pdf"
     print(f"  📄 Extracting text from PDF...")
-    story_pages = extract_text_from_pdf(pdf_url)
+    pdf_bytes = download_pdf(pdf_url)
+    story_pages = extract_text_from_pdf(pdf_bytes) if pdf_bytes else []
     
     if not story_pages:
         print(f"  ❌ No text extracted")
@@ -146,27 +209,61 @@ def convert_book(book):
     print(f"  📖 Extracted {len(story_pages)} story pages")
     
     story_id = str(uuid.uuid4())
-    pages = []
     
-    # Process each story page
+    # Keep the source PDF next to the pages (multipart upload when large)
+    source_key = f"{SOURCE_PREFIX}/{story_id}/{slug}_en.pdf"
+    source_upload = uploader.submit_bytes(pdf_bytes, source_key, 'application/pdf')
+    
+    # Download each story page; encode + upload continue in the background
+    page_uploads = []
+    print(f"  📥 Downloading {len(story_pages)} images...", end="", flush=True)
     for page_num, text in enumerate(story_pages, 1):
         # Image numbering starts from page05 (after metadata pages)
         image_page_num = page_num + 4
         image_url = f"{CLOUDFRONT_BASE}/{slug}/ebook/en_english/images/{slug}_en_page{image_page_num:02d}.jpg"
         
-        print(f"    Page {page_num}: Download image...")
-        
         # Download image
         try:
             response = requests.get(image_url, timeout=10)
-            img = Image.open(BytesIO(response.content))
+            response.raise_for_status()
         except Exception as e:
-            print(f"      ⚠️  Download failed: {e}")
+            print(f"\n      ⚠️  Page {page_num} download failed: {e}")
             continue
         
-        # Upload to our S3
-        s3_url = upload_to_s3(img, story_id, page_num)
-        if not s3_url:
+        encoded = submit_encode(pool, response.content, ring=ring)
+        key_stem = f"{S3_PREFIX}/{story_id}/page-{page_num}"
+        page_uploads.append((page_num, text, upload_when_encoded(encoded, key_stem, ready)))
+        submit_ready(ready, uploader)
+        print(".", end="", flush=True)
+    
+    print()  # New line after dots
+    
+    return {
+        "slug": slug,
+        "title": title,
+        "story_id": story_id,
+        "source_upload": source_upload,
+        "page_uploads": page_uploads,
+    }
+
+def is_settled(pending):
+    """True once every upload of a pending book has finished"""
+    futures = [f for _, _, f in pending["page_uploads"]] + [pending["source_upload"]]
+    return all(f.done() for f in futures)
+
+def finish_book(pending, ready, uploader):
+    """Wait for a book's uploads and write its story JSON"""
+    slug = pending["slug"]
+    title = pending["title"]
+    story_id = pending["story_id"]
+    
+    pages = []
+    for page_num, text, upload in pending["page_uploads"]:
+        submit_ready(ready, uploader, until=upload)
+        try:
+            s3_url = upload.result()
+        except Exception as e:
+            print(f"  ⚠️  {title} page {page_num}: S3 upload failed: {e}")
             continue
         
         pages.append({
@@ -174,6 +271,13 @@ def convert_book(book):
             "image": s3_url
         })
     
+    try:
+        pending["source_upload"].result()
+    except Exception as e:
+        print(f"  ⚠️  {title}: source PDF upload failed: {e}")
+    
+    page_count = len(pages)
+    
     # Create story JSON
     story = {
         "story_id": story_id,
@@ -194,7 +298,7 @@ def convert_book(book):
     with open(json_path, 'w') as f:
         json.dump(story, f, indent=2)
     
-    print(f"  ✅ Saved: {json_path.name}\n")
+    print(f"  ✅ Saved: {title} → {json_path.name} ({page_count} pages)")
     return story
 
 async def main():
@@ -213,12 +317,28 @@ async def main():
     # Convert each book
     LIMIT = 100
     converted = 0
+    pending_books = deque()
+    ready = queue.Queue()  # Encoded pages waiting for an upload submit
     
-    for i, book in enumerate(books[:LIMIT], 1):
-        print(f"[{i}/{min(LIMIT, len(books))}]")
-        story = convert_book(book)
-        if story:
-            converted += 1
+    with SharedMemoryRing(slots=2 * ENCODE_WORKERS) as ring, \
+            ProcessPoolExecutor(max_workers=ENCODE_WORKERS) as pool, \
+            ParallelUploader(S3_BUCKET, max_pending=4 * UPLOAD_WORKERS) as uploader:
+        for i, book in enumerate(books[:LIMIT], 1):
+            print(f"[{i}/{min(LIMIT, len(books))}]")
+            pending = convert_book(book, pool, ring, uploader, ready)
+            if pending:
+                pending_books.append(pending)
+            
+            # Write JSONs for books whose uploads are done; cap how many lag behind
+            submit_ready(ready, uploader)
+            while pending_books and (is_settled(pending_books[0]) or len(pending_books) > MAX_PENDING_BOOKS):
+                if finish_book(pending_books.popleft(), ready, uploader):
+                    converted += 1
+            print()
+        
+        while pending_books:
+            if finish_book(pending_books.popleft(), ready, uploader):
+                converted += 1
     
     print(f"\n✅ Converted {converted}/{min(LIMIT, len(books))} stories")
     print(f"📁 Output: {OUTPUT_DIR}")
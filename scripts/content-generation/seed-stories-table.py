@@ -3,16 +3,79 @@
 Seed DynamoDB stories table with denormalized records for efficient querying.
 Creates multiple records per story:
 - Main record: PK = story_id
-- Category records: PK = CATEGORY#{category}
-- Age record: PK = AGE#{age_range}
-- Published record: PK = PUBLISHED#{published}
+- List records, one per facet combination (see story_facets.py):
+  PK = CATEGORY#{category}, AGE#{age_range}, PUBLISHED#{published},
+  CATEGORY#{category}#AGE#{age_range}, ...
+
+Records are written by a multi-threaded bulk loader (see ddb_loader.py):
+    python3 seed-stories-table.py --workers 16 --target-wcu 200
+    python3 seed-stories-table.py --table stories --endpoint-url http://localhost:8000
+
+The seed file is streamed (see seed_stream.py): records are generated and
+written a few batches at a time, so memory stays flat however big the seed.
+Defaults to dynamodb-seed-stories.ndjson(.gz), falling back to the old .json:
+    python3 seed-stories-table.py --seed-file dynamodb-seed-stories.ndjson.gz
+
+--export-dir writes the records as a DynamoDB import-from-S3 export instead
+(see ddb_export.py) - a new table loads it without consuming any WCU:
+    python3 seed-stories-table.py --export-dir content/ddb-export
+    python3 validate-ddb-export.py content/ddb-export
+
+--generation writes a complete new catalog generation next to the live one
+(see catalog_generations.py), checks every partition's count and only then
+flips the CATALOG#current pointer; old generations past --keep are deleted:
+    python3 seed-stories-table.py --generation
+    python3 seed-stories-table.py --rollback        # back to the previous generation
+    python3 seed-stories-table.py --gc              # just delete stale generations
+Once a table has a generation, plain and --reconcile runs refuse to write.
+
+--reconcile reads what's already in the table and writes only the difference:
+puts for new or changed records, deletes for rows the seed no longer produces
+(e.g. CATEGORY# rows after a story is re-categorized). It holds the
+desired record set in memory to diff against:
+    python3 seed-stories-table.py --reconcile --dry-run
+
+Which attributes each record type carries is set by PROJECTIONS; every run
+prints the resulting item sizes, WCU per story and RCU per list page:
+    python3 seed-stories-table.py --projections projections.json --dry-run
+
+--facets picks the facet combinations that get list partitions:
+    python3 seed-stories-table.py --facets category,age,published,category+age
+
+Published rows are sharded over PUBLISHED#true#0..N-1 (--published-shards);
+story_feed.py reads them back as one newest-first feed.
+
+--published-index drops the PUBLISHED# rows: published main records carry
+feed_pk/published_at instead and the feed is read from the sparse
+published-index GSI (see story_facets.py) - one write less per story.
+--reconcile deletes the PUBLISHED# rows an earlier seed left behind; run it
+only once the API reads the index (rollout order in story_facets.py):
+    python3 seed-stories-table.py --published-index
+    python3 seed-stories-table.py --published-index --reconcile
 """
 
+import argparse
+import heapq
 import json
+from collections import Counter
 import boto3
 import sys
 from datetime import datetime
 
+from story_facets import (
+    FACET_COMBOS, PUBLISHED_SHARDS, facet_partitions, feed_index_attributes, parse_combos, record_type,
+    sharded_partitions, without_published_rows,
+)
+from catalog_generations import (
+    KEEP_GENERATIONS, collect_garbage, flip_pointer, list_generations, new_generation_id,
+    read_pointer, stale_generations, start_generation, verify_counts, versioned,
+)
+from ddb_export import ExportWriter
+from seed_stream import default_seed_file, is_ndjson, read_seed
+from ddb_loader import (
+    DYNAMODB_ENDPOINT_URL, LOAD_WORKERS, BulkLoader, item_size, normalize, read_units, write_units,
+)
+
 def get_table_name():
     """Get the stories table name from CloudFormation outputs"""
     cf = boto3.client('cloudformation', region_name='us-east-1')
@@ -27,124 +90,377 @@ def get_table_name():
         print("Using fallback table name pattern...")
         return None
 
-def create_denormalized_records(story):
-    """Create all denormalized records for a story"""
-    records = []
+# Attributes each record type carries besides pk/sk (None = the whole story).
+# List rows only need what the story grid renders; the reader gets the rest
+# from the main record. 'list' applies to every facet record type without
+# its own entry ('category', 'age', 'category_age', ...).
+# Override with --projections projections.json.
+PROJECTIONS = {
+    'main': None,
+    'list': ['story_id', 'title', 'thumbnail_url', 'age_range', 'categories', 'duration_minutes'],
+}
+
+STORY_FIELDS = [
+    'story_id', 'title', 'age_range', 'categories', 'tags', 's3_key',
+    'thumbnail_url', 'duration_minutes', 'published', 'created_at',
+]
+# Set by upload-to-s3.py --bundles / --chunked (stories.get reads chunks)
+OPTIONAL_FIELDS = ['bundle_url', 'bundle_index_url', 'chunks']
+
+LIST_PAGE_SIZE = 20  # stories.list default limit
+
+def load_projections(path, combos=FACET_COMBOS):
+    """PROJECTIONS with a JSON file's {record_type: [attributes] | null} on top"""
+    projections = dict(PROJECTIONS)
+    if path:
+        with open(path) as f:
+            overrides = json.load(f)
+        unknown = set(overrides) - set(PROJECTIONS) - {record_type(combo) for combo in combos}
+        if unknown:
+            raise ValueError(f"unknown record types: {', '.join(sorted(unknown))}")
+        projections.update(overrides)
+    return projections
+
+def project(story, record_type, pk, sk, projections):
+    attributes = projections.get(record_type, projections['list'])
+    if attributes is None:
+        attributes = STORY_FIELDS + [field for field in OPTIONAL_FIELDS if field in story]
+    record = {'pk': pk, 'sk': sk}
+    record.update((name, story[name]) for name in attributes if name in story)
+    return record
+
+def create_denormalized_records(story, projections=PROJECTIONS, combos=FACET_COMBOS,
+                                published_shards=PUBLISHED_SHARDS, published_index=False):
+    """Create all denormalized records for a story as (record type, record)"""
+    story_id = story['story_id']
+    sort_key = f"{story['created_at']}#{story_id}"
     
     # Main record: PK = story_id
-    main_record = {
-        'pk': story['story_id'],
-        'sk': story['story_id'],
-        'story_id': story['story_id'],
-        'title': story['title'],
-        'age_range': story['age_range'],
-        'categories': story['categories'],
-        'tags': story['tags'],
-        's3_key': story['s3_key'],
-        'thumbnail_url': story['thumbnail_url'],
-        'duration_minutes': story['duration_minutes'],
-        'published': story['published'],
-        'created_at': story['created_at']
-    }
-    records.append(main_record)
+    keys = [('main', story_id, story_id)]
     
-    # Category records: PK = CATEGORY#{category}
-    for category in story['categories']:
-        category_record = {
-            'pk': f"CATEGORY#{category}",
-            'sk': f"{story['created_at']}#{story['story_id']}",
-            'story_id': story['story_id'],
-            'title': story['title'],
-            'age_range': story['age_range'],
-            'categories': story['categories'],
-            'tags': story['tags'],
-            's3_key': story['s3_key'],
-            'thumbnail_url': story['thumbnail_url'],
-            'duration_minutes': story['duration_minutes'],
-            'published': story['published'],
-            'created_at': story['created_at']
-        }
-        records.append(category_record)
-    
-    # Age record: PK = AGE#{age_range}
-    age_record = {
-        'pk': f"AGE#{story['age_range']}",
-        'sk': f"{story['created_at']}#{story['story_id']}",
-        'story_id': story['story_id'],
-        'title': story['title'],
-        'age_range': story['age_range'],
-        'categories': story['categories'],
-        'tags': story['tags'],
-        's3_key': story['s3_key'],
-        'thumbnail_url': story['thumbnail_url'],
-        'duration_minutes': story['duration_minutes'],
-        'published': story['published'],
-        'created_at': story['created_at']
-    }
-    records.append(age_record)
-    
-    # Published record: PK = PUBLISHED#{published}
-    published_record = {
-        'pk': f"PUBLISHED#{str(story['published']).lower()}",
-        'sk': f"{story['created_at']}#{story['story_id']}",
-        'story_id': story['story_id'],
-        'title': story['title'],
-        'age_range': story['age_range'],
-        'categories': story['categories'],
-        'tags': story['tags'],
-        's3_key': story['s3_key'],
-        'thumbnail_url': story['thumbnail_url'],
-        'duration_minutes': story['duration_minutes'],
-        'published': story['published'],
-        'created_at': story['created_at']
-    }
-    records.append(published_record)
+    # List records: PK = CATEGORY#{category}, AGE#{age_range}, CATEGORY#..#AGE#..,
+    # PUBLISHED#true#{shard}, ...
+    keys += [(list_type, pk, sort_key) for list_type, pk in facet_partitions(story, combos, published_shards)]
     
+    records = [
+        (record_type, project(story, record_type, pk, sk, projections))
+        for record_type, pk, sk in keys
+    ]
+    if published_index:
+        # Main record joins the published-index GSI instead of a PUBLISHED# row
+        records[0][1].update(feed_index_attributes(story, published_shards))
     return records
 
-def batch_write_items(table, items, batch_size=25):
-    """Write items in batches"""
-    for i in range(0, len(items), batch_size):
-        batch = items[i:i + batch_size]
-        with table.batch_writer() as writer:
-            for item in batch:
-                writer.put_item(Item=item)
+class CostReport:
+    """Item sizes per record type, WCU per story and RCU per list page, built up record by record"""
+
+    def __init__(self):
+        self.stories = 0
+        self.by_type = {}    # record type -> [count, total bytes, max bytes, WCU]
+        self.largest = []    # heap of the LIST_PAGE_SIZE largest list rows
+
+    def add(self, record_type, record):
+        size = item_size(record)
+        stats = self.by_type.setdefault(record_type, [0, 0, 0, 0])
+        stats[0] += 1
+        stats[1] += size
+        stats[2] = max(stats[2], size)
+        stats[3] += write_units(record)
+        if record_type == 'main':
+            self.stories += 1
+        else:
+            entry = (size, stats[0], record_type, record)  # count/type break size ties
+            if len(self.largest) < LIST_PAGE_SIZE:
+                heapq.heappush(self.largest, entry)
+            elif size > self.largest[0][0]:
+                heapq.heapreplace(self.largest, entry)
+
+    def print(self):
+        records = sum(stats[0] for stats in self.by_type.values())
+        print(f"📝 Generated {records} total records (denormalized)")
+        print(f"   - {self.stories} main records")
+        print(f"   - {records - self.stories} denormalized records\n")
+
+        print("📏 Item sizes")
+        width = max([len(record_type) for record_type in self.by_type] + [len('record')])
+        print(f"   {'record':<{width}} {'count':>6} {'avg B':>7} {'max B':>7} {'WCU':>6}")
+        total_wcu = 0
+        for record_type, (count, total, largest, wcu) in self.by_type.items():
+            total_wcu += wcu
+            print(f"   {record_type:<{width}} {count:>6} {total / count:>7.0f} {largest:>7} {wcu:>6}")
+
+        per_story = total_wcu / self.stories if self.stories else 0
+        print(f"\n   Full seed: {total_wcu} WCU ({per_story:.1f} WCU per story)")
+
+        # A list page is LIST_PAGE_SIZE rows of one partition, eventually consistent
+        if self.largest:
+            page = [record for *_, record in self.largest]
+            print(f"   List page ({LIST_PAGE_SIZE} rows): up to {read_units(page):g} RCU\n")
+
+def record_key(record):
+    return (record['pk'], record['sk'])
+
+def referenced_partitions(item, combos, published_shards):
+    """Partitions an existing item's story can have rows in"""
+    return {item['story_id']} | {pk for _, pk in facet_partitions(item, combos, published_shards)}
+
+def read_current_records(loader, desired, combos, published_shards):
+    """
+    Every existing record that reconcile has to consider, via parallel Queries
+
+    Starts from the partitions the seed writes to plus every PUBLISHED#
+    partition and shard (unsharded ones too, left over from older seeds),
+    then follows what the rows it finds point at (their story's main record,
+    old categories, age range) until nothing new turns up - that covers
+    re-categorized stories and stories dropped from the seed.
+    """
+    pending = {record['pk'] for record in desired}
+    for published in ('PUBLISHED#true', 'PUBLISHED#false'):
+        pending |= {published, *sharded_partitions(published, published_shards)}
+    queried = set()
+    current = {}
+    while pending:
+        partitions = loader.query_partitions(sorted(pending))
+        queried |= pending
+        pending = set()
+        for items in partitions.values():
+            for item in items:
+                current[record_key(item)] = item
+                if 'story_id' in item:
+                    pending |= referenced_partitions(item, combos, published_shards)
+        pending -= queried
+    return current
+
+def plan_reconcile(desired, current):
+    """(puts, deletes, unchanged count) to turn current into desired"""
+    desired_by_key = {record_key(record): record for record in desired}
+    puts = [
+        record for key, record in desired_by_key.items()
+        if current.get(key) != normalize(record)
+    ]
+    deletes = [{'pk': pk, 'sk': sk} for pk, sk in sorted(current.keys() - desired_by_key.keys())]
+    return puts, deletes, len(desired_by_key) - len(puts)
+
+def reconcile(loader, all_records, combos, published_shards, dry_run):
+    """Write only the changes; returns the batch errors"""
+    print("🔍 Reading current partitions...")
+    current = read_current_records(loader, all_records, combos, published_shards)
+    puts, deletes, unchanged = plan_reconcile(all_records, current)
+
+    print(f"   {len(current)} existing records")
+    print(f"   {unchanged} unchanged, {len(puts)} to put, {len(deletes)} to delete\n")
+    for key in deletes:
+        print(f"   🗑️  {key['pk']} / {key['sk']}")
+
+    if dry_run:
+        print("\n(dry run - nothing written)")
+        return []
+
+    print(f"⏳ Writing {len(puts)} puts and {len(deletes)} deletes...")
+    return loader.put_items(puts) + loader.delete_keys(deletes)
+
+def gc_generations(loader, keep):
+    """Delete generations outside the keep window; returns the batch errors"""
+    client = loader.client()
+    stale = stale_generations(read_pointer(client, loader.table_name),
+                              list_generations(client, loader.table_name), keep)
+    print(f"🧹 {len(stale)} stale generations (keeping {keep})")
+    errors = []
+    for generation in stale:
+        deleted, generation_errors = collect_garbage(loader, generation)
+        print(f"   🗑️  {generation}: {deleted} items")
+        errors += generation_errors
+    return errors
+
+def write_generation(loader, records, keep):
+    """
+    Write records as a new generation, verify it and make it live
+
+    Returns the batch errors; raises RuntimeError when the generation was
+    written but doesn't verify (the pointer is left alone either way).
+    """
+    client = loader.client()
+    generation = new_generation_id()
+    start_generation(client, loader.table_name, generation)
+    print(f"🧬 Writing generation {generation}...")
+
+    expected = Counter()
+    def counted():
+        for record in records:
+            expected[record['pk']] += 1
+            yield versioned(record, generation)
+
+    errors = loader.put_items(counted())
+    if errors:
+        print(f"❌ Generation {generation} incomplete - pointer not flipped")
+        return errors
+
+    print(f"🔍 Verifying {sum(expected.values())} items in {len(expected)} partitions...")
+    mismatches = verify_counts(loader, generation, expected)
+    for pk, wanted, found in mismatches[:20]:
+        print(f"   ❌ {pk}: expected {wanted}, found {found}")
+    if mismatches:
+        raise RuntimeError(f"{len(mismatches)} partitions don't match - pointer not flipped")
+
+    previous = flip_pointer(client, loader.table_name, generation,
+                            {"items": sum(expected.values()), "partitions": len(expected)})
+    print(f"🔀 CATALOG#current: {previous or '(none)'} → {generation}")
+    return gc_generations(loader, keep)
+
+def rollback(loader, target):
+    """
+    Point CATALOG#current back at target (default: the previous generation)
+
+    Raises RuntimeError when there's no complete generation to go back to.
+    """
+    client = loader.client()
+    pointer = read_pointer(client, loader.table_name)
+    available = {g['sk']: g['status'] for g in list_generations(client, loader.table_name)}
+    candidates = [g for g in (pointer or {}).get('previous', []) if g in available]
+    target = target or (candidates[0] if candidates else None)
+    if not target or target not in available or available[target] == 'writing':
+        raise RuntimeError(f"No complete generation to roll back to (have: {', '.join(available) or 'none'})")
+    live = flip_pointer(client, loader.table_name, target)
+    print(f"⏪ CATALOG#current: {live} → {target}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Seed the stories table")
+    parser.add_argument("--seed-file",
+                        help="seed to load (.ndjson, .ndjson.gz or legacy .json; default: found in the current directory)")
+    parser.add_argument("--table", help="table name (default: from the Database stack outputs)")
+    parser.add_argument("--endpoint-url", default=DYNAMODB_ENDPOINT_URL,
+                        help="DynamoDB endpoint (e.g. DynamoDB Local) for testing")
+    parser.add_argument("--workers", type=int, default=LOAD_WORKERS,
+                        help="concurrent BatchWriteItem threads")
+    parser.add_argument("--target-wcu", type=float,
+                        help="cap write rate at this many WCU per second")
+    parser.add_argument("--reconcile", action="store_true",
+                        help="diff against the table and write only puts/deletes that are needed")
+    parser.add_argument("--projections",
+                        help="JSON file of {record type: [attributes]} overriding PROJECTIONS")
+    parser.add_argument("--facets", default=",".join("+".join(combo) for combo in FACET_COMBOS),
+                        help="facet combinations to write list partitions for (e.g. category,age,category+age)")
+    parser.add_argument("--published-shards", type=int, default=PUBLISHED_SHARDS,
+                        help="spread PUBLISHED# rows over this many partitions (1 = unsharded)")
+    parser.add_argument("--published-index", action="store_true",
+                        help="serve the feed from the published-index GSI instead of PUBLISHED# rows")
+    parser.add_argument("--keep-published-rows", action="store_true",
+                        help="with --published-index, still write PUBLISHED# rows (switching a generation over)")
+    parser.add_argument("--export-dir",
+                        help="write an import-from-S3 export here instead of writing to the table")
+    parser.add_argument("--generation", action="store_true",
+                        help="write a new versioned catalog generation and flip CATALOG#current to it")
+    parser.add_argument("--keep", type=int, default=KEEP_GENERATIONS,
+                        help="generations to keep (live + rollback targets) when collecting garbage")
+    parser.add_argument("--gc", action="store_true",
+                        help="only delete generations outside the keep window")
+    parser.add_argument("--rollback", nargs="?", const="", metavar="GENERATION",
+                        help="point CATALOG#current at GENERATION (default: the previous one)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="print the cost report (and reconcile plan) without writing")
+    args = parser.parse_args()
+    if args.seed_file:
+        try:
+            is_ndjson(args.seed_file)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.keep_published_rows and not args.published_index:
+        parser.error("--keep-published-rows only works with --published-index")
+    if args.generation and args.reconcile:
+        parser.error("--generation writes a whole new catalog; it can't be combined with --reconcile")
+    return args
 
 def main():
+    args = parse_args()
+    combos = parse_combos(args.facets)
+    if args.published_index and not args.keep_published_rows:
+        combos = without_published_rows(combos)
+    projections = load_projections(args.projections, combos)
+    seed_file = args.seed_file or default_seed_file()
+    report = CostReport()
+
+    if args.rollback is None and not args.gc:
+        print(f"🌱 Seeding stories from {seed_file}\n")
+
+    def denormalized_records():
+        """Stream the seed file into records, tallying the cost report"""
+        for story in read_seed(seed_file):
+            for record_type, record in create_denormalized_records(
+                    story, projections, combos, args.published_shards, args.published_index):
+                report.add(record_type, record)
+                yield record
+
+    if args.dry_run and not args.reconcile:
+        for _ in denormalized_records():
+            pass
+        report.print()
+        print("(dry run - nothing written)")
+        return
+
+    if args.export_dir:
+        with ExportWriter(args.export_dir) as export:
+            export.write_all(denormalized_records())
+        report.print()
+        print(f"📦 Exported {export.count} items in {len(export.parts)} parts → {args.export_dir}")
+        print(f"   Check with: python3 validate-ddb-export.py {args.export_dir}")
+        return
+
     # Get table name
-    table_name = get_table_name()
+    table_name = args.table or get_table_name()
     if not table_name:
         print("❌ Could not determine table name. Is the Database stack deployed?")
         sys.exit(1)
     
     print(f"📊 Using table: {table_name}\n")
     
-    # Load seed data
-    with open('dynamodb-seed-stories.json') as f:
-        stories = json.load(f)
-    
-    print(f"🌱 Seeding {len(stories)} stories to DynamoDB\n")
-    
-    # Create DynamoDB resource
-    dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
-    table = dynamodb.Table(table_name)
-    
-    # Generate all denormalized records
-    all_records = []
-    for story in stories:
-        records = create_denormalized_records(story)
-        all_records.extend(records)
-    
-    print(f"📝 Generated {len(all_records)} total records (denormalized)")
-    print(f"   - {len(stories)} main records")
-    print(f"   - ~{len(all_records) - len(stories)} denormalized records\n")
-    
-    # Batch write
-    print("⏳ Writing to DynamoDB...")
-    batch_write_items(table, all_records)
+    loader = BulkLoader(table_name, workers=args.workers, target_wcu=args.target_wcu,
+                        endpoint_url=args.endpoint_url)
+
+    if args.rollback is not None:
+        try:
+            rollback(loader, args.rollback)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        return
+    if args.gc:
+        errors = gc_generations(loader, args.keep)
+        loader.report()
+        sys.exit(1 if errors else 0)
+
+    # Once CATALOG#current exists, readers only see G#{generation}# keys
+    pointer = None if args.generation else read_pointer(loader.client(), table_name)
+    if pointer:
+        print(f"❌ {table_name} serves catalog generation {pointer['generation']} - "
+              "unversioned writes would never reach readers")
+        print("   Seed with --generation instead")
+        sys.exit(1)
+
+    if args.generation:
+        try:
+            errors = write_generation(loader, denormalized_records(), args.keep)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        report.print()
+    elif args.reconcile:
+        all_records = list(denormalized_records())
+        report.print()
+        errors = reconcile(loader, all_records, combos, args.published_shards, args.dry_run)
+    else:
+        # Batch write
+        throttle = f", max {args.target_wcu:g} WCU/s" if args.target_wcu else ""
+        print(f"⏳ Writing to DynamoDB ({args.workers} threads{throttle})...\n")
+        errors = loader.put_items(denormalized_records())
+        report.print()
+    loader.report()
     
-    print(f"\n✅ Successfully seeded {len(stories)} stories!")
-    print(f"   Total records written: {len(all_records)}")
+    if errors:
+        print(f"\n❌ {len(errors)} batches failed: {errors[0]}")
+        sys.exit(1)
+
+    print(f"\n✅ Successfully seeded {report.stories} stories!")
+    print(f"   Total records written: {loader.metrics['items']}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Streaming DynamoDB seed files
+
+Seeds are NDJSON - one record per line - written as stories are processed
+and read back one record at a time, so neither side holds the whole seed:
+    dynamodb-seed-stories.ndjson      plain
+    dynamodb-seed-stories.ndjson.gz   gzip (picked by the .gz suffix)
+
+Two kinds share the format: story seeds (one story per line, written by
+upload-to-s3.py / categorize-and-seed.py, loaded by seed-stories-table.py)
+and record seeds (ready-made pk/sk items from generate-ddb-seed.py). They
+default to different files so neither overwrites the other.
+
+The old dynamodb-seed-stories.json array format is still read (in one go)
+and can still be written, as a streamed array, by naming a .json file.
+"""
+
+import gzip
+import json
+from pathlib import Path
+
+SEED_FILE = "dynamodb-seed-stories.ndjson"
+RECORDS_SEED_FILE = "dynamodb-seed-records.ndjson"
+LEGACY_SEED_FILE = "dynamodb-seed-stories.json"
+
+def _open(path, mode):
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+def is_ndjson(path):
+    """True for .ndjson/.jsonl (optionally .gz), False for .json; anything else is an error"""
+    suffixes = Path(path).suffixes
+    if suffixes and suffixes[-1] == ".gz":
+        suffixes = suffixes[:-1]
+    suffix = suffixes[-1] if suffixes else ""
+    if suffix not in (".ndjson", ".jsonl", ".json"):
+        raise ValueError(f"{path}: unknown seed format (use .ndjson, .jsonl or .json, optionally .gz)")
+    return suffix != ".json"
+
+def default_seed_file(directory="."):
+    """The NDJSON seed if there is one (plain or gzipped), else the legacy JSON array"""
+    directory = Path(directory)
+    for name in (SEED_FILE, f"{SEED_FILE}.gz"):
+        if (directory / name).exists():
+            return directory / name
+    return directory / LEGACY_SEED_FILE
+
+class SeedWriter:
+    """Append records to a seed file as they're produced"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.ndjson = is_ndjson(path)
+        self.count = 0
+        self._file = _open(path, "w")
+        if not self.ndjson:
+            self._file.write("[")
+
+    def write(self, record):
+        if self.ndjson:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        else:
+            self._file.write(("," if self.count else "") + "\n" + json.dumps(record, ensure_ascii=False))
+        self.count += 1
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
+
+    def close(self):
+        if not self.ndjson:
+            self._file.write("\n]\n")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_seed(path):
+    """Yield a seed file's records (streamed for NDJSON)"""
+    ndjson = is_ndjson(path)
+    with _open(path, "r") as f:
+        if not ndjson:
+            yield from json.load(f)
+            return
+        for line_number, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path}:{line_number}: {e}") from e
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Shared-memory ring for handing page bytes to encoder processes
+
+Passing bytes to a ProcessPoolExecutor pickles them through a pipe: the raw
+source on the way in and the encoded page on the way out. The ring is one
+SharedMemory block split into fixed-size slots instead:
+
+1. Parent writes the downloaded source into a free slot
+2. Only (spec, slot, length) is sent to the worker
+3. Worker reads the slot, encodes, writes the output back into the same slot
+4. Parent copies the output out and frees the slot
+
+acquire() blocks while every slot is in flight, which also caps how many
+downloaded pages wait in memory for an encoder.
+"""
+
+import queue
+from multiprocessing import shared_memory
+
+DEFAULT_SLOT_SIZE = 4 * 1024 * 1024  # Larger sources fall back to pickling
+
+# Per-process cache of attached blocks (worker side)
+_attached = {}
+
+class SharedMemoryRing:
+    """Fixed number of fixed-size slots in a single SharedMemory block (parent side)"""
+
+    def __init__(self, slots, slot_size=DEFAULT_SLOT_SIZE):
+        self.slots = slots
+        self.slot_size = slot_size
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_size)
+        self._free = queue.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+
+    @property
+    def spec(self):
+        """Picklable description workers use to attach"""
+        return (self.shm.name, self.slot_size)
+
+    def acquire(self):
+        """Wait for a free slot"""
+        return self._free.get()
+
+    def release(self, slot):
+        self._free.put(slot)
+
+    def fits(self, data):
+        return len(data) <= self.slot_size
+
+    def write(self, slot, data):
+        start = slot * self.slot_size
+        self.shm.buf[start:start + len(data)] = data
+        return len(data)
+
+    def read(self, slot, length):
+        start = slot * self.slot_size
+        return bytes(self.shm.buf[start:start + length])
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _attach(spec):
+    name, _ = spec
+    if name not in _attached:
+        # The parent owns (and unlinks) the block. Before Python 3.13 workers
+        # register it with the parent's resource tracker, which dedups names.
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+        _attached[name] = shm
+    return _attached[name]
+
+def slot_view(spec, slot, length):
+    """Zero-copy view of a slot (worker side) - release() it when done"""
+    _, slot_size = spec
+    start = slot * slot_size
+    return _attach(spec).buf[start:start + length]
+
+def write_slot(spec, slot, data):
+    """Write a result back into a slot (worker side); False if it doesn't fit"""
+    _, slot_size = spec
+    if len(data) > slot_size:
+        return False
+    start = slot * slot_size
+    _attach(spec).buf[start:start + len(data)] = data
+    return True
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Offline story bundles: one ZIP per story
+
+A bundle holds the minified story JSON followed by the page renditions in
+reading order:
+    story.json
+    pages/page-1.jpg
+    pages/page-2.jpg
+    ...
+
+Entries are ZIP_STORED (pages are already JPEG/WebP), so each entry's bytes
+sit contiguously in the archive. The index records where:
+    {"bundle": "bundles/{story_id}.zip", "size": ...,
+     "entries": [{"name": "story.json", "offset": ..., "size": ..., "content_type": ...}, ...]}
+so a device can download the whole bundle in one request, or fetch single
+entries with HTTP Range requests (bytes=offset-(offset+size-1)).
+
+Inside the bundle, page images point at their entry names instead of
+CloudFront URLs. Timestamps are fixed so an unchanged story rebuilds to
+identical bytes (and the same S3 ETag).
+"""
+
+import shutil
+import struct
+import zipfile
+
+from json_payloads import JSON_CONTENT_TYPE, minify
+
+BUNDLE_PREFIX = "bundles"
+ZIP_CONTENT_TYPE = "application/zip"
+
+# Earliest date a ZIP can store - keeps rebuilt bundles byte-identical
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# Local file header: fixed 30 bytes, name/extra lengths at offset 26
+LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+
+def bundle_key(story_id):
+    return f"{BUNDLE_PREFIX}/{story_id}.zip"
+
+def bundle_index_key(story_id):
+    return f"{BUNDLE_PREFIX}/{story_id}.index.json"
+
+def _entry_info(name):
+    info = zipfile.ZipInfo(name, date_time=FIXED_DATE_TIME)
+    info.compress_type = zipfile.ZIP_STORED
+    return info
+
+def _data_offset(f, info):
+    """Where an entry's bytes start: after its local header, name and extra field"""
+    f.seek(info.header_offset)
+    fields = LOCAL_HEADER.unpack(f.read(LOCAL_HEADER.size))
+    name_length, extra_length = fields[-2:]
+    return info.header_offset + LOCAL_HEADER.size + name_length + extra_length
+
+def build_bundle(story, page_files, bundle_path, content_types):
+    """
+    Write a story bundle, streaming page files into it
+
+    page_files: local page images in reading order (one per story page)
+    content_types: {suffix: content type} for the page files
+
+    Returns the index (without the "bundle" key).
+    """
+    offline_story = dict(story)
+    offline_story["pages"] = [
+        {**page, "image": f"pages/{page_file.name}"}
+        for page, page_file in zip(story["pages"], page_files)
+    ]
+
+    entries = [("story.json", JSON_CONTENT_TYPE)]
+    with zipfile.ZipFile(bundle_path, "w", zipfile.ZIP_STORED) as zf:
+        zf.writestr(_entry_info("story.json"), minify(offline_story))
+        for page_file in page_files:
+            name = f"pages/{page_file.name}"
+            with open(page_file, "rb") as src, zf.open(_entry_info(name), "w") as dst:
+                shutil.copyfileobj(src, dst)
+            entries.append((name, content_types[page_file.suffix]))
+        infos = {info.filename: info for info in zf.infolist()}
+
+    with open(bundle_path, "rb") as f:
+        index_entries = [
+            {
+                "name": name,
+                "offset": _data_offset(f, infos[name]),
+                "size": infos[name].file_size,
+                "content_type": content_type,
+            }
+            for name, content_type in entries
+        ]
+        size = f.seek(0, 2)
+
+    return {"size": size, "entries": index_entries}
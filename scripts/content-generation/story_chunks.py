@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Page-chunked story payloads for progressive loading
+
+A story is split into a small header and fixed-size page chunks:
+    stories/{story_id}/header.json    metadata + the first HEADER_PAGES pages
+    stories/{story_id}/pages-0.json   the next CHUNK_PAGES pages
+    stories/{story_id}/pages-1.json   ...
+
+The layout goes into the header and the DynamoDB item, so readers can show
+page 1 from the header alone and fetch chunk N by filling {chunk} in
+chunk_key_template - no listing, and first-page time doesn't grow with
+story length.
+"""
+
+HEADER_PAGES = 4
+CHUNK_PAGES = 8
+
+def header_key(story_id):
+    return f"stories/{story_id}/header.json"
+
+def chunk_key_template(story_id):
+    return f"stories/{story_id}/pages-{{chunk}}.json"
+
+def chunk_layout(story_id, page_count, header_pages=HEADER_PAGES, chunk_pages=CHUNK_PAGES):
+    """Where a story's pages live (stored as the "chunks" attribute)"""
+    remaining = max(0, page_count - header_pages)
+    return {
+        "header_key": header_key(story_id),
+        "chunk_key_template": chunk_key_template(story_id),
+        "page_count": page_count,
+        "header_pages": header_pages,
+        "chunk_pages": chunk_pages,
+        "chunk_count": -(-remaining // chunk_pages),
+    }
+
+def split_story(story, layout):
+    """[(key, object), ...] for the header and every page chunk"""
+    pages = story.get("pages", [])
+    header_pages = layout["header_pages"]
+    chunk_pages = layout["chunk_pages"]
+
+    header = {**story, "pages": pages[:header_pages], "chunks": layout}
+    objects = [(layout["header_key"], header)]
+
+    for chunk in range(layout["chunk_count"]):
+        first_page = header_pages + chunk * chunk_pages
+        objects.append((layout["chunk_key_template"].format(chunk=chunk), {
+            "story_id": story["story_id"],
+            "chunk": chunk,
+            "first_page": first_page,
+            "pages": pages[first_page:first_page + chunk_pages],
+        }))
+    return objects
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+List partitions a story is written to, one per facet combination
+
+Each facet maps a story attribute to a key segment:
+    category   CATEGORY#{category}     (one per category)
+    age        AGE#{age_range}
+    published  PUBLISHED#{true|false}
+
+A combination joins segments in that order, so ("category", "age") gives
+CATEGORY#animals#AGE#3-5 and stories.list answers "animals for 3-5" with a
+single Query. Combinations are configurable (--facets on the seed scripts):
+    category,age,published,category+age
+
+The published-only partition backs the default home feed, so it's spread
+over PUBLISHED_SHARDS partitions (PUBLISHED#true#0 .. #N-1, picked by a hash
+of the story_id) with the same created_at sort key; story_feed.py merges
+them back into one newest-first feed.
+
+With the published index (--published-index on the seed scripts) there are
+no PUBLISHED# rows at all: a published story's main record carries
+    feed_pk       PUBLISHED#true#{shard}
+    published_at  {created_at}#{story_id}
+and the sparse FEED_INDEX GSI on them (database-stack.ts) holds just the
+published stories, in the same shards and order. Unpublished main records
+leave both out, so they never reach the index. Switching over, in order:
+    1. deploy the Database stack (creates the index)
+    2. seed with --published-index (--reconcile drops the PUBLISHED# rows)
+    3. deploy the Api stack with -c publishedFeedIndex=true
+Until step 3 the API still reads PUBLISHED# rows, so for an in-place
+switch run step 2 without --reconcile and reconcile after step 3. A
+generation replaces every row, so there step 2 is
+--generation --published-index --keep-published-rows (both feeds), and the
+first generation after step 3 drops the rows.
+"""
+
+import zlib
+from itertools import product
+
+FACET_PREFIXES = {
+    "category": "CATEGORY",
+    "age": "AGE",
+    "published": "PUBLISHED",
+}
+
+FACET_COMBOS = [("category",), ("age",), ("published",), ("category", "age")]
+
+PUBLISHED_SHARDS = 4  # keep in sync with PUBLISHED_SHARDS in database-stack.ts
+
+# Published feed GSI (keep in sync with STORIES_FEED_INDEX in database-stack.ts)
+FEED_INDEX = "published-index"
+FEED_INDEX_PK = "feed_pk"
+FEED_INDEX_SK = "published_at"
+
+def _facet_values(story, facet):
+    if facet == "category":
+        return story.get("categories")
+    if facet == "age":
+        return [story["age_range"]] if "age_range" in story else None
+    if facet == "published":
+        return [str(story["published"]).lower()] if "published" in story else None
+    raise ValueError(f"unknown facet: {facet}")
+
+def parse_combos(spec):
+    """"category,age,category+age" -> [("category",), ("age",), ("category", "age")]"""
+    combos = []
+    for part in spec.split(","):
+        facets = [facet.strip() for facet in part.split("+") if facet.strip()]
+        unknown = [facet for facet in facets if facet not in FACET_PREFIXES]
+        if unknown:
+            raise ValueError(f"unknown facet: {', '.join(unknown)} (choose from {', '.join(FACET_PREFIXES)})")
+        if facets:
+            combos.append(tuple(sorted(facets, key=list(FACET_PREFIXES).index)))
+    return combos
+
+def record_type(combo):
+    return "_".join(combo)
+
+def shard_for(story_id, shards):
+    return zlib.crc32(story_id.encode("utf-8")) % shards
+
+def sharded_partitions(pk, shards=PUBLISHED_SHARDS):
+    """Every shard of a sharded partition (just pk when unsharded)"""
+    return [f"{pk}#{shard}" for shard in range(shards)] if shards > 1 else [pk]
+
+def facet_partitions(story, combos=FACET_COMBOS, published_shards=PUBLISHED_SHARDS):
+    """[(record type, pk), ...] for every combination the story has values for"""
+    partitions = []
+    for combo in combos:
+        values = [_facet_values(story, facet) for facet in combo]
+        if not all(values):
+            continue
+        for picked in product(*values):
+            pk = "#".join(f"{FACET_PREFIXES[facet]}#{value}" for facet, value in zip(combo, picked))
+            if combo == ("published",) and published_shards > 1:
+                pk = f"{pk}#{shard_for(story['story_id'], published_shards)}"
+            partitions.append((record_type(combo), pk))
+    return partitions
+
+def without_published_rows(combos):
+    """combos minus the published-only partition the feed index replaces"""
+    return [combo for combo in combos if combo != ("published",)]
+
+def feed_index_attributes(story, published_shards=PUBLISHED_SHARDS):
+    """{feed_pk, published_at} for a published story's main record, else {}"""
+    if not story.get("published"):
+        return {}
+    pk = "PUBLISHED#true"
+    if published_shards > 1:
+        pk = f"{pk}#{shard_for(story['story_id'], published_shards)}"
+    return {FEED_INDEX_PK: pk, FEED_INDEX_SK: f"{story['created_at']}#{story['story_id']}"}
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Scatter-gather reader for sharded list partitions (reference for stories.list)
+
+Each page Queries every shard in parallel, newest first, with the page size
+as Limit, merges the results by sort key and keeps the newest `limit` rows.
+The cursor records, per shard, the last sort key handed out (or that the
+shard is used up), so the next page resumes each shard exactly where the
+merged feed left it:
+    page = read_feed_page(client, "stories", sharded_partitions("PUBLISHED#true"))
+    page = read_feed_page(client, "stories", pks, cursor=page["cursor"])
+
+The cursor is opaque base64 JSON, the same format the API hands out. It
+names unversioned shards, so with a catalog generation (see
+catalog_generations.py) paging carries on across a pointer flip:
+    page = read_feed_page(client, "stories", pks, generation=pointer["generation"])
+
+With the published index (see story_facets.py) the shards are the index's
+feed_pk partitions and rows sort by published_at instead of sk:
+    page = read_feed_page(client, "stories", pks, index=FEED_INDEX)
+"""
+
+import base64
+import heapq
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from catalog_generations import generation_prefix
+from ddb_loader import deserialize
+from story_facets import FEED_INDEX_PK, FEED_INDEX_SK
+
+EXHAUSTED = ""  # cursor value for a shard with nothing left
+
+def encode_cursor(positions):
+    encoded = base64.urlsafe_b64encode(json.dumps(positions, separators=(",", ":")).encode())
+    return encoded.decode().rstrip("=")
+
+def decode_cursor(cursor):
+    if not cursor:
+        return {}
+    return json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+
+def _query_shard(client, table_name, pk, after, limit, generation=None, index=None):
+    if generation:
+        pk = generation_prefix(generation) + pk
+    key_name = FEED_INDEX_PK if index else "pk"
+    kwargs = {
+        "TableName": table_name,
+        "KeyConditionExpression": f"{key_name} = :pk",
+        "ExpressionAttributeValues": {":pk": {"S": pk}},
+        "ScanIndexForward": False,
+        "Limit": limit,
+    }
+    if index:
+        kwargs["IndexName"] = index
+    if after and index:
+        # An index start key needs a table key too. It only orders rows with
+        # the same published_at, and there are none (it ends in the story_id)
+        story_id = after.rsplit("#", 1)[1]
+        kwargs["ExclusiveStartKey"] = {
+            FEED_INDEX_PK: {"S": pk},
+            FEED_INDEX_SK: {"S": after},
+            "pk": {"S": (generation_prefix(generation) if generation else "") + story_id},
+            "sk": {"S": story_id},
+        }
+    elif after:
+        kwargs["ExclusiveStartKey"] = {"pk": {"S": pk}, "sk": {"S": after}}
+    response = client.query(**kwargs)
+    return [deserialize(item) for item in response.get("Items", [])], "LastEvaluatedKey" in response
+
+def read_feed_page(client, table_name, pks, limit=20, cursor=None, generation=None, index=None):
+    """{"items": newest-first rows across all shards, "cursor": next page or None}"""
+    sort_key = FEED_INDEX_SK if index else "sk"
+    positions = decode_cursor(cursor)
+    live = [pk for pk in pks if positions.get(pk) != EXHAUSTED]
+
+    with ThreadPoolExecutor(max_workers=max(1, len(live))) as pool:
+        results = dict(zip(live, pool.map(
+            lambda pk: _query_shard(client, table_name, pk, positions.get(pk), limit, generation, index), live
+        )))
+
+    merged = heapq.merge(
+        *([(item[sort_key], pk, item) for item in items] for pk, (items, _) in results.items()),
+        key=lambda entry: entry[0], reverse=True,
+    )
+    page = [entry for _, entry in zip(range(limit), merged)]
+
+    for pk, (items, more) in results.items():
+        taken = [item for _, shard, item in page if shard == pk]
+        if taken:
+            positions[pk] = taken[-1][sort_key]
+        if len(taken) == len(items) and not more:
+            positions[pk] = EXHAUSTED
+
+    done = all(positions.get(pk) == EXHAUSTED for pk in pks)
+    return {
+        "items": [item for _, _, item in page],
+        "cursor": None if done else encode_cursor(positions),
+    }
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Compact story schema
+
+Full form (what the pipeline and readers work with):
+    "pages": [{"index": 0, "text": "", "image": "https://d3l....net/images/{id}/page-1.jpg"}, ...]
+
+Compact form (what's stored):
+    "asset_base": "https://d3lncscy0tzgzt.cloudfront.net",
+    "page_path": "images/{story_id}/page-{n}.jpg",
+    "pages": [{}, {"text": "Once upon a time"}, {"image": "images/x/cover.jpg"}, ...]
+
+Page n (1-based) defaults to asset_base + page_path with {story_id} and {n}
+filled in; content-hashed keys (upload-to-s3.py --hashed-keys) use a
+"page-{n}.{hash}.jpg" page_path and a per-page "hash". Pages only carry
+fields that differ from the defaults: non-empty text, a hash, or an image
+path that doesn't fit the template. A CDN move is one asset_base change.
+"""
+
+import re
+
+def is_compact(story):
+    return "page_path" in story
+
+def _page_templates(story_id, first_image):
+    """Candidate page_path templates, plain and content-hashed, in the first page's format"""
+    ext = re.search(r'(\.[a-z]+)$', first_image)
+    ext = ext.group(1) if ext else ".jpg"
+    return [f"images/{{story_id}}/page-{{n}}{ext}", f"images/{{story_id}}/page-{{n}}.{{hash}}{ext}"]
+
+def _template_regex(template, story_id, n):
+    pattern = re.escape(template.format(story_id=story_id, n=n, hash="\0"))
+    return re.compile("^" + pattern.replace("\0", "(?P<hash>[0-9a-f]{12})") + "$")
+
+def _compact_page(page, position, story_id, asset_base, template):
+    compact = {k: v for k, v in page.items() if k not in ("index", "text", "image")}
+    if page.get("index", position) != position:
+        compact["index"] = page["index"]
+    if page.get("text"):
+        compact["text"] = page["text"]
+
+    image = page.get("image")
+    if image:
+        path = image[len(asset_base) + 1:] if image.startswith(asset_base + "/") else image
+        match = _template_regex(template, story_id, position + 1).match(path)
+        if match is None:
+            compact["image"] = path
+        elif "hash" in match.groupdict():
+            compact["hash"] = match.group("hash")
+    return compact
+
+def compact_story(story, asset_base):
+    """Compact form of a full story (compact stories are returned unchanged)"""
+    if is_compact(story):
+        return story
+
+    story_id = story["story_id"]
+    pages = story.get("pages", [])
+    paths = [page.get("image", "").replace(asset_base + "/", "", 1) for page in pages]
+
+    # The template most pages fit
+    templates = _page_templates(story_id, paths[0] if paths else "")
+    template = max(templates, key=lambda t: sum(
+        1 for n, path in enumerate(paths, 1) if _template_regex(t, story_id, n).match(path)
+    ))
+
+    compact = {k: v for k, v in story.items() if k != "pages"}
+    compact["asset_base"] = asset_base
+    compact["page_path"] = template
+    compact["pages"] = [
+        _compact_page(page, position, story_id, asset_base, template)
+        for position, page in enumerate(pages)
+    ]
+    return compact
+
+def page_image_url(story, position, page):
+    """Absolute image URL of a compact page"""
+    image = page.get("image")
+    if image and image.startswith(("http://", "https://")):
+        return image
+    template = story["page_path"]
+    if "hash" not in page:
+        template = template.replace(".{hash}", "")  # unhashed page under a hashed template
+    path = image or template.format(story_id=story["story_id"], n=position + 1, hash=page.get("hash", ""))
+    return f"{story['asset_base']}/{path}"
+
+def expand_story(story):
+    """Full form of a compact story (full stories are returned unchanged)"""
+    if not is_compact(story):
+        return story
+
+    full = {k: v for k, v in story.items() if k not in ("asset_base", "page_path", "pages")}
+    full["pages"] = [
+        {
+            **{k: v for k, v in page.items() if k != "hash"},
+            "index": page.get("index", position),
+            "text": page.get("text", ""),
+            "image": page_image_url(story, position, page),
+        }
+        for position, page in enumerate(story.get("pages", []))
+    ]
+    return full
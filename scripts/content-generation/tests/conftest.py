@@ -0,0 +1,74 @@
+"""
+Shared fixtures for the content-generation tests
+
+The helper modules are imported straight from the scripts directory; the
+hyphen-named CLI scripts are loaded by path with load_script(). AWS calls go
+to moto's in-process mocks, so no credentials or network are needed:
+    pip install pytest moto
+    python3 -m pytest scripts/content-generation/tests
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import boto3
+import pytest
+from moto import mock_aws
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+def load_script(name):
+    """Import a hyphen-named script (e.g. "seed-stories-table") as a module"""
+    module_name = name.replace("-", "_")
+    if module_name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(module_name, SCRIPTS_DIR / f"{name}.py")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules[module_name] = module
+    return sys.modules[module_name]
+
+@pytest.fixture
+def aws(monkeypatch):
+    """Fake credentials and moto mocks for every AWS service"""
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_SESSION_TOKEN"):
+        monkeypatch.setenv(name, "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        yield
+
+@pytest.fixture
+def bucket(aws):
+    """An empty S3 bucket; yields (client, bucket name)"""
+    client = boto3.client("s3", region_name="us-east-1")
+    client.create_bucket(Bucket="test-bucket")
+    yield client, "test-bucket"
+
+@pytest.fixture
+def stories_table(aws):
+    """An empty stories table (pk/sk, published-index GSI); yields its name"""
+    from story_facets import FEED_INDEX, FEED_INDEX_PK, FEED_INDEX_SK
+
+    client = boto3.client("dynamodb", region_name="us-east-1")
+    client.create_table(
+        TableName="stories",
+        KeySchema=[
+            {"AttributeName": "pk", "KeyType": "HASH"},
+            {"AttributeName": "sk", "KeyType": "RANGE"},
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": name, "AttributeType": "S"}
+            for name in ("pk", "sk", FEED_INDEX_PK, FEED_INDEX_SK)
+        ],
+        GlobalSecondaryIndexes=[{
+            "IndexName": FEED_INDEX,
+            "KeySchema": [
+                {"AttributeName": FEED_INDEX_PK, "KeyType": "HASH"},
+                {"AttributeName": FEED_INDEX_SK, "KeyType": "RANGE"},
+            ],
+            "Projection": {"ProjectionType": "ALL"},
+        }],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    yield "stories"
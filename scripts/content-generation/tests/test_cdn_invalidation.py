@@ -0,0 +1,35 @@
+from cdn_invalidation import batch_paths, plan_invalidation
+
+def covers(paths, key):
+    return f"/{key}" in paths or any(p.endswith("*") and f"/{key}".startswith(p[:-1]) for p in paths)
+
+def test_nothing_changed():
+    assert plan_invalidation([]) == []
+
+def test_few_changes_stay_exact():
+    known = [f"stories/{i}.json" for i in range(100)]
+    changed = ["stories/1.json", "stories/2.json"]
+    assert plan_invalidation(changed, known) == ["/stories/1.json", "/stories/2.json"]
+
+def test_mostly_changed_directory_becomes_a_wildcard():
+    known = [f"images/a/page-{i}.jpg" for i in range(10)] + [f"stories/{i}.json" for i in range(20)]
+    changed = [f"images/a/page-{i}.jpg" for i in range(8)] + ["stories/1.json"]
+    assert plan_invalidation(changed, known) == ["/stories/1.json", "/images/*"]
+
+def test_limits_are_respected_and_every_key_covered():
+    changed = [f"images/s{s}/page-{p}.jpg" for s in range(40) for p in range(3)]
+    known = changed + [f"images/s{s}/page-{p}.jpg" for s in range(40) for p in range(3, 30)]
+
+    paths = plan_invalidation(changed, known, max_paths=50, max_wildcards=5)
+
+    assert len(paths) <= 50
+    assert sum(p.endswith("*") for p in paths) <= 5
+    assert all(covers(paths, key) for key in changed)
+
+def test_batches_fit_the_limits():
+    paths = [f"/k{i}" for i in range(7)] + [f"/d{i}/*" for i in range(5)]
+    batches = batch_paths(paths, max_paths=4, max_wildcards=2)
+
+    assert sorted(p for batch in batches for p in batch) == sorted(paths)
+    assert all(len(batch) <= 4 for batch in batches)
+    assert all(sum(p.endswith("*") for p in batch) <= 2 for batch in batches)
@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+from s3_uploader import (
+    TRANSFER_CONFIG, ParallelUploader, delete_keys, is_unchanged, list_remote_objects, local_etag,
+)
+
+def test_uploads_files_and_bytes(bucket, tmp_path):
+    client, name = bucket
+    page = tmp_path / "page-1.jpg"
+    page.write_bytes(b"\xff\xd8jpeg")
+
+    with ParallelUploader(name, client=client, workers=4) as uploader:
+        futures = [
+            uploader.submit(page, "images/a/page-1.jpg", "image/jpeg"),
+            uploader.submit_bytes(b'{"a":1}', "stories/a.json", "application/json",
+                                  {"ContentEncoding": "gzip", "CacheControl": "no-cache"}),
+        ]
+        assert [f.result() for f in futures] == ["images/a/page-1.jpg", "stories/a.json"]
+
+    head = client.head_object(Bucket=name, Key="stories/a.json")
+    assert head["ContentType"] == "application/json"
+    assert head["ContentEncoding"] == "gzip"
+    assert head["CacheControl"] == "no-cache"
+    assert client.get_object(Bucket=name, Key="images/a/page-1.jpg")["Body"].read() == b"\xff\xd8jpeg"
+
+def test_upload_error_surfaces_on_the_future(aws):
+    import boto3
+    client = boto3.client("s3", region_name="us-east-1")
+
+    with ParallelUploader("no-such-bucket", client=client, workers=2) as uploader:
+        future = uploader.submit_bytes(b"x", "k", "text/plain")
+        with pytest.raises(Exception):
+            future.result()
+
+def test_max_pending_bounds_queued_uploads(bucket):
+    client, name = bucket
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    class SlowUploader(ParallelUploader):
+        def _upload_bytes(self, data, key, extra_args):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+            return super()._upload_bytes(data, key, extra_args)
+
+    with SlowUploader(name, client=client, workers=8, max_pending=2) as uploader:
+        futures = [uploader.submit_bytes(b"x", f"k{i}", "text/plain") for i in range(10)]
+        assert sorted(f.result() for f in futures) == sorted(f"k{i}" for i in range(10))
+    assert peak <= 2
+
+def test_local_etag_matches_s3(bucket):
+    client, name = bucket
+    small = b"a" * 1000
+    large = b"b" * (TRANSFER_CONFIG.multipart_threshold + 1)
+
+    with ParallelUploader(name, client=client, workers=2) as uploader:
+        uploader.submit_bytes(small, "small", "application/octet-stream").result()
+        uploader.submit_bytes(large, "large", "application/octet-stream").result()
+
+    remote = list_remote_objects(client, name, [""])
+    assert remote["small"] == (local_etag(small), len(small))
+    assert remote["large"] == (local_etag(large), len(large))
+    assert local_etag(large).endswith("-2")
+    assert is_unchanged(small, local_etag(small), remote["small"])
+    assert not is_unchanged(small + b"!", local_etag(small + b"!"), remote["small"])
+    assert not is_unchanged(small, local_etag(small), None)
+
+def test_delete_keys(bucket):
+    client, name = bucket
+    for key in ("a", "b", "c"):
+        client.put_object(Bucket=name, Key=key, Body=b"x")
+
+    assert delete_keys(client, name, {"a", "c"}) == 2
+    assert set(list_remote_objects(client, name, [""])) == {"b"}
@@ -0,0 +1,111 @@
+from collections import Counter
+
+import pytest
+
+import catalog_generations
+from catalog_generations import (
+    flip_pointer, generation_prefix, list_generations, new_generation_id, read_pointer,
+    stale_generations, start_generation, verify_counts,
+)
+from conftest import load_script
+from ddb_loader import BulkLoader
+
+seed = load_script("seed-stories-table")
+
+def make_story(story_id, categories, age_range="3-5"):
+    return {
+        "story_id": story_id, "title": story_id.title(), "age_range": age_range, "categories": categories,
+        "tags": [], "s3_key": f"stories/{story_id}.json", "thumbnail_url": "https://cdn/x.jpg",
+        "duration_minutes": 5.5, "page_count": 6, "author": "A", "license": "CC-BY 4.0",
+        "published": True, "created_at": "2025-01-01T00:00:00Z",
+    }
+
+def records_for(stories):
+    return [record for story in stories for _, record in seed.create_denormalized_records(story)]
+
+@pytest.fixture
+def loader(stories_table):
+    return BulkLoader(stories_table, workers=2)
+
+def test_reconcile_plan_follows_recategorized_and_dropped_stories(loader):
+    before = [make_story("a", ["animals"]), make_story("b", ["bedtime"]), make_story("c", ["family"])]
+    assert loader.put_items(records_for(before)) == []
+
+    # a moves category and age, b is unchanged, c is dropped from the seed
+    after = [make_story("a", ["adventure"], "6-8"), make_story("b", ["bedtime"])]
+    desired = records_for(after)
+    current = seed.read_current_records(loader, desired, seed.FACET_COMBOS, seed.PUBLISHED_SHARDS)
+    puts, deletes, unchanged = seed.plan_reconcile(desired, current)
+
+    deleted = {(key["pk"], key["sk"]) for key in deletes}
+    assert ("CATEGORY#animals", "2025-01-01T00:00:00Z#a") in deleted
+    assert ("c", "c") in deleted
+    assert not any(pk.endswith("bedtime") for pk, _ in deleted)
+    assert {r["pk"] for r in puts} >= {"a", "CATEGORY#adventure", "AGE#6-8"}
+    assert not any(r["story_id"] == "b" for r in puts)
+    assert unchanged == len(records_for([make_story("b", ["bedtime"])]))
+
+    assert loader.put_items(puts) + loader.delete_keys(deletes) == []
+    current = seed.read_current_records(loader, desired, seed.FACET_COMBOS, seed.PUBLISHED_SHARDS)
+    assert seed.plan_reconcile(desired, current) == ([], [], len(desired))
+
+def test_generation_ids_are_unique_and_sortable():
+    ids = [new_generation_id() for _ in range(50)]
+    assert len(set(ids)) == 50
+    assert all("#" not in generation for generation in ids)
+    assert ids[0][:15] <= ids[-1][:15]
+
+def test_write_generation_flips_and_collects_garbage(loader):
+    client = loader.client()
+    records = records_for([make_story("a", ["animals"]), make_story("b", ["bedtime"])])
+
+    generations = []
+    for _ in range(3):
+        assert seed.write_generation(loader, iter(records), keep=2) == []
+        generations.append(read_pointer(client, loader.table_name)["generation"])
+
+    pointer = read_pointer(client, loader.table_name)
+    assert pointer["generation"] == generations[-1]
+    assert pointer["previous"][:2] == [generations[1], generations[0]]
+    assert pointer["counts"] == {"items": len(records), "partitions": len({r["pk"] for r in records})}
+    # Only live + one rollback target are left
+    assert sorted(g["sk"] for g in list_generations(client, loader.table_name)) == sorted(generations[1:])
+    assert loader.scan_keys(generation_prefix(generations[0])) == []
+    assert verify_counts(loader, generations[-1], Counter(r["pk"] for r in records)) == []
+
+    seed.rollback(loader, "")
+    assert read_pointer(client, loader.table_name)["generation"] == generations[1]
+    with pytest.raises(RuntimeError):
+        seed.rollback(loader, "no-such-generation")
+
+def test_write_generation_raises_when_counts_dont_match(loader, monkeypatch):
+    monkeypatch.setattr(seed, "verify_counts", lambda *args: [("a", 1, 0)])
+    with pytest.raises(RuntimeError):
+        seed.write_generation(loader, iter(records_for([make_story("a", ["animals"])])), keep=2)
+    assert read_pointer(loader.client(), loader.table_name) is None
+
+def test_flip_pointer_refuses_a_stale_live_generation(loader, monkeypatch):
+    client = loader.client()
+    for generation in ("g1", "g2", "g3"):
+        start_generation(client, loader.table_name, generation)
+    flip_pointer(client, loader.table_name, "g1")
+    flip_pointer(client, loader.table_name, "g2")
+
+    # This run read the pointer before another run flipped it from g1 to g2
+    monkeypatch.setattr(catalog_generations, "read_pointer", lambda *args: {"generation": "g1"})
+    with pytest.raises(client.exceptions.TransactionCanceledException):
+        flip_pointer(client, loader.table_name, "g3")
+    monkeypatch.undo()
+    assert read_pointer(client, loader.table_name)["generation"] == "g2"
+
+def test_stale_generations_keeps_live_previous_and_newest_writing():
+    pointer = {"generation": "g3", "previous": ["g2", "g1"]}
+    generations = [
+        {"sk": "g5", "status": "writing"},
+        {"sk": "g4", "status": "writing"},
+        {"sk": "g3", "status": "live"},
+        {"sk": "g2", "status": "previous"},
+        {"sk": "g1", "status": "previous"},
+    ]
+    assert stale_generations(pointer, generations, keep=2) == ["g4", "g1"]
+    assert stale_generations(None, [], keep=2) == []
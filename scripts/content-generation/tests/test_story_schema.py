@@ -0,0 +1,42 @@
+import pytest
+
+from story_schema import compact_story, expand_story, is_compact
+
+BASE = "https://cdn.example.net"
+
+def full_story(pages):
+    return {"story_id": "s1", "title": "T", "pages": pages}
+
+@pytest.mark.parametrize("pages", [
+    [],
+    [{"index": 0, "text": "", "image": f"{BASE}/images/s1/page-1.jpg"},
+     {"index": 1, "text": "Once upon a time", "image": f"{BASE}/images/s1/page-2.jpg"}],
+    [{"index": 0, "text": "", "image": f"{BASE}/images/s1/page-1.webp"},
+     {"index": 1, "text": "Hi", "image": f"{BASE}/images/s1/page-2.webp"}],
+    [{"index": 0, "text": "", "image": f"{BASE}/images/s1/page-1.0123456789ab.jpg"},
+     {"index": 1, "text": "", "image": f"{BASE}/images/s1/page-2.jpg"},
+     {"index": 2, "text": "x", "image": f"{BASE}/images/s1/page-3.ba9876543210.jpg"}],
+    [{"index": 0, "text": "", "image": f"{BASE}/images/s1/cover.jpg"},
+     {"index": 1, "text": "", "image": "https://elsewhere.org/p.jpg"},
+     {"index": 5, "text": "", "image": f"{BASE}/images/s1/page-3.jpg", "alt": "a cat"}],
+])
+def test_round_trip(pages):
+    story = full_story(pages)
+    compact = compact_story(story, BASE)
+
+    assert is_compact(compact)
+    assert expand_story(compact) == story
+
+def test_default_pages_are_empty():
+    story = full_story([{"index": i, "text": "", "image": f"{BASE}/images/s1/page-{i + 1}.jpg"} for i in range(3)])
+    compact = compact_story(story, BASE)
+
+    assert compact["page_path"] == "images/{story_id}/page-{n}.jpg"
+    assert compact["pages"] == [{}, {}, {}]
+
+def test_already_in_form_is_unchanged():
+    story = full_story([{"index": 0, "text": "", "image": f"{BASE}/images/s1/page-1.jpg"}])
+    compact = compact_story(story, BASE)
+
+    assert compact_story(compact, BASE) is compact
+    assert expand_story(story) is story
@@ -0,0 +1,67 @@
+from concurrent.futures import Future
+
+from upload_queue import UploadQueue, drain
+
+class FakeUploader:
+    """Uploads succeed except for keys in fail (each fails that many times)"""
+
+    def __init__(self, fail=None):
+        self.fail = dict(fail or {})
+        self.calls = []
+
+    def _future(self, key):
+        future = Future()
+        self.calls.append(key)
+        if self.fail.get(key):
+            self.fail[key] -= 1
+            future.set_exception(OSError(f"{key} failed"))
+        else:
+            future.set_result(key)
+        return future
+
+    def submit(self, path, key, content_type, extra_args=None):
+        return self._future(key)
+
+    def submit_bytes(self, data, key, content_type, extra_args=None):
+        return self._future(key)
+
+def test_done_objects_skipped_only_with_same_etag_and_args(tmp_path):
+    with UploadQueue(tmp_path / "q.sqlite", "bucket") as queue:
+        assert queue.enqueue(b"x", "k", "text/plain", {"CacheControl": "a"}, "etag1")
+        drain(queue, FakeUploader())
+        assert queue.counts() == {"done": 1}
+
+        assert not queue.enqueue(b"x", "k", "text/plain", {"CacheControl": "a"}, "etag1")
+        assert queue.enqueue(b"x", "k", "text/plain", {"CacheControl": "b"}, "etag1")
+        drain(queue, FakeUploader())
+        assert queue.enqueue(b"y", "k", "text/plain", {"CacheControl": "b"}, "etag2")
+        drain(queue, FakeUploader())
+        assert queue.enqueue(b"y", "k", "text/plain", {"CacheControl": "b"}, "etag2", force=True)
+
+def test_endpoints_keep_separate_state(tmp_path):
+    db = tmp_path / "q.sqlite"
+    with UploadQueue(db, "bucket") as queue:
+        queue.enqueue(b"x", "k", "text/plain", None, "etag")
+        drain(queue, FakeUploader())
+
+    with UploadQueue(db, "bucket", "http://localhost:9000") as queue:
+        assert queue.counts() == {}
+        assert queue.enqueue(b"x", "k", "text/plain", None, "etag")
+
+    with UploadQueue(db, "bucket") as queue:
+        assert queue.counts() == {"done": 1}
+
+def test_failures_are_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr("upload_queue.backoff_seconds", lambda attempts: 0)
+    uploader = FakeUploader(fail={"flaky": 2, "broken": 99})
+    results = []
+
+    with UploadQueue(tmp_path / "q.sqlite", "bucket", max_attempts=3) as queue:
+        for key in ("ok", "flaky", "broken"):
+            queue.enqueue(b"x", key, "text/plain", None, "etag")
+        drain(queue, uploader, lambda key, error, gave_up: results.append((key, error is None, gave_up)))
+
+        assert queue.counts() == {"done": 2, "failed": 1}
+    assert uploader.calls.count("flaky") == 3
+    assert uploader.calls.count("broken") == 3
+    assert ("broken", False, True) in results
@@ -6,84 +6,252 @@ What it does:
 1. Adds missing DynamoDB fields (s3_key, thumbnail_url, published)
 2. Uploads story JSONs to S3: stories/{story_id}.json
 3. Uploads images to S3: images/{story_id}/page-N.jpg
-4. Generates DynamoDB seed JSON
+4. Generates the DynamoDB seed (NDJSON, see seed_stream.py)
+
+Files from all stories are uploaded at once by a thread pool sharing one
+S3 client (see s3_uploader.py). Against a local S3 stand-in:
+    python3 upload-to-s3.py --endpoint-url http://localhost:9000 --bucket test-bucket
+
+Sync mode only uploads new or changed files (size + ETag vs the bucket
+listing) and can delete keys that no longer exist locally:
+    python3 upload-to-s3.py --sync
+    python3 upload-to-s3.py --sync --delete
+
+With --hashed-keys, images go to content-hashed keys
+(images/{story_id}/page-N.{hash}.jpg) with a one-year immutable
+Cache-Control, and the story JSON page URLs and thumbnail_url are
+rewritten to match. Re-encoded pages get new keys instead of overwriting,
+so the CDN never needs invalidating for images.
+
+Story JSONs are uploaded minified and pre-compressed (see json_payloads.py):
+stories/{story_id}.json as gzip with Content-Encoding set. --no-compress
+uploads the plain file. .json.br objects left by earlier runs are no
+longer uploaded and go away with --sync --delete.
+
+--invalidate clears overwritten and deleted keys from the CDN with a few
+collapsed wildcard paths (see cdn_invalidation.py), e.g. after re-running
+fix-metadata.py. --invalidate-dry-run only prints the plan:
+    python3 upload-to-s3.py --sync --invalidate
+
+Per-object upload state lives in content/upload-queue.sqlite, kept per
+endpoint and bucket: failed uploads are retried with backoff while the rest
+continue. --resume picks up an interrupted run, skipping objects already
+uploaded with the same ETag and extra_args (Cache-Control etc.); without it
+every file is uploaded again. --reset-queue starts from scratch.
+    python3 upload-to-s3.py --resume
+
+--bundles also uploads an offline bundle per story (see story_bundle.py):
+bundles/{story_id}.zip with the story JSON and pages in reading order, and
+bundles/{story_id}.index.json with byte offsets for ranged reads.
+
+--chunked also splits each story into stories/{story_id}/header.json (first
+pages) and stories/{story_id}/pages-N.json chunks (see story_chunks.py), and
+records the layout in the seed item so stories.get can answer with page 1
+before the rest of the story is read.
+
+--catalog also uploads the static catalog pages written by
+generate-ddb-seed.py (see catalog_pages.py): content-hashed pages with an
+immutable Cache-Control and catalog/index.json with a short one.
+
+Stories stored in the compact schema (compact-stories.py) are expanded while
+processing and written back and uploaded compact; bundles and chunks always
+carry full page URLs.
 """
 
+import argparse
+import gzip
 import json
-import boto3
+import re
 from pathlib import Path
-from botocore.exceptions import ClientError
+
+from catalog_pages import CATALOG_PREFIX, INDEX_CACHE_CONTROL, INDEX_KEY, index_page_keys
+from cdn_invalidation import (
+    find_distribution_id,
+    invalidate,
+    make_cloudfront_client,
+    plan_invalidation,
+)
+from json_payloads import JSON_CONTENT_TYPE, json_variants, minify
+from seed_stream import SEED_FILE, SeedWriter
+from story_bundle import (
+    BUNDLE_PREFIX,
+    ZIP_CONTENT_TYPE,
+    build_bundle,
+    bundle_index_key,
+    bundle_key,
+)
+from story_chunks import chunk_layout, split_story
+from story_schema import compact_story, expand_story, is_compact
+from s3_uploader import (
+    IMMUTABLE_CACHE_CONTROL,
+    ParallelUploader,
+    S3_ENDPOINT_URL,
+    UPLOAD_WORKERS,
+    content_hash,
+    delete_keys,
+    is_unchanged,
+    list_remote_objects,
+    local_etag,
+    local_etags,
+)
+from upload_queue import UploadQueue, drain
 
 BOOKDASH_DIR = Path(__file__).parent / "content" / "bookdash"
-DYNAMODB_SEED_FILE = Path(__file__).parent / "dynamodb-seed-stories.json"
+DYNAMODB_SEED_FILE = Path(__file__).parent / SEED_FILE
+UPLOAD_QUEUE_DB = Path(__file__).parent / "content" / "upload-queue.sqlite"
+CATALOG_DIR = Path(__file__).parent / "content" / CATALOG_PREFIX
 
 # S3 configuration
 BUCKET_NAME = "twinklepod-stories-beta"
 CLOUDFRONT_BASE = "https://d3lncscy0tzgzt.cloudfront.net"
 
-def upload_to_s3(local_path, s3_key, content_type="application/json"):
-    """Upload file to S3"""
-    s3 = boto3.client('s3')
-    try:
-        s3.upload_file(
-            str(local_path),
-            BUCKET_NAME,
-            s3_key,
-            ExtraArgs={'ContentType': content_type}
-        )
-        return True
-    except ClientError as e:
-        print(f"    ❌ S3 upload failed: {e}")
-        return False
-
-def process_story(json_file, index, total):
-    """Process and upload a single story"""
+# Prefixes owned by this script (listed and pruned in sync mode)
+SYNC_PREFIXES = ["stories/", "images/"]
+
+# Page renditions written by bookdash-images-only.py
+IMAGE_CONTENT_TYPES = {
+    ".jpg": "image/jpeg",
+    ".webp": "image/webp",
+}
+
+# Set by --bundles / --chunked, copied into the DynamoDB item
+OPTIONAL_LAYOUT_FIELDS = ("bundle_url", "bundle_index_url", "chunks")
+
+# Story JSON sizes across the run (bytes)
+JSON_STATS = {"stories": 0, "pretty": 0, "minified": 0, "gzip": 0}
+
+# page-3.jpg or page-3.0123456789ab.jpg (content-hashed)
+HASHED_NAME_RE = re.compile(r'^(?P<stem>.+?)(?:\.[0-9a-f]{12})?(?P<ext>\.[a-z]+)$')
+
+def local_image_name(name):
+    """Local file name for a (possibly content-hashed) image name"""
+    match = HASHED_NAME_RE.match(name)
+    return f"{match['stem']}{match['ext']}" if match else name
+
+def image_key(story_id, img_file, hashed_keys=False):
+    """S3 key for a page image"""
+    if hashed_keys:
+        return f"images/{story_id}/{img_file.stem}.{content_hash(img_file)}{img_file.suffix}"
+    return f"images/{story_id}/{img_file.name}"
+
+def story_payloads(story, json_file, compress=True):
+    """Upload entries for the story JSON itself (as stored on disk)"""
+    if not compress:
+        return [(json_file, story["s3_key"], JSON_CONTENT_TYPE, None)]
+
+    variants, minified_size = json_variants(story, story["s3_key"])
+    JSON_STATS["stories"] += 1
+    JSON_STATS["pretty"] += json_file.stat().st_size
+    JSON_STATS["minified"] += minified_size
+    for _, data, extra_args in variants:
+        JSON_STATS[extra_args["ContentEncoding"]] += len(data)
+
+    return [(data, key, JSON_CONTENT_TYPE, extra_args) for key, data, extra_args in variants]
+
+def print_json_report():
+    """Story JSON bytes before and after minifying/compressing"""
+    if not JSON_STATS["stories"]:
+        return
+
+    pretty = JSON_STATS["pretty"]
+    print(f"\n🗜️  Story JSON ({JSON_STATS['stories']} stories):")
+    print(f"   pretty:   {pretty / 1024:>8.1f} KB")
+    for name in ("minified", "gzip"):
+        size = JSON_STATS[name]
+        if size:
+            print(f"   {name + ':':<9} {size / 1024:>8.1f} KB ({100 * (1 - size / pretty):.0f}% smaller)")
+
+def json_uploads(obj, key, compress=True):
+    """Upload entries for a JSON object built in memory"""
+    if not compress:
+        return [(minify(obj), key, JSON_CONTENT_TYPE, None)]
+    variants, _ = json_variants(obj, key)
+    return [(data, variant_key, JSON_CONTENT_TYPE, extra_args) for variant_key, data, extra_args in variants]
+
+def bundle_payloads(story, image_files, compress=True):
+    """Build the story's offline bundle; upload entries for it and its index"""
+    story_id = story["story_id"]
+    files_by_name = {img_file.name: img_file for img_file in image_files}
+    page_files = [files_by_name[local_image_name(page["image"].rsplit("/", 1)[-1])] for page in story["pages"]]
+
+    bundle_path = BOOKDASH_DIR / story_id / "bundle.zip"
+    index = {"bundle": bundle_key(story_id), **build_bundle(story, page_files, bundle_path, IMAGE_CONTENT_TYPES)}
+
+    files = [(bundle_path, bundle_key(story_id), ZIP_CONTENT_TYPE, None)]
+    return files + json_uploads(index, bundle_index_key(story_id), compress)
+
+def chunk_payloads(story, compress=True):
+    """Upload entries for the story's header and page chunks"""
+    return [entry for key, obj in split_story(story, story["chunks"]) for entry in json_uploads(obj, key, compress)]
+
+def prepare_story(json_file, hashed_keys=False, compress=True, bundle=False, chunked=False):
+    """
+    Add DynamoDB fields to a story JSON and list the files to upload
+
+    Returns (story, [(source, s3_key, content_type, extra_args), ...]) where
+    source is a local path or in-memory bytes
+    """
     with open(json_file) as f:
         story = json.load(f)
-    
+
+    compact = is_compact(story)
+    story = expand_story(story)
     story_id = story["story_id"]
-    title = story["title"]
-    
-    print(f"[{index}/{total}] 📚 {title}")
-    
+
+    image_files = []
+    image_dir = BOOKDASH_DIR / story_id / "images"
+    if image_dir.exists():
+        image_files = sorted(p for p in image_dir.iterdir() if p.suffix in IMAGE_CONTENT_TYPES)
+    keys_by_name = {img_file.name: image_key(story_id, img_file, hashed_keys) for img_file in image_files}
+
+    # With hashed keys, point page URLs at the keys we upload to. Otherwise
+    # page URLs are left alone, except hashed names from an earlier
+    # --hashed-keys run, which go back to the plain keys uploaded now.
+    pages = story.get("pages", [])
+    for page in pages:
+        name = page["image"].rsplit("/", 1)[-1]
+        local_name = local_image_name(name)
+        if hashed_keys or local_name != name:
+            page["image"] = f"{CLOUDFRONT_BASE}/{keys_by_name.get(local_name, f'images/{story_id}/{local_name}')}"
+
     # Add DynamoDB fields
     story["s3_key"] = f"stories/{story_id}.json"
-    story["thumbnail_url"] = f"{CLOUDFRONT_BASE}/images/{story_id}/page-1.jpg"
+    # The first page is the cover (and may be .webp or a hashed key)
+    if pages:
+        story["thumbnail_url"] = pages[0]["image"]
+    else:
+        story["thumbnail_url"] = f"{CLOUDFRONT_BASE}/images/{story_id}/page-1.jpg"
     story["published"] = True
-    
-    # Save updated JSON
+
+    # Only advertise bundles/chunks uploaded by this run
+    for field in OPTIONAL_LAYOUT_FIELDS:
+        story.pop(field, None)
+    if bundle:
+        story["bundle_url"] = f"{CLOUDFRONT_BASE}/{bundle_key(story_id)}"
+        story["bundle_index_url"] = f"{CLOUDFRONT_BASE}/{bundle_index_key(story_id)}"
+    if chunked:
+        story["chunks"] = chunk_layout(story_id, len(pages))
+
+    # Save updated JSON, in the schema it was stored in
+    stored = compact_story(story, CLOUDFRONT_BASE) if compact else story
     with open(json_file, 'w') as f:
-        json.dump(story, f, indent=2)
-    
-    # Upload story JSON to S3
-    print(f"        📄 Uploading JSON...", end="", flush=True)
-    if upload_to_s3(json_file, story["s3_key"], "application/json"):
-        print(" ✓")
-    else:
-        print(" ✗ FAILED")
-        return None
-    
-    # Upload images to S3
-    image_dir = BOOKDASH_DIR / story_id / "images"
-    if image_dir.exists():
-        images = sorted(image_dir.glob("*.jpg"))
-        print(f"        🖼️  Uploading {len(images)} images...", end="", flush=True)
-        
-        uploaded_count = 0
-        for img_file in images:
-            s3_key = f"images/{story_id}/{img_file.name}"
-            if upload_to_s3(img_file, s3_key, "image/jpeg"):
-                uploaded_count += 1
-            else:
-                print(f" ✗ FAILED at {img_file.name}")
-                return None
-        
-        print(f" ✓ ({uploaded_count} images)")
-    else:
-        print(f"        ⚠️  No images directory found")
-    
-    # Create DynamoDB item (without pages array)
-    dynamodb_item = {
+        json.dump(stored, f, indent=2)
+
+    files = story_payloads(stored, json_file, compress)
+    if bundle:
+        files += bundle_payloads(story, image_files, compress)
+    if chunked:
+        files += chunk_payloads(story, compress)
+
+    image_args = {"CacheControl": IMMUTABLE_CACHE_CONTROL} if hashed_keys else None
+    for img_file in image_files:
+        files.append((img_file, keys_by_name[img_file.name], IMAGE_CONTENT_TYPES[img_file.suffix], image_args))
+
+    return story, files
+
+def create_dynamodb_item(story):
+    """Create DynamoDB item (without pages array)"""
+    return {
         "story_id": story["story_id"],
         "title": story["title"],
         "age_range": story["age_range"],
@@ -97,42 +265,283 @@ def process_story(json_file, index, total):
         "license": story.get("license", "CC-BY 4.0"),
         "source": story.get("source", ""),
         "published": story["published"],
-        "created_at": story["created_at"]
+        "created_at": story["created_at"],
+        **{field: story[field] for field in OPTIONAL_LAYOUT_FIELDS if field in story},
     }
-    
-    return dynamodb_item
 
-def main():
-    print("🚀 Uploading stories to S3...")
-    print(f"📦 Bucket: {BUCKET_NAME}\n")
-    
-    json_files = sorted(BOOKDASH_DIR.glob("*.json"))
+def skip_unchanged(story_files, etags, remote):
+    """Drop files whose size and ETag already match the bucket listing"""
+    skipped = 0
+    for index, files in story_files.items():
+        changed = [f for f in files if not is_unchanged(f[0], etags[f[0]], remote.get(f[1]))]
+        skipped += len(files) - len(changed)
+        story_files[index] = changed
+    return skipped
+
+def upload_stories(json_files, uploader, queue, remote=None, hashed_keys=False, compress=True,
+                   bundle=False, chunked=False, resume=False):
+    """
+    Upload every story's files in parallel through the persistent queue
+
+    remote: optional {key: (etag, size)} listing - files that already match
+    are skipped (sync mode)
+    hashed_keys: upload images to content-hashed, immutable keys
+    compress: upload story JSON minified and gzipped
+    bundle: also build and upload each story's offline bundle
+    chunked: also upload each story as a header + page chunks
+    resume: skip files the queue already uploaded with the same ETag and
+    extra_args (ignored in sync mode, where the bucket listing decides)
+
+    Failed uploads are retried with backoff (see upload_queue.py).
+
+    Returns (dynamodb_items, failed_count, local_keys, uploaded_keys) - a
+    story counts as uploaded only when its JSON and all of its images made it.
+    """
     total = len(json_files)
-    
-    stories = []
-    uploaded = 0
-    failed = 0
-    
+    stories = {}     # index -> story
+    story_files = {} # index -> files to upload
+    errors = {}      # index -> first error
+    uploaded_keys = set()
+
     for index, json_file in enumerate(json_files, 1):
         try:
-            dynamodb_item = process_story(json_file, index, total)
-            if dynamodb_item:
-                stories.append(dynamodb_item)
-                uploaded += 1
+            stories[index], story_files[index] = prepare_story(json_file, hashed_keys, compress, bundle, chunked)
+        except Exception as e:
+            print(f"[{index}/{total}] ❌ {json_file.name}: {e}")
+            errors[index] = e
+
+    local_keys = {f[1] for files in story_files.values() for f in files}
+
+    all_sources = [f[0] for files in story_files.values() for f in files]
+    print(f"🔍 Hashing {len(all_sources)} local files...")
+    etags = local_etags(all_sources)
+
+    if remote is not None:
+        skipped = skip_unchanged(story_files, etags, remote)
+        print(f"⏭️  {skipped} files unchanged")
+
+    story_by_key = {}
+    resumed = 0
+    for index, files in story_files.items():
+        for source, s3_key, content_type, extra_args in files:
+            # In sync mode the bucket listing already said this key differs
+            force = remote is not None or not resume
+            if queue.enqueue(source, s3_key, content_type, extra_args, etags[source], force=force):
+                story_by_key[s3_key] = index
             else:
+                resumed += 1
+    queue.drop_pending_except(story_by_key)
+
+    file_counts = {}  # index -> files to upload this run
+    for index in story_by_key.values():
+        file_counts[index] = file_counts.get(index, 0) + 1
+    remaining = dict(file_counts)  # index -> files still in flight
+
+    print(f"⏳ Uploading {len(story_by_key)} files from {len(file_counts)} stories"
+          f" ({resumed} already uploaded by an earlier run)...\n")
+
+    def on_result(s3_key, error, gave_up):
+        index = story_by_key[s3_key]
+        if error is None:
+            uploaded_keys.add(s3_key)
+        elif gave_up:
+            errors.setdefault(index, f"{s3_key}: {error}")
+        else:
+            print(f"    ↻ {s3_key}: {error} (retrying)")
+            return
+
+        remaining[index] -= 1
+        if remaining[index] == 0:
+            story = stories[index]
+            if index in errors:
+                print(f"[{index}/{total}] ✗ {story['title']} FAILED ({errors[index]})")
+            else:
+                print(f"[{index}/{total}] ✓ {story['title']} ({file_counts[index]} files)")
+
+    drain(queue, uploader, on_result)
+
+    items = [create_dynamodb_item(stories[i]) for i in sorted(stories) if i not in errors]
+    return items, len(errors), local_keys, uploaded_keys
+
+def previous_catalog_keys(uploader):
+    """Page keys the catalog index in the bucket links to"""
+    try:
+        response = uploader.client.get_object(Bucket=uploader.bucket, Key=INDEX_KEY)
+    except uploader.client.exceptions.NoSuchKey:
+        return set()
+    data = response["Body"].read()
+    if response.get("ContentEncoding") == "gzip":
+        data = gzip.decompress(data)
+    return set(index_page_keys(json.loads(data)))
+
+def upload_catalog(uploader, remote=None, compress=True):
+    """
+    Upload the catalog pages written by generate-ddb-seed.py
+
+    Pages go first so the index never points at a key that isn't there yet.
+    Returns (keep_keys, uploaded_keys, complete): keep_keys are the new
+    catalog's keys plus the pages the replaced index links to (still cached
+    for INDEX_CACHE_CONTROL's max-age); complete is False when the new index
+    didn't go up, and nothing under catalog/ should be deleted.
+    """
+    page_files = sorted(p for p in CATALOG_DIR.rglob("*.json") if p.name != "index.json")
+    index_file = CATALOG_DIR / "index.json"
+    if not index_file.exists():
+        print(f"⚠️  No catalog in {CATALOG_DIR} - run generate-ddb-seed.py first")
+        return set(), set(), False
+
+    print(f"\n📚 Uploading catalog ({len(page_files)} pages)...")
+    keep_keys = previous_catalog_keys(uploader) if remote is not None else set()
+    uploaded_keys = set()
+    failed = 0
+    for files, cache_control in (
+        (page_files, IMMUTABLE_CACHE_CONTROL),
+        ([index_file], INDEX_CACHE_CONTROL),
+    ):
+        futures = []
+        for path in files:
+            with open(path) as f:
+                obj = json.load(f)
+            key = f"{CATALOG_PREFIX}/{path.relative_to(CATALOG_DIR).as_posix()}"
+            for data, variant_key, content_type, extra_args in json_uploads(obj, key, compress):
+                keep_keys.add(variant_key)
+                if remote is not None and is_unchanged(data, local_etag(data), remote.get(variant_key)):
+                    continue
+                args = {**(extra_args or {}), "CacheControl": cache_control}
+                futures.append(uploader.submit_bytes(data, variant_key, content_type, args))
+
+        for future in futures:
+            try:
+                uploaded_keys.add(future.result())
+            except Exception as e:
+                print(f"   ❌ {e}")
                 failed += 1
-        except Exception as e:
-            print(f"        ❌ Error: {e}")
-            failed += 1
-        print()
-    
+        if failed:
+            break  # keep the old index if any page is missing
+
+    print(f"   {len(uploaded_keys)} uploaded, {failed} failed")
+    if failed:
+        print("   Catalog index not updated - re-run to retry")
+    return keep_keys, uploaded_keys, not failed
+
+def invalidate_cdn(args, changed_keys, known_keys):
+    """Invalidate overwritten/deleted keys with a minimal set of paths"""
+    paths = plan_invalidation(changed_keys, known_keys)
+    wildcards = sum(1 for p in paths if p.endswith("*"))
+    print(f"\n🌐 Invalidating {len(changed_keys)} changed keys as {len(paths)} paths ({wildcards} wildcards)")
+    if not paths:
+        return
+
+    if args.invalidate_dry_run:
+        invalidate(None, None, paths, dry_run=True)
+        return
+
+    client = make_cloudfront_client()
+    distribution_id = args.distribution_id or find_distribution_id(client, CLOUDFRONT_BASE.split("//", 1)[1])
+    invalidate(client, distribution_id, paths)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Upload BookDash stories to S3")
+    parser.add_argument("--bucket", default=BUCKET_NAME)
+    parser.add_argument("--endpoint-url", default=S3_ENDPOINT_URL,
+                        help="S3-compatible endpoint (MinIO, moto_server) for local testing")
+    parser.add_argument("--workers", type=int, default=UPLOAD_WORKERS,
+                        help="concurrent uploads")
+    parser.add_argument("--sync", action="store_true",
+                        help="only upload files that are new or changed")
+    parser.add_argument("--delete", action="store_true",
+                        help="with --sync, delete keys under stories/ and images/ with no local file")
+    parser.add_argument("--hashed-keys", action="store_true",
+                        help="content-hashed image keys with immutable Cache-Control")
+    parser.add_argument("--no-compress", dest="compress", action="store_false",
+                        help="upload story JSON as-is instead of minified gzip")
+    parser.add_argument("--bundles", action="store_true",
+                        help="also upload an offline bundle + range index per story")
+    parser.add_argument("--chunked", action="store_true",
+                        help="also upload a header + page chunks per story for progressive loading")
+    parser.add_argument("--catalog", action="store_true",
+                        help="also upload the static catalog pages from generate-ddb-seed.py")
+    parser.add_argument("--queue-db", type=Path, default=UPLOAD_QUEUE_DB,
+                        help="SQLite file holding per-object upload state")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip files an earlier run already uploaded unchanged")
+    parser.add_argument("--reset-queue", action="store_true",
+                        help="forget earlier runs and upload everything again")
+    parser.add_argument("--invalidate", action="store_true",
+                        help="invalidate overwritten and deleted keys on CloudFront")
+    parser.add_argument("--invalidate-dry-run", action="store_true",
+                        help="print the invalidation plan without calling CloudFront")
+    parser.add_argument("--distribution-id",
+                        help="CloudFront distribution (default: looked up from CLOUDFRONT_BASE)")
+    args = parser.parse_args()
+    if args.delete and not args.sync:
+        parser.error("--delete only works with --sync")
+    return args
+
+def main():
+    args = parse_args()
+
+    print("🚀 Uploading stories to S3...")
+    print(f"📦 Bucket: {args.bucket} ({args.workers} upload threads)\n")
+
+    json_files = sorted(BOOKDASH_DIR.glob("*.json"))
+    total = len(json_files)
+
+    invalidating = args.invalidate or args.invalidate_dry_run
+
+    with UploadQueue(args.queue_db, args.bucket, args.endpoint_url) as queue, \
+            ParallelUploader(args.bucket, workers=args.workers, endpoint_url=args.endpoint_url) as uploader:
+        if args.reset_queue:
+            queue.reset()
+
+        remote = None
+        if args.sync or invalidating:
+            prefixes = list(SYNC_PREFIXES)
+            if args.bundles:
+                prefixes.append(f"{BUNDLE_PREFIX}/")
+            if args.catalog:
+                prefixes.append(f"{CATALOG_PREFIX}/")
+            remote = list_remote_objects(uploader.client, args.bucket, prefixes)
+            print(f"☁️  {len(remote)} objects in bucket")
+        
+        stories, failed, local_keys, uploaded_keys = upload_stories(
+            json_files, uploader, queue, remote if args.sync else None, args.hashed_keys, args.compress,
+            args.bundles, args.chunked, args.resume)
+        
+        catalog_complete = False
+        if args.catalog:
+            catalog_keys, catalog_uploaded, catalog_complete = upload_catalog(
+                uploader, remote if args.sync else None, args.compress)
+            local_keys |= catalog_keys
+            uploaded_keys |= catalog_uploaded
+        
+        orphans = set()
+        if args.sync and args.delete and failed:
+            # A story that failed to prepare has no local keys, so its live
+            # objects would look orphaned
+            print(f"\n⚠️  {failed} stories failed - not deleting anything this run")
+        elif args.sync and args.delete:
+            orphans = set(remote) - local_keys
+            if not catalog_complete:
+                orphans = {key for key in orphans if not key.startswith(f"{CATALOG_PREFIX}/")}
+            print(f"\n🗑️  Deleting {len(orphans)} orphaned objects...")
+            deleted = delete_keys(uploader.client, args.bucket, orphans)
+            print(f"   Deleted {deleted}")
+
+    if invalidating:
+        # New keys were never cached - only overwritten or deleted ones
+        changed = (uploaded_keys & set(remote)) | orphans
+        invalidate_cdn(args, changed, set(remote) | local_keys)
+
     # Save DynamoDB seed
-    print(f"💾 Saving DynamoDB seed...")
-    with open(DYNAMODB_SEED_FILE, 'w') as f:
-        json.dump(stories, f, indent=2)
-    
+    print(f"\n💾 Saving DynamoDB seed...")
+    with SeedWriter(DYNAMODB_SEED_FILE) as seed:
+        seed.write_all(stories)
+
+    print_json_report()
+
     print("\n" + "=" * 60)
-    print(f"✅ Uploaded: {uploaded}/{total} stories")
+    print(f"✅ Uploaded: {len(stories)}/{total} stories")
     if failed > 0:
         print(f"❌ Failed: {failed}/{total} stories")
     print(f"📄 DynamoDB seed: {DYNAMODB_SEED_FILE}")
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Persistent, resumable upload queue backed by SQLite
+
+Every object to upload is a row keyed by (endpoint, bucket, key) with its
+ETag, upload arguments and state:
+- pending:   waiting for its first upload or a retry (next_attempt_at)
+- uploading: handed to the uploader (reset to pending if a run dies)
+- done:      uploaded with this ETag and extra_args - skipped by --resume runs
+- failed:    gave up after MAX_ATTEMPTS (queued again by the next run)
+
+Failures are retried with exponential backoff and full jitter while the
+rest of the queue keeps flowing, so a flaky connection costs a few retries
+instead of a full re-upload. Only the main thread touches the database;
+uploads run on the ParallelUploader's threads.
+
+The endpoint is part of the key so MinIO/moto test runs never share state
+with the real bucket ("" is AWS). Databases from before the endpoint column
+are dropped on open - the state is only a cache, the next run re-uploads.
+"""
+
+import json
+import random
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 2
+BACKOFF_MAX_SECONDS = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    endpoint TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    key TEXT NOT NULL,
+    path TEXT,
+    data BLOB,
+    content_type TEXT NOT NULL,
+    extra_args TEXT,
+    etag TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    PRIMARY KEY (endpoint, bucket, key)
+)
+"""
+
+def args_json(extra_args):
+    """Canonical JSON for extra_args, so equal arguments compare equal"""
+    return json.dumps(extra_args, sort_keys=True) if extra_args else None
+
+def backoff_seconds(attempts):
+    """Full-jitter exponential backoff for the given failed attempt count"""
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempts))
+
+class UploadQueue:
+    """Per-object upload state for one bucket on one endpoint (None = AWS)"""
+
+    def __init__(self, db_path, bucket, endpoint=None, max_attempts=MAX_ATTEMPTS):
+        self.bucket = bucket
+        self.scope = (endpoint or "", bucket)
+        self.max_attempts = max_attempts
+        self.db = sqlite3.connect(str(db_path))
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(uploads)")]
+        if columns and "endpoint" not in columns:
+            self.db.execute("DROP TABLE uploads")
+        self.db.execute(SCHEMA)
+        # A previous run stopped mid-upload: those objects start over
+        self.db.execute(
+            "UPDATE uploads SET state = 'pending' WHERE endpoint = ? AND bucket = ? AND state = 'uploading'",
+            self.scope,
+        )
+        self.db.commit()
+
+    def enqueue(self, source, key, content_type, extra_args, etag, force=False):
+        """
+        Record an object to upload; False if it's already done with this ETag
+        and these extra_args
+
+        source is a local path or in-memory bytes (stored in the queue, so
+        keep those small). force re-queues even done objects.
+        """
+        row = self.db.execute(
+            "SELECT etag, extra_args, state FROM uploads WHERE endpoint = ? AND bucket = ? AND key = ?",
+            (*self.scope, key),
+        ).fetchone()
+        if row == (etag, args_json(extra_args), "done") and not force:
+            return False
+
+        is_bytes = isinstance(source, bytes)
+        self.db.execute(
+            "INSERT OR REPLACE INTO uploads "
+            "(endpoint, bucket, key, path, data, content_type, extra_args, etag, state) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'pending')",
+            (*self.scope, key, None if is_bytes else str(source), source if is_bytes else None,
+             content_type, args_json(extra_args), etag),
+        )
+        return True
+
+    def drop_pending_except(self, keys):
+        """Forget unfinished objects from earlier runs that aren't in keys"""
+        pending = self.db.execute(
+            "SELECT key FROM uploads WHERE endpoint = ? AND bucket = ? AND state = 'pending'",
+            self.scope,
+        ).fetchall()
+        self.db.executemany(
+            "DELETE FROM uploads WHERE endpoint = ? AND bucket = ? AND key = ?",
+            [(*self.scope, key) for (key,) in pending if key not in keys],
+        )
+        self.db.commit()
+
+    def ready(self):
+        """Pending rows whose retry time has come, marked as uploading"""
+        rows = self.db.execute(
+            "SELECT key, path, data, content_type, extra_args FROM uploads "
+            "WHERE endpoint = ? AND bucket = ? AND state = 'pending' AND next_attempt_at <= ?",
+            (*self.scope, time.time()),
+        ).fetchall()
+        self.db.executemany(
+            "UPDATE uploads SET state = 'uploading' WHERE endpoint = ? AND bucket = ? AND key = ?",
+            [(*self.scope, row[0]) for row in rows],
+        )
+        self.db.commit()
+        return rows
+
+    def next_retry_in(self):
+        """Seconds until the next pending retry, or None if nothing is pending"""
+        row = self.db.execute(
+            "SELECT MIN(next_attempt_at) FROM uploads WHERE endpoint = ? AND bucket = ? AND state = 'pending'",
+            self.scope,
+        ).fetchone()
+        return None if row[0] is None else max(0, row[0] - time.time())
+
+    def mark_done(self, key):
+        self.db.execute(
+            "UPDATE uploads SET state = 'done', data = NULL, last_error = NULL "
+            "WHERE endpoint = ? AND bucket = ? AND key = ?",
+            (*self.scope, key),
+        )
+        self.db.commit()
+
+    def mark_failed(self, key, error):
+        """Schedule a retry with backoff; True if the object was given up on"""
+        (attempts,) = self.db.execute(
+            "SELECT attempts + 1 FROM uploads WHERE endpoint = ? AND bucket = ? AND key = ?",
+            (*self.scope, key),
+        ).fetchone()
+        gave_up = attempts >= self.max_attempts
+        self.db.execute(
+            "UPDATE uploads SET state = ?, attempts = ?, next_attempt_at = ?, last_error = ? "
+            "WHERE endpoint = ? AND bucket = ? AND key = ?",
+            ("failed" if gave_up else "pending", attempts, time.time() + backoff_seconds(attempts),
+             str(error), *self.scope, key),
+        )
+        self.db.commit()
+        return gave_up
+
+    def reset(self):
+        """Forget everything recorded for this bucket and endpoint"""
+        self.db.execute("DELETE FROM uploads WHERE endpoint = ? AND bucket = ?", self.scope)
+        self.db.commit()
+
+    def counts(self):
+        """{state: number of objects}"""
+        return dict(self.db.execute(
+            "SELECT state, COUNT(*) FROM uploads WHERE endpoint = ? AND bucket = ? GROUP BY state",
+            self.scope,
+        ).fetchall())
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def drain(queue, uploader, on_result=None):
+    """
+    Upload everything pending, retrying failures until done or given up
+
+    on_result(key, error, gave_up) is called after each attempt (error is
+    None on success).
+    """
+    in_flight = {}
+    while True:
+        for key, path, data, content_type, extra_args in queue.ready():
+            extra_args = json.loads(extra_args) if extra_args else None
+            if data is not None:
+                future = uploader.submit_bytes(data, key, content_type, extra_args)
+            else:
+                future = uploader.submit(path, key, content_type, extra_args)
+            in_flight[future] = key
+
+        retry_in = queue.next_retry_in()
+        if not in_flight:
+            if retry_in is None:
+                return
+            time.sleep(retry_in)
+            continue
+
+        done, _ = wait(in_flight, timeout=retry_in, return_when=FIRST_COMPLETED)
+        for future in done:
+            key = in_flight.pop(future)
+            try:
+                future.result()
+            except Exception as e:
+                gave_up = queue.mark_failed(key, e)
+                if on_result:
+                    on_result(key, e, gave_up)
+            else:
+                queue.mark_done(key)
+                if on_result:
+                    on_result(key, None, False)
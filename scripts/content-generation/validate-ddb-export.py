@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Validate a DynamoDB import-from-S3 export before uploading it
+
+Checks every gzip part written by seed-stories-table.py / generate-ddb-seed.py
+--export-dir (see ddb_export.py) against the stories key schema:
+    python3 validate-ddb-export.py content/ddb-export
+    python3 validate-ddb-export.py content/ddb-export --table TwinklePod-Database-beta-Stories...
+
+With --table, the key schema and index attributes come from the live table
+(DescribeTable) instead of the export's manifest.
+"""
+
+import argparse
+import sys
+
+import boto3
+
+from ddb_export import validate_export
+from ddb_loader import DYNAMODB_ENDPOINT_URL, REGION
+
+MAX_PROBLEMS_SHOWN = 20
+
+def table_schema(table_name, endpoint_url):
+    """(key schema, attribute definitions) of an existing table"""
+    client = boto3.client("dynamodb", region_name=REGION, endpoint_url=endpoint_url)
+    table = client.describe_table(TableName=table_name)["Table"]
+    return table["KeySchema"], table["AttributeDefinitions"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate a DynamoDB import-from-S3 export")
+    parser.add_argument("export_dir")
+    parser.add_argument("--table", help="check against this table's key schema instead of the manifest's")
+    parser.add_argument("--endpoint-url", default=DYNAMODB_ENDPOINT_URL)
+    args = parser.parse_args()
+
+    key_schema = attribute_definitions = None
+    if args.table:
+        key_schema, attribute_definitions = table_schema(args.table, args.endpoint_url)
+        print(f"🔑 Key schema from {args.table}: {', '.join(k['AttributeName'] for k in key_schema)}")
+
+    print(f"🔍 Validating {args.export_dir}...")
+    checked, problems = validate_export(args.export_dir, key_schema, attribute_definitions)
+
+    for problem in problems[:MAX_PROBLEMS_SHOWN]:
+        print(f"  ❌ {problem}")
+    if len(problems) > MAX_PROBLEMS_SHOWN:
+        print(f"  ... and {len(problems) - MAX_PROBLEMS_SHOWN} more")
+
+    if problems:
+        print(f"\n❌ {len(problems)} problems in {checked} items")
+        sys.exit(1)
+    print(f"\n✅ {checked} items OK")
+
+if __name__ == "__main__":
+    main()